@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Geração em Lote de Apresentações - DevSecOps Examples
+Gera uma variante do deck por cliente/idioma/ambiente em um pool de processos
+
+Uso:
+    python batch_presentations.py variants.example.json --workers 4
+
+Manifesto (JSON):
+    {
+      "output_dir": "dist",
+      "variants": [
+        {"name": "acme-pt-prod", "replacements": {"texto original": "novo texto"}}
+      ]
+    }
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from generate_presentation import create_presentation
+from presentation_cache import SlideCache
+
+# Cache de slides compartilhado pelos workers (preenchido pelo processo pai)
+_worker_cache = None
+
+
+def load_manifest(path):
+    """Lê o manifesto de variantes e resolve o arquivo de saída de cada uma"""
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    output_dir = manifest.get("output_dir", "dist")
+    variants = []
+    for variant in manifest["variants"]:
+        name = variant["name"]
+        variants.append({
+            "name": name,
+            "output": variant.get("output", os.path.join(output_dir, f"{name}.pptx")),
+            "replacements": variant.get("replacements", {}),
+        })
+    return variants
+
+
+def _init_worker():
+    """Abre o cache de slides uma vez por worker, em modo somente leitura"""
+    global _worker_cache
+    _worker_cache = SlideCache(read_only=True)
+
+
+def _build_variant(variant):
+    started = time.perf_counter()
+    create_presentation(output_file=variant["output"],
+                        replacements=variant["replacements"],
+                        cache=_worker_cache)
+    return variant["name"], time.perf_counter() - started
+
+
+def build_variants(variants, workers=None):
+    """Gera todas as variantes em paralelo e retorna {nome: segundos}
+
+    O processo pai faz um build aquecido antes de abrir o pool: os derivados
+    dos diagramas e o cache de slides ficam prontos em disco, e os workers
+    (criados por fork quando disponível) herdam os módulos já importados e
+    apenas restauram slides do cache, sem decodificar imagens.
+    """
+    warm_output = os.path.join(".cache", "batch-warmup.pptx")
+    create_presentation(incremental=True, output_file=warm_output)
+    os.remove(warm_output)
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker) as pool:
+        return dict(pool.map(_build_variant, variants))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera variantes da apresentação em paralelo")
+    parser.add_argument("manifest", help="manifesto JSON com as variantes")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="número de processos (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    variants = load_manifest(args.manifest)
+    started = time.perf_counter()
+    timings = build_variants(variants, args.workers)
+    elapsed = time.perf_counter() - started
+
+    print("\n📦 Variantes geradas:")
+    for variant in variants:
+        print(f"   {variant['name']:<30} {timings[variant['name']]:6.2f}s  {variant['output']}")
+    print(f"\n⚡ {len(variants)} decks em {elapsed:.2f}s "
+          f"({len(variants) / elapsed:.2f} decks/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Benchmarks - DevSecOps Examples
+Mede o custo de cada slide, do prs.save e de cada diagrama Graphviz
+
+Uso:
+    python benchmark.py --output benchmark-results.json
+    python benchmark.py --compare benchmark-baseline.json --threshold 0.10
+
+Cada caso roda em um processo próprio (fork). O processo herda as páginas
+do pai, então peak_rss_kb é o quanto o pico de RSS subiu desde o início do
+filho, e children_peak_rss_kb é o pico dos processos filhos como o `dot`.
+Um caso cujo processo morre sem resposta é registrado como erro. O
+resultado é gravado em JSON; com --compare, métricas que pioraram além do
+limiar são sinalizadas e o script termina com código 1.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from pptx import Presentation
+from pptx.util import Inches
+
+from diagram_builders import discover_builders
+from generate_presentation import slide_builders
+from presentation_theme import apply_theme
+
+# Métricas registradas por caso
+METRICS = ("wall_s", "cpu_s", "peak_rss_kb", "children_peak_rss_kb", "output_bytes")
+
+# Prefixo do nome dos casos de cada grupo
+CASE_PREFIXES = {"slides": "slide/", "save": "deck/", "diagrams": "diagram/"}
+
+# Diferenças absolutas abaixo destes valores não contam como regressão
+NOISE_FLOOR = {"wall_s": 0.005, "cpu_s": 0.005, "peak_rss_kb": 1024, "children_peak_rss_kb": 1024,
+               "output_bytes": 0}
+
+
+def _new_presentation():
+    prs = Presentation()
+    prs.slide_width = Inches(10)
+    prs.slide_height = Inches(7.5)
+    # Como em create_presentation: os estilos de texto vivem no layout
+    apply_theme(prs)
+    return prs
+
+
+def _slide_case(builder):
+    def setup():
+        prs = _new_presentation()
+
+        def run():
+            builder(prs)
+            size = 0
+            for slide in prs.slides:
+                size += len(slide.part.blob)
+                size += sum(len(rel.target_part.blob) for rel in slide.part.rels.values()
+                            if not rel.is_external and rel.target_part.partname.startswith("/ppt/media/"))
+            return size
+        return run
+    return setup
+
+
+def _save_case(workdir):
+    def setup():
+        prs = _new_presentation()
+        for builder in slide_builders():
+            builder(prs)
+        output = os.path.join(workdir, "deck.pptx")
+
+        def run():
+            prs.save(output)
+            return os.path.getsize(output)
+        return run
+    return setup
+
+
+def _diagram_case(diagram, workdir):
+    def setup():
+        output = os.path.join(workdir, diagram.output_name)
+
+        def run():
+            dot = diagram.func()
+            if diagram.dpi:
+                dot.attr(dpi=diagram.dpi)
+            path = dot.render(output, format="png", cleanup=True)
+            return os.path.getsize(path)
+        return run
+    return setup
+
+
+def collect_cases(workdir, groups=("slides", "save", "diagrams")):
+    """Retorna [(nome, setup)] dos casos de benchmark"""
+    cases = []
+    if "slides" in groups:
+        cases += [(f"{CASE_PREFIXES['slides']}{builder.__name__}", _slide_case(builder))
+                  for builder in slide_builders()]
+    if "save" in groups:
+        cases.append((f"{CASE_PREFIXES['save']}prs.save", _save_case(workdir)))
+    if "diagrams" in groups:
+        cases += [(f"{CASE_PREFIXES['diagrams']}{diagram.output_name}", _diagram_case(diagram, workdir))
+                  for diagram in discover_builders()]
+    return cases
+
+
+def _cpu_seconds():
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _peak_rss_kb(who=resource.RUSAGE_SELF):
+    peak = resource.getrusage(who).ru_maxrss
+    # macOS reporta bytes; Linux reporta KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run_case(setup, repeat, conn):
+    """Executa no processo filho: 1 aquecimento + repeat medições"""
+    # Pico herdado do pai no fork, descontado do pico do caso
+    baseline_rss = _peak_rss_kb()
+    try:
+        walls, cpus = [], []
+        size = 0
+        for i in range(repeat + 1):
+            run = setup()
+            wall, cpu = time.perf_counter(), _cpu_seconds()
+            size = run()
+            if i:
+                walls.append(time.perf_counter() - wall)
+                cpus.append(_cpu_seconds() - cpu)
+        conn.send({
+            "wall_s": statistics.median(walls),
+            "cpu_s": statistics.median(cpus),
+            "peak_rss_kb": _peak_rss_kb() - baseline_rss,
+            "children_peak_rss_kb": _peak_rss_kb(resource.RUSAGE_CHILDREN),
+            "output_bytes": size,
+        })
+    except Exception as exc:
+        conn.send({"error": f"{type(exc).__name__}: {exc}"})
+    finally:
+        conn.close()
+
+
+def run_benchmarks(repeat=3, groups=("slides", "save", "diagrams")):
+    """Roda todos os casos, cada um em um processo novo, e retorna os resultados"""
+    context = multiprocessing.get_context("fork")
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup in collect_cases(workdir, groups):
+            parent, child = context.Pipe(duplex=False)
+            process = context.Process(target=_run_case, args=(setup, repeat, child))
+            process.start()
+            child.close()
+            try:
+                results[name] = parent.recv()
+            except EOFError:
+                results[name] = None
+            process.join()
+            if results[name] is None:
+                # O filho morreu (sinal, os._exit, falha no C) sem enviar o resultado
+                results[name] = {"error": f"processo do caso terminou sem resultado (código {process.exitcode})"}
+
+            result = results[name]
+            if "error" in result:
+                print(f"⚠️  {name:<55} {result['error']}")
+            else:
+                print(f"⏱️  {name:<55} {result['wall_s']:8.3f}s wall {result['cpu_s']:8.3f}s cpu "
+                      f"+{result['peak_rss_kb'] / 1024:7.1f} MB "
+                      f"(filhos {result['children_peak_rss_kb'] / 1024:6.1f} MB) {result['output_bytes']:>10} B")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "rss": "delta",
+            "groups": list(groups),
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=0.10):
+    """Lista de regressões (caso, métrica, base, atual) acima do limiar relativo
+
+    Também são regressões: um caso que terminou com erro (métrica "erro",
+    atual = mensagem), um caso da referência ausente nos grupos executados
+    (métrica "ausente") e nenhum caso em comum com a referência.
+    """
+    regressions = []
+    # Referências antigas gravavam o RSS absoluto (com as páginas herdadas do pai)
+    skipped = set() if baseline.get("meta", {}).get("rss") == "delta" else {"peak_rss_kb"}
+    prefixes = tuple(CASE_PREFIXES[group] for group in current["meta"].get("groups", CASE_PREFIXES))
+    for name in sorted(baseline["results"]):
+        if name.startswith(prefixes) and name not in current["results"]:
+            regressions.append((name, "ausente", None, None))
+
+    compared = 0
+    for name, result in current["results"].items():
+        if "error" in result:
+            regressions.append((name, "erro", None, result["error"]))
+            continue
+        base = baseline["results"].get(name)
+        if not base or "error" in base:
+            continue
+        compared += 1
+        for metric in METRICS:
+            if metric in skipped or metric not in base:
+                continue
+            old, new = base[metric], result[metric]
+            if new - old > NOISE_FLOOR[metric] and new > old * (1 + threshold):
+                regressions.append((name, metric, old, new))
+    if not compared:
+        regressions.append(("(todos)", "sem casos em comum com a referência", None, None))
+    return regressions
+
+
+def format_regression(name, metric, old, new):
+    if metric == "erro":
+        return f"   {name:<55} erro: {new}"
+    if old is None:
+        return f"   {name:<55} {metric}"
+    change = f"{(new - old) / old:+.0%}" if old else "antes 0"
+    return f"   {name:<55} {metric:<12} {old:>12.4g} → {new:>12.4g} ({change})"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks da apresentação e dos diagramas")
+    parser.add_argument("--output", default="benchmark-results.json", help="arquivo JSON de saída")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON de referência para comparação")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="piora relativa tolerada antes de sinalizar (padrão: 0.10)")
+    parser.add_argument("--repeat", type=int, default=3, help="medições por caso (mediana)")
+    parser.add_argument("--only", nargs="+", choices=["slides", "save", "diagrams"],
+                        default=["slides", "save", "diagrams"], help="grupos de casos")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.repeat, args.only)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"\n✅ Resultados gravados: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressões (limiar {args.threshold:.0%}):")
+            for regression in regressions:
+                print(format_regression(*regression))
+            sys.exit(1)
+        print(f"\n✅ Nenhuma regressão em relação a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
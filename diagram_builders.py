@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Descoberta de Diagramas - DevSecOps Examples
+Localiza as funções create_*_diagram() dos scripts Graphviz em exemplos/
+"""
+
+import collections
+import glob
+import importlib.util
+import inspect
+import os
+
+import dot_writer
+
+# Raiz onde ficam os scripts de diagrama
+DIAGRAM_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exemplos")
+
+# Construtores de grafo: a biblioteca graphviz ou o escritor em fluxo compatível
+DOT_WRITERS = ("graphviz", "stream")
+
+DiagramBuilder = collections.namedtuple(
+    "DiagramBuilder", ["name", "script", "output_name", "dpi", "func", "data_files"])
+
+
+def load_script(path, writer="graphviz"):
+    """Importa um script pelo caminho (os diretórios têm espaços e acentos)
+
+    Com writer="stream", o Digraph importado pelo script passa a ser o
+    dot_writer.Digraph: as funções create_*_diagram() não mudam.
+    """
+    module_name = "_diagram_" + os.path.relpath(path, DIAGRAM_ROOT).replace(os.sep, "_")
+    module_name = "".join(ch if ch.isalnum() else "_" for ch in module_name)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    if writer == "stream":
+        module.Digraph = dot_writer.Digraph
+    return module
+
+
+def discover_builders(root=DIAGRAM_ROOT, writer="graphviz"):
+    """Retorna os DiagramBuilder de todos os scripts Graphviz, em ordem de caminho
+
+    Apenas scripts que importam graphviz são carregados (os demais exemplos
+    dependem de SDKs de nuvem). Cada script define OUTPUT_NAME e, quando a
+    resolução não vem do próprio grafo, DPI; scripts cujo grafo depende de
+    arquivos de dados os listam em DATA_FILES.
+    """
+    builders = []
+    for path in sorted(glob.glob(os.path.join(root, "**", "*.py"), recursive=True)):
+        with open(path, encoding="utf-8") as f:
+            if "from graphviz import" not in f.read():
+                continue
+
+        module = load_script(path, writer)
+        builders += _module_builders(module, path)
+    return builders
+
+
+def _module_builders(module, path):
+    builders = []
+    for name, func in inspect.getmembers(module, inspect.isfunction):
+        if (name.startswith("create_") and name.endswith("_diagram")
+                and func.__module__ == module.__name__):
+            builders.append(DiagramBuilder(
+                name=name,
+                script=path,
+                output_name=module.OUTPUT_NAME,
+                dpi=getattr(module, "DPI", None),
+                func=func,
+                data_files=tuple(getattr(module, "DATA_FILES", ())),
+            ))
+    return builders
+
+
+def script_builders(script, writer="graphviz"):
+    """DiagramBuilder das funções create_*_diagram() de um único script"""
+    return _module_builders(load_script(script, writer), script)
+
+
+def load_builder(script, name, writer="graphviz"):
+    """Recarrega um builder pelo caminho do script (usado por processos worker)"""
+    for builder in script_builders(script, writer):
+        if builder.name == name:
+            return builder
+    raise LookupError(f"{name} não encontrado em {script}")
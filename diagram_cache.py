@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Cache de Renderização - DevSecOps Examples
+Reaproveita diagramas já renderizados, indexados pelo conteúdo do DOT
+"""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+
+import graphviz
+
+from diagram_lod import planned_level
+
+# Diretório do cache de renderizações
+CACHE_DIR = os.path.join(".cache", "renders")
+
+# Tamanho máximo do cache antes de remover as entradas menos usadas
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Incrementar quando a forma de calcular a chave mudar
+CACHE_VERSION = 2
+
+
+@functools.lru_cache(maxsize=None)
+def graphviz_version():
+    """Versão do Graphviz instalado (faz parte da chave: outra versão, outro layout)"""
+    return ".".join(str(part) for part in graphviz.version())
+
+
+def render_key(dot, fmt):
+    """Chave do artefato: fonte DOT + formato + engine + versão do Graphviz + nível de detalhe
+
+    A resolução (dpi) já está no próprio fonte DOT como atributo do grafo.
+    O nível é o indicado pelo tamanho do grafo (diagram_lod.planned_level):
+    um layout que caiu para um nível mais agregado por tempo não deve ser
+    guardado sob esta chave.
+    """
+    digest = hashlib.sha256()
+    for part in (str(CACHE_VERSION), dot.source, fmt, dot.engine, graphviz_version(),
+                 planned_level(dot.source).name):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Cache em disco de artefatos renderizados com remoção LRU por tamanho"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats_path = os.path.join(cache_dir, "stats.json")
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _paths(self, key):
+        return os.path.join(self.cache_dir, key), os.path.join(self.cache_dir, f"{key}.json")
+
+    def fetch(self, key, destination):
+        """Copia o artefato para destination; retorna os segundos de render poupados ou None"""
+        artifact, meta = self._paths(key)
+        try:
+            with open(meta, encoding="utf-8") as f:
+                seconds = json.load(f)["seconds"]
+            shutil.copyfile(artifact, destination)
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+        # Atualiza mtime para a política de remoção (menos recentemente usado)
+        os.utime(artifact)
+        return seconds
+
+    def load(self, key):
+        """Retorna os bytes do artefato em cache, ou None"""
+        artifact, _ = self._paths(key)
+        try:
+            with open(artifact, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        os.utime(artifact)
+        return blob
+
+    def store(self, key, path, seconds):
+        """Guarda uma cópia do artefato renderizado e o tempo que o render levou"""
+        artifact, _ = self._paths(key)
+        suffix = f".{os.getpid()}.tmp"
+        shutil.copyfile(path, artifact + suffix)
+        self._commit(key, suffix, seconds)
+
+    def save(self, key, blob, seconds):
+        """Como store, para um artefato renderizado em memória"""
+        artifact, _ = self._paths(key)
+        suffix = f".{os.getpid()}.tmp"
+        with open(artifact + suffix, "wb") as f:
+            f.write(blob)
+        self._commit(key, suffix, seconds)
+
+    def _commit(self, key, suffix, seconds):
+        """Publica o artefato gravado em <chave><suffix> junto com seus metadados"""
+        artifact, meta = self._paths(key)
+        with open(meta + suffix, "w", encoding="utf-8") as f:
+            json.dump({"seconds": seconds}, f)
+        os.replace(artifact + suffix, artifact)
+        os.replace(meta + suffix, meta)
+        self.evict()
+
+    def evict(self):
+        """Remove os artefatos menos recentemente usados até caber em max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if len(name) == 64 and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for stale in (path, path + ".json"):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def record(self, hits, misses, seconds_saved):
+        """Acumula os contadores de acerto/falha em stats.json e retorna o total"""
+        try:
+            with open(self.stats_path, encoding="utf-8") as f:
+                stats = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stats = {"hits": 0, "misses": 0, "seconds_saved": 0.0}
+        stats["hits"] += hits
+        stats["misses"] += misses
+        stats["seconds_saved"] += seconds_saved
+
+        tmp_path = f"{self.stats_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+        os.replace(tmp_path, self.stats_path)
+        return stats
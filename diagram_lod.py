@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Nível de Detalhe dos Diagramas - DevSecOps Examples
+Simplifica diagramas grandes antes do layout
+
+Uso:
+    python diagram_lod.py grafo.gv            # mostra o nível escolhido
+    python diagram_lod.py grafo.gv -o layout.gv
+
+Para grafos com milhares de recursos, o dot com splines='ortho' fica
+superlinear. Cada nível define um limite de nós, o tamanho a partir do qual
+clusters (cluster_datasources, subgrafos por AZ...) viram um nó-resumo, a
+engine, o modo de splines e um orçamento de tempo de layout. Se o layout
+estoura o orçamento, o próximo nível (mais agregado) é tentado.
+"""
+
+import argparse
+import collections
+import re
+import subprocess
+import time
+
+import graphviz
+
+LodLevel = collections.namedtuple(
+    "LodLevel", ["name", "max_nodes", "cluster_threshold", "engine", "splines", "time_budget"])
+
+# Níveis do mais detalhado ao mais agregado. None mantém o que o grafo define;
+# max_nodes None aceita qualquer tamanho. time_budget em segundos.
+LEVELS = (
+    LodLevel("detalhado", 500, None, None, None, 60),
+    LodLevel("agrupado", 5000, 40, "dot", "polyline", 120),
+    LodLevel("visao-geral", None, 5, "sfdp", "line", 180),
+)
+
+# Atributos extras por engine (sfdp sem sobreposição de nós)
+ENGINE_ATTRS = {"sfdp": {"overlap": "prism", "outputorder": "edgesfirst"}}
+
+_TOKEN = re.compile(r'''
+    (?P<space>\s+|//[^\n]*|/\*.*?\*/|^\#[^\n]*)
+  | (?P<string>"(?:\\.|[^"\\])*")
+  | (?P<html><)
+  | (?P<edgeop>->|--)
+  | (?P<punct>[{}\[\];=,:])
+  | (?P<id>-?(?:\.\d+|\d+(?:\.\d*)?)|[A-Za-z_\x80-\U0010ffff][\w\x80-\U0010ffff]*)
+''', re.S | re.M | re.X)
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise ValueError(f"DOT inválido na posição {pos}: {text[pos:pos + 20]!r}")
+        if match.lastgroup == "html":
+            # <...> com sinais aninhados (rótulos HTML)
+            depth, end = 0, pos
+            while True:
+                depth += {"<": 1, ">": -1}.get(text[end], 0)
+                end += 1
+                if depth == 0:
+                    break
+            tokens.append(text[pos:end])
+            pos = end
+            continue
+        if match.lastgroup != "space":
+            tokens.append(match.group())
+        pos = match.end()
+    return tokens
+
+
+def unquote(value):
+    """Texto de um ID DOT (remove aspas e escapes de aspas)"""
+    if value.startswith('"'):
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+
+def quote(text):
+    return '"' + text.replace('"', '\\"') + '"'
+
+
+class Graph:
+    """Grafo ou subgrafo DOT com os valores guardados como no texto original
+
+    stmts: ("attr", "graph"|"node"|"edge", attrs), ("set", chave, valor),
+    ("node", id, attrs), ("edge", [(id, porta)], attrs) ou ("subgraph", Graph).
+    """
+
+    def __init__(self, name=None, keyword="subgraph", directed=True):
+        self.name = name
+        self.keyword = keyword
+        self.directed = directed
+        self.stmts = []
+
+    def nodes(self):
+        """IDs declarados neste grafo e nos subgrafos (primeira aparição)"""
+        seen = {}
+        for stmt in self.stmts:
+            if stmt[0] == "node":
+                seen.setdefault(stmt[1], None)
+            elif stmt[0] == "edge":
+                for node, _ in stmt[1]:
+                    seen.setdefault(node, None)
+            elif stmt[0] == "subgraph":
+                for node in stmt[1].nodes():
+                    seen.setdefault(node, None)
+        return list(seen)
+
+    def attr(self, name):
+        """Valor de um atributo de grafo (label, fillcolor...) definido neste nível"""
+        value = None
+        for stmt in self.stmts:
+            if stmt[0] == "set" and stmt[1] == name:
+                value = stmt[2]
+            elif stmt[0] == "attr" and stmt[1] == "graph" and name in stmt[2]:
+                value = stmt[2][name]
+        return value
+
+    def source(self, indent=""):
+        lines = [f"{indent}{self.keyword} {self.name + ' ' if self.name else ''}{{"]
+        inner = indent + "\t"
+        for stmt in self.stmts:
+            kind = stmt[0]
+            if kind == "subgraph":
+                lines.append(stmt[1].source(inner))
+            elif kind == "set":
+                lines.append(f"{inner}{stmt[1]}={stmt[2]}")
+            elif kind == "edge":
+                op = " -> " if self.directed else " -- "
+                ids = op.join(node + port for node, port in stmt[1])
+                lines.append(f"{inner}{ids}{_attr_list(stmt[2])}")
+            else:
+                lines.append(f"{inner}{stmt[1]}{_attr_list(stmt[2])}")
+        lines.append(indent + "}")
+        return "\n".join(lines)
+
+
+def _attr_list(attrs):
+    if not attrs:
+        return ""
+    return " [" + " ".join(f"{key}={value}" for key, value in attrs.items()) + "]"
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"DOT inválido: esperado {expected!r}, encontrado {token!r}")
+        self.pos += 1
+        return token
+
+    def graph(self):
+        keyword = self.take()
+        if keyword == "strict":
+            keyword += " " + self.take()
+        name = None if self.peek() == "{" else self.take()
+        graph = Graph(name, keyword, directed=keyword.endswith("digraph"))
+        self.take("{")
+        self.stmt_list(graph)
+        return graph
+
+    def attrs(self):
+        attrs = {}
+        while self.peek() == "[":
+            self.take("[")
+            while self.peek() != "]":
+                key = self.take()
+                self.take("=")
+                attrs[key] = self.take()
+                if self.peek() in (",", ";"):
+                    self.take()
+            self.take("]")
+        return attrs
+
+    def endpoint(self):
+        node, port = self.take(), ""
+        while self.peek() == ":":
+            port += self.take() + self.take()
+        return node, port
+
+    def stmt_list(self, graph):
+        while self.peek() != "}":
+            token = self.peek()
+            if token in ("graph", "node", "edge") and self.peek(1) == "[":
+                self.take()
+                graph.stmts.append(("attr", token, self.attrs()))
+            elif token in ("subgraph", "{"):
+                if token == "subgraph":
+                    self.take()
+                name = None if self.peek() == "{" else self.take()
+                sub = Graph(name, directed=graph.directed)
+                self.take("{")
+                self.stmt_list(sub)
+                graph.stmts.append(("subgraph", sub))
+            elif self.peek(1) == "=":
+                key = self.take()
+                self.take("=")
+                graph.stmts.append(("set", key, self.take()))
+            else:
+                ids = [self.endpoint()]
+                while self.peek() in ("->", "--"):
+                    self.take()
+                    ids.append(self.endpoint())
+                attrs = self.attrs()
+                if len(ids) > 1:
+                    graph.stmts.append(("edge", ids, attrs))
+                else:
+                    node, port = ids[0]
+                    graph.stmts.append(("node", node + port, attrs))
+            if self.peek() == ";":
+                self.take()
+        self.take("}")
+
+
+def parse(text):
+    """Lê o subconjunto de DOT gerado pela biblioteca graphviz"""
+    return _Parser(_tokenize(text)).graph()
+
+
+def _collapse(graph, threshold, mapping):
+    """Substitui, de baixo para cima, clusters com mais de threshold nós visíveis"""
+    stmts = []
+    for stmt in graph.stmts:
+        if stmt[0] == "subgraph":
+            sub = stmt[1]
+            _collapse(sub, threshold, mapping)
+            name = unquote(sub.name or "")
+            members = [node for node in sub.nodes() if node not in mapping]
+            if name.startswith("cluster") and len(members) > threshold:
+                summary = quote(name)
+                label = unquote(sub.attr("label") or quote(name.replace("cluster_", "")))
+                # Nós-resumo internos também apontam para o novo resumo (ver _resolve)
+                for node in members:
+                    mapping[node] = summary
+                attrs = {"label": quote(f"{label}\n({len(members)} nós)"), "shape": "box3d"}
+                if sub.attr("fillcolor"):
+                    attrs.update(style="filled", fillcolor=sub.attr("fillcolor"))
+                stmts.append(("node", summary, attrs))
+                continue
+        stmts.append(stmt)
+    graph.stmts = stmts
+
+
+def _resolve(mapping, node):
+    """Nó-resumo mais externo que representa node"""
+    while node in mapping:
+        node = mapping[node]
+    return node
+
+
+def _rewrite_edges(graph, mapping, seen):
+    """Redireciona arestas para os nós-resumo, sem laços nem duplicatas"""
+    stmts = []
+    for stmt in graph.stmts:
+        if stmt[0] == "subgraph":
+            _rewrite_edges(stmt[1], mapping, seen)
+        elif stmt[0] == "node" and stmt[1] in mapping:
+            continue
+        elif stmt[0] == "edge" and any(node in mapping for node, _ in stmt[1]):
+            ids = [(_resolve(mapping, node), "") if node in mapping else (node, port)
+                   for node, port in stmt[1]]
+            # Rótulos descreviam uma conexão individual, não o agregado
+            attrs = {key: value for key, value in stmt[2].items() if key not in ("label", "xlabel")}
+            for pair in zip(ids, ids[1:]):
+                if pair[0][0] != pair[1][0] and pair not in seen:
+                    seen.add(pair)
+                    stmts.append(("edge", list(pair), attrs))
+            continue
+        stmts.append(stmt)
+    graph.stmts = stmts
+
+
+def simplify(graph, level):
+    """Aplica o nível ao grafo (in-place) e retorna quantos nós restaram"""
+    if level.cluster_threshold is not None:
+        mapping = {}
+        _collapse(graph, level.cluster_threshold, mapping)
+        _rewrite_edges(graph, mapping, set())
+
+    overrides = dict(ENGINE_ATTRS.get(level.engine, {}))
+    if level.splines is not None:
+        overrides["splines"] = level.splines
+    if overrides:
+        graph.stmts.append(("attr", "graph", overrides))
+    return len(graph.nodes())
+
+
+def choose_level(node_count):
+    """Primeiro nível cujo limite comporta o grafo"""
+    for index, level in enumerate(LEVELS):
+        if level.max_nodes is None or node_count <= level.max_nodes:
+            return index
+    return len(LEVELS) - 1
+
+
+def planned_level(source):
+    """Nível indicado pelo tamanho do grafo (o layout só passa adiante se estourar o tempo)"""
+    return LEVELS[choose_level(len(parse(source).nodes()))]
+
+
+def layout(dot, output_format="dot"):
+    """Executa o layout com nível de detalhe e orçamento de tempo
+
+    Retorna (layout, nível, nós visíveis, segundos). Estourar o orçamento de
+    um nível passa para o seguinte; no último, subprocess.TimeoutExpired sobe.
+    """
+    graph = parse(dot.source)
+    node_count = len(graph.nodes())
+    for index in range(choose_level(node_count), len(LEVELS)):
+        level = LEVELS[index]
+        if index == 0:
+            source, engine, visible = dot.source, dot.engine, node_count
+        else:
+            graph = parse(dot.source)
+            visible = simplify(graph, level)
+            source, engine = graph.source(), level.engine or dot.engine
+
+        started = time.perf_counter()
+        try:
+            result = subprocess.run([engine, f"-T{output_format}"], input=source.encode(),
+                                    capture_output=True, check=True, timeout=level.time_budget)
+        except subprocess.TimeoutExpired:
+            if index == len(LEVELS) - 1:
+                raise
+            print(f"⚠️  Layout '{level.name}' excedeu {level.time_budget}s, agregando mais")
+            continue
+        return result.stdout.decode(), level, visible, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Layout com nível de detalhe para grafos grandes")
+    parser.add_argument("source", help="arquivo DOT")
+    parser.add_argument("-o", "--output", help="grava o DOT posicionado neste arquivo")
+    args = parser.parse_args()
+
+    dot = graphviz.Source.from_file(args.source)
+    positioned, level, visible, seconds = layout(dot)
+    print(f"✅ Nível '{level.name}': {visible} nós visíveis, layout em {seconds:.2f}s")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(positioned)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Pirâmide de Resoluções - DevSecOps Examples
+Um único artefato por diagrama com todas as larguras usadas pelos consumidores
+
+Uso:
+    python render_diagrams.py --formats pyramid svg
+    python diagram_pyramid.py diagrama.pyramid                  # lista os níveis
+    python diagram_pyramid.py diagrama.pyramid --width 900 -o quadro.png
+
+O diagrama posicionado é rasterizado uma única vez, na largura do maior nível
+(o PNG HD que o convert-to-high-dpi.sh gerava com o ImageMagick); cada nível
+menor é reduzido a partir do anterior, na mesma passada. O artefato é um ZIP
+sem compressão (os PNGs já são comprimidos) com index.json descrevendo os
+níveis: o consumidor lê só o nível mais próximo do que precisa, sem
+redimensionar nem renderizar de novo. O ZIP é canônico (reproducible.py):
+o mesmo layout gera sempre os mesmos bytes.
+"""
+
+import argparse
+import io
+import json
+import zipfile
+
+from PIL import Image
+
+from reproducible import write_canonical_zip
+from tiled_raster import draw_png, raster_geometry
+
+# Níveis (nome, largura em pixels), do maior para o menor
+PYRAMID_LEVELS = (
+    ("hd", 4000),          # PNG de alta qualidade (antigo convert-to-high-dpi.sh)
+    ("impressao", 3300),   # PDF impresso: 11" a 300 dpi
+    ("quadro-9", 1800),    # quadro de 9" do slide a 200 dpi
+    ("quadro-4.5", 900),   # quadro de 4.5" do slide a 200 dpi
+    ("miniatura", 320),    # miniaturas dos slides
+)
+
+# Extensão do artefato gerado ao lado do script
+PYRAMID_FORMAT = "pyramid"
+
+# Membro do ZIP com a descrição dos níveis
+INDEX_NAME = "index.json"
+
+# Incrementar quando o layout do artefato mudar
+PYRAMID_VERSION = 1
+
+# Incrementar quando build_levels mudar os pixels gerados (entra na chave do cache)
+LEVELS_VERSION = 2
+
+
+def build_levels(png, levels=PYRAMID_LEVELS):
+    """Gera (nome, imagem) do maior para o menor nível a partir do raster do topo
+
+    O topo é o raster do draw_png como veio, na largura real (que pode
+    diferir alguns pixels da nominal, ou ser menor se o grafo limitou a
+    escala); nunca é reamostrado. Os demais níveis são reduzidos do anterior,
+    e os que seriam mais largos que ele são omitidos: nada é ampliado.
+    """
+    img = Image.open(io.BytesIO(png))
+    img.load()
+    ordered = sorted(levels, key=lambda level: -level[1])
+    yield ordered[0][0], img
+    for name, width in ordered[1:]:
+        if width > img.width:
+            print(f"⚠️  Nível {name} ({width}px) omitido: o raster tem {img.width}px")
+            continue
+        if width < img.width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        yield name, img
+
+
+def write_pyramid(positioned, path, levels=PYRAMID_LEVELS):
+    """Rasteriza o DOT posicionado uma vez e grava a pirâmide em path
+
+    Retorna o índice gravado em index.json.
+    """
+    geometry = raster_geometry(positioned)
+    png = draw_png(positioned, max(width for _, width in levels))
+    index = {"version": PYRAMID_VERSION, "levels": []}
+    members = {}
+    for name, img in build_levels(png, levels):
+        # Resolução equivalente: mesma escala do dpi do grafo
+        dpi = round(img.width * 72 / geometry.view_x, 2) if geometry else None
+        out = io.BytesIO()
+        img.save(out, format="PNG", dpi=(dpi, dpi) if dpi else None)
+        member = f"{name}.png"
+        members[member] = (out.getvalue(), False)
+        index["levels"].append({"name": name, "file": member, "width": img.width,
+                                "height": img.height, "dpi": dpi})
+    members[INDEX_NAME] = (json.dumps(index, indent=2).encode(), False)
+    with open(path, "wb") as f:
+        write_canonical_zip(f, members)
+    return index
+
+
+class Pyramid:
+    """Leitor de um artefato .pyramid"""
+
+    def __init__(self, path):
+        self.path = path
+        with zipfile.ZipFile(path) as archive:
+            self.index = json.loads(archive.read(INDEX_NAME))
+        if self.index.get("version") != PYRAMID_VERSION:
+            raise ValueError(f"{path}: versão de pirâmide não suportada: {self.index.get('version')}")
+        self.levels = sorted(self.index["levels"], key=lambda level: level["width"])
+
+    def closest(self, width):
+        """Menor nível com pelo menos width pixels (o maior, se nenhum alcançar)"""
+        for level in self.levels:
+            if level["width"] >= width:
+                return level
+        return self.levels[-1]
+
+    def read(self, level):
+        """Bytes PNG de um nível do índice"""
+        with zipfile.ZipFile(self.path) as archive:
+            return archive.read(level["file"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lista ou extrai níveis de uma pirâmide de diagrama")
+    parser.add_argument("pyramid", help="artefato .pyramid gerado por render_diagrams.py")
+    parser.add_argument("--width", type=int, help="largura desejada em pixels")
+    parser.add_argument("-o", "--output", help="grava o PNG do nível mais próximo de --width")
+    args = parser.parse_args()
+
+    pyramid = Pyramid(args.pyramid)
+    if args.width is None:
+        for level in reversed(pyramid.levels):
+            print(f"{level['name']:<12} {level['width']:>6}x{level['height']:<6} {level['dpi'] or '-'} dpi")
+        return
+
+    level = pyramid.closest(args.width)
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(pyramid.read(level))
+    print(f"✅ Nível '{level['name']}' ({level['width']}x{level['height']}) para {args.width}px"
+          + (f": {args.output}" if args.output else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Escrita de DOT em Fluxo - DevSecOps Examples
+Emite o DOT direto em um arquivo ou pipe, sem acumular linhas em memória
+
+graphviz.Digraph guarda cada node()/edge() em uma lista e repete o conjunto
+completo de atributos (fontname, fillcolor, fontcolor, shape...) em cada nó.
+Aqui cada linha é escrita assim que chamada e os atributos de estilo viram
+defaults do escopo (node [...] / edge [...]): só os atributos que mudam em
+relação ao nó anterior são emitidos, e a linha do nó leva apenas o rótulo.
+
+Regras para manter a semântica do DOT:
+- defaults valem para nós criados depois, então um nó já criado (por uma
+  aresta, por exemplo) recebe seus atributos na própria linha;
+- antes de uma aresta criar nós implicitamente, os defaults de nó voltam ao
+  que o usuário definiu com attr('node', ...);
+- um atributo que sai do estilo é redefinido como "" (valor padrão).
+
+Digraph é um substituto de graphviz.Digraph com a mesma API usada pelos
+scripts de exemplos/; stream_render alimenta o stdin do Graphviz enquanto o
+grafo é construído.
+"""
+
+import contextlib
+import io
+import re
+import subprocess
+
+import graphviz
+from graphviz import quoting
+
+# IDs que o DOT aceita sem aspas (mesma regra de graphviz.quoting)
+_PLAIN_ID = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*|-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)")
+
+
+def quote(identifier):
+    """graphviz.quoting.quote sem o custo do caso comum (texto sem aspas nem HTML)"""
+    if _PLAIN_ID.fullmatch(identifier):
+        if identifier.lower() not in quoting.KEYWORDS:
+            return identifier
+    elif '"' in identifier or "\\" in identifier or identifier.startswith("<"):
+        return quoting.quote(identifier)
+    return f'"{identifier}"'
+
+
+def quote_edge(identifier):
+    """Extremidade de aresta: nó[:porta[:compasso]]"""
+    node, _, rest = identifier.partition(":")
+    if not rest:
+        return quote(node)
+    port, _, compass = rest.partition(":")
+    return ":".join([quote(node), quote(port)] + ([compass] if compass else []))
+
+
+def a_list(label=None, attrs=None):
+    """Lista de atributos como graphviz.quoting.a_list (rótulo primeiro, demais em ordem)"""
+    result = [f"label={quote(label)}"] if label is not None else []
+    if attrs:
+        result += [f"{quote(key)}={quote(value)}" for key, value in sorted(attrs.items())]
+    return " ".join(result)
+
+
+def _merge(label, kwargs, attributes):
+    """Atributos na ordem do graphviz (label, kwargs, _attributes), sem valores None"""
+    merged = {}
+    if label is not None:
+        merged["label"] = label
+    for source in (kwargs, attributes):
+        if source:
+            for key, value in dict(source).items():
+                if value is not None:
+                    merged[key] = value if isinstance(value, str) else str(value)
+    return merged
+
+
+class _GraphWriter:
+    """Escopo de grafo ou subgrafo; só o escopo mais interno aberto pode escrever"""
+
+    def __init__(self, root, parent=None):
+        self._root = root
+        self._depth = parent._depth + 1 if parent else 0
+        # Defaults definidos pelo usuário e defaults efetivamente emitidos
+        self._base = {kw: dict(parent._base[kw]) if parent else {} for kw in ("node", "edge")}
+        self._current = {kw: dict(parent._current[kw]) if parent else {} for kw in ("node", "edge")}
+
+    def _write(self, line):
+        if self._root._stack[-1] is not self:
+            raise RuntimeError("escrita em um grafo com subgrafo aberto (o DOT é emitido em ordem)")
+        self._root.out.write("\t" * (self._depth + 1) + line + "\n")
+
+    def _use_defaults(self, kw, style):
+        """Ajusta os defaults do escopo para base + style, emitindo só a diferença"""
+        desired = {**self._base[kw], **style}
+        current = self._current[kw]
+        if desired == current:
+            return
+        diff = {key: value for key, value in desired.items() if current.get(key) != value}
+        diff.update((key, "") for key in current if key not in desired)
+        self._write(f"{kw} [{a_list(None, diff)}]")
+        self._current[kw] = {key: value for key, value in desired.items() if value != ""}
+
+    def attr(self, kw=None, _attributes=None, **attrs):
+        """Atributos do grafo (kw=None ou 'graph') ou defaults de 'node'/'edge'"""
+        attrs = _merge(None, attrs, _attributes)
+        if kw is None:
+            if attrs:
+                self._write(a_list(None, attrs))
+            return
+        if kw not in ("graph", "node", "edge"):
+            raise ValueError(f"attr statement deve ser graph, node ou edge: {kw!r}")
+        if not attrs:
+            return
+        if kw == "graph":
+            self._write(f"graph [{a_list(None, attrs)}]")
+            return
+        self._write(f"{kw} [{a_list(None, attrs)}]")
+        self._base[kw].update(attrs)
+        self._current[kw].update(attrs)
+
+    def node(self, name, label=None, _attributes=None, **attrs):
+        attrs = _merge(label, attrs, _attributes)
+        if name in self._root._created:
+            # Defaults não se aplicam de novo a um nó existente
+            self._write(f"{quote(name)} [{a_list(None, attrs)}]" if attrs else quote(name))
+            return
+        label = attrs.pop("label", None)
+        self._use_defaults("node", attrs)
+        self._root._created.add(name)
+        self._write(f"{quote(name)} [{a_list(label)}]" if label is not None else quote(name))
+
+    def edge(self, tail_name, head_name, label=None, _attributes=None, **attrs):
+        attrs = _merge(label, attrs, _attributes)
+        endpoints = [name.partition(":")[0] for name in (tail_name, head_name)]
+        if any(name not in self._root._created for name in endpoints):
+            self._use_defaults("node", {})
+            self._root._created.update(endpoints)
+        label = attrs.pop("label", None)
+        self._use_defaults("edge", attrs)
+        line = f"{quote_edge(tail_name)} {self._root.edge_op} {quote_edge(head_name)}"
+        self._write(f"{line} [{a_list(label)}]" if label is not None else line)
+
+    def edges(self, tail_head_iter):
+        for tail, head in tail_head_iter:
+            self.edge(tail, head)
+
+    def subgraph(self, graph=None, name=None, comment=None,
+                 graph_attr=None, node_attr=None, edge_attr=None, body=None):
+        """Como graphviz: sem graph, retorna um context manager para o subgrafo"""
+        if graph is not None:
+            # Subgrafo já montado com a biblioteca graphviz
+            for line in graph.__iter__(subgraph=True):
+                self._write(line.rstrip("\n"))
+            return None
+        return self._subgraph(name, comment, graph_attr, node_attr, edge_attr, body)
+
+    @contextlib.contextmanager
+    def _subgraph(self, name, comment, graph_attr, node_attr, edge_attr, body):
+        if comment:
+            self._write(f"// {comment}")
+        self._write(f"subgraph {quote(name) + ' ' if name else ''}{{")
+        child = _GraphWriter(self._root, self)
+        self._root._stack.append(child)
+        try:
+            child._header(graph_attr, node_attr, edge_attr, body)
+            yield child
+        finally:
+            self._root._stack.pop()
+            self._write("}")
+
+    def _header(self, graph_attr, node_attr, edge_attr, body):
+        for kw, attrs in (("graph", graph_attr), ("node", node_attr), ("edge", edge_attr)):
+            self.attr(kw, attrs)
+        for line in body or ():
+            self._write(line.strip())
+
+
+class DotWriter(_GraphWriter):
+    """Grafo raiz escrito em out (arquivo, StringIO ou stdin de um processo)"""
+
+    def __init__(self, out, name=None, comment=None, strict=False, directed=True,
+                 graph_attr=None, node_attr=None, edge_attr=None, body=None):
+        self.out = out
+        self.edge_op = "->" if directed else "--"
+        self._created = set()
+        self._stack = [self]
+        self.closed = False
+        super().__init__(self)
+        if comment:
+            out.write(f"// {comment}\n")
+        keyword = ("strict " if strict else "") + ("digraph" if directed else "graph")
+        out.write(f"{keyword} {quote(name) + ' ' if name else ''}{{\n")
+        self._header(graph_attr, node_attr, edge_attr, body)
+
+    def close(self):
+        if len(self._stack) > 1:
+            raise RuntimeError("subgrafo ainda aberto")
+        if not self.closed:
+            self.out.write("}\n")
+            self.closed = True
+
+
+class Digraph(DotWriter):
+    """Substituto de graphviz.Digraph para os create_*_diagram()
+
+    Sem sink, o DOT vai para um buffer único (não uma lista de linhas) e
+    source/render/pipe funcionam como na biblioteca graphviz.
+    """
+
+    def __init__(self, name=None, comment=None, filename=None, directory=None, format=None,
+                 engine=None, encoding="utf-8", graph_attr=None, node_attr=None, edge_attr=None,
+                 body=None, strict=False, *, sink=None):
+        self.name = name
+        self.filename = filename
+        self.directory = directory
+        self.format = format or "pdf"
+        self.engine = engine or "dot"
+        self.encoding = encoding
+        self._buffer = io.StringIO() if sink is None else None
+        super().__init__(sink if sink is not None else self._buffer, name, comment, strict,
+                         directed=True, graph_attr=graph_attr, node_attr=node_attr,
+                         edge_attr=edge_attr, body=body)
+
+    @property
+    def source(self):
+        if self._buffer is None:
+            raise ValueError("grafo escrito em fluxo: o source não fica em memória")
+        return self._buffer.getvalue() + ("" if self.closed else "}\n")
+
+    def _as_source(self):
+        return graphviz.Source(self.source, filename=self.filename, directory=self.directory,
+                               format=self.format, engine=self.engine, encoding=self.encoding)
+
+    def pipe(self, *args, **kwargs):
+        return self._as_source().pipe(*args, **kwargs)
+
+    def render(self, *args, **kwargs):
+        return self._as_source().render(*args, **kwargs)
+
+
+@contextlib.contextmanager
+def stream_render(outfile, format="png", engine="dot", **writer_kwargs):
+    """Constrói o grafo direto no stdin do Graphviz
+
+        with stream_render("arquitetura.png") as dot:
+            dot.node(...)
+
+    O Graphviz lê o DOT enquanto ele é gerado; o layout roda quando o
+    bloco termina. Levanta CalledProcessError se o Graphviz falhar.
+    """
+    process = subprocess.Popen([engine, f"-T{format}", "-o", outfile], stdin=subprocess.PIPE)
+    stdin = io.TextIOWrapper(process.stdin, encoding="utf-8")
+    try:
+        writer = DotWriter(stdin, **writer_kwargs)
+        yield writer
+        writer.close()
+    finally:
+        stdin.close()
+        returncode = process.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, process.args)
@@ -4,8 +4,14 @@ Gerador de Diagrama Profissional - Ciclo de Vida da Conformidade Automatizada
 Usa Graphviz para criar diagramas de alta qualidade
 """
 
+import os
+import sys
+
 from graphviz import Digraph
 
+# Nome base dos arquivos gerados (a resolução é definida no próprio grafo)
+OUTPUT_NAME = 'compliance-lifecycle-graphviz'
+
 def create_compliance_lifecycle_diagram():
     """Cria diagrama do ciclo de vida de compliance automatizada"""
     
@@ -149,26 +155,11 @@ def create_compliance_lifecycle_diagram():
     return dot
 
 if __name__ == '__main__':
-    # Gerar diagrama
-    diagram = create_compliance_lifecycle_diagram()
-    
-    # Salvar em múltiplos formatos
-    output_path = '/Users/tharles/Library/CloudStorage/GoogleDrive-tharles.freire@heyupcharly.com.br/My Drive/Fiap/Cloud Computing DevOps - DevSecOps/8SEG/compliance-lifecycle-graphviz'
-    
-    # PNG (ultra alta resolução - 1200 DPI)
-    diagram.format = 'png'
-    diagram.render(output_path, cleanup=True)
-    print(f"✅ PNG gerado (1200 DPI): {output_path}.png")
-    
-    # SVG (vetorial - melhor para slides)
-    diagram.format = 'svg'
-    diagram.render(output_path, cleanup=True)
-    print(f"✅ SVG gerado (vetorial): {output_path}.svg")
-    
-    # PDF (alta qualidade para impressão)
-    diagram.format = 'pdf'
-    diagram.render(output_path, cleanup=True)
-    print(f"✅ PDF gerado: {output_path}.pdf")
+    # Um único layout (dot) desenhado em PNG, SVG e PDF: render_diagrams.py na raiz.
+    # O PNG de 1200 DPI acima do orçamento de memória é rasterizado em faixas.
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+    from render_diagrams import render_script
+    render_script(__file__, formats=('png', 'svg', 'pdf'))
     
     print("\n🎨 Diagramas gerados com sucesso!")
     print("   PNG: 1200 DPI - Resolução profissional de impressão gráfica")
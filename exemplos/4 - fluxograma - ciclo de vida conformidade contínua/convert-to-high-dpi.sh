@@ -1,21 +1,17 @@
 #!/bin/bash
-# Script para converter SVG para PNG de alta qualidade usando ImageMagick
+# Script para converter SVG para PNG de alta qualidade (svg_raster.py, sem ImageMagick)
 
-SVG_FILE="compliance-lifecycle-graphviz.svg"
-OUTPUT_PNG="compliance-lifecycle-graphviz-hd.png"
+SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
+SVG_FILE="$SCRIPT_DIR/compliance-lifecycle-graphviz.svg"
 
 echo "🔄 Convertendo SVG para PNG de alta qualidade..."
 
-# Converter SVG para PNG com 300 DPI e largura de 4000px
-magick -density 300 -background white -alpha remove -alpha off "$SVG_FILE" -resize 4000x "$OUTPUT_PNG"
-
-if [ $? -eq 0 ]; then
-    echo "✅ PNG de alta qualidade gerado: $OUTPUT_PNG"
-    ls -lh "$OUTPUT_PNG"
-    sips -g pixelWidth -g pixelHeight "$OUTPUT_PNG"
+# Rasteriza o SVG direto em 4000px de largura (gera compliance-lifecycle-graphviz-hd.png)
+if python3 "$SCRIPT_DIR/../../svg_raster.py" "$SVG_FILE" --width 4000; then
+    echo "✅ PNG de alta qualidade gerado: compliance-lifecycle-graphviz-hd.png"
 else
-    echo "❌ Erro: ImageMagick não está instalado"
-    echo "💡 Instale com: brew install imagemagick"
+    echo "❌ Erro na conversão"
+    echo "💡 Instale as dependências com: pip install cairosvg pillow (e a libcairo: apt install libcairo2 / brew install cairo)"
     echo ""
     echo "Alternativa: Use o arquivo SVG diretamente no PowerPoint"
     echo "   O SVG tem qualidade vetorial infinita!"
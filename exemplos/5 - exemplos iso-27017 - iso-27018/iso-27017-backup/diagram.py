@@ -4,8 +4,15 @@ ISO 27017 - Backup e Recuperação
 Diagrama mostrando arquitetura de backup automatizado com AWS Backup
 """
 
+import os
+import sys
+
 from graphviz import Digraph
 
+# Nome base dos arquivos gerados e resolução dos rasters
+OUTPUT_NAME = 'iso-27017-backup-architecture'
+DPI = '600'
+
 def create_backup_diagram():
     """Cria diagrama de arquitetura de backup ISO 27017"""
     
@@ -90,13 +97,7 @@ def create_backup_diagram():
     return dot
 
 if __name__ == '__main__':
-    diagram = create_backup_diagram()
-    diagram.attr(dpi='600')  # Alta resolução
-    
-    # Renderiza em PNG de altíssima qualidade
-    diagram.render('iso-27017-backup-architecture', format='png', cleanup=True)
-    print("✅ Diagrama PNG gerado: iso-27017-backup-architecture.png")
-    
-    # Renderiza em PDF vetorial
-    diagram.render('iso-27017-backup-architecture', format='pdf', cleanup=True)
-    print("✅ Diagrama PDF gerado: iso-27017-backup-architecture.pdf")
+    # Um único layout (dot) desenhado em PNG, PDF e SVG: render_diagrams.py na raiz
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+    from render_diagrams import render_script
+    render_script(__file__)
@@ -4,8 +4,15 @@ ISO 27017 - Segregação de Ambientes
 Diagrama mostrando isolamento de rede entre ambientes Dev e Prod
 """
 
+import os
+import sys
+
 from graphviz import Digraph
 
+# Nome base dos arquivos gerados e resolução dos rasters
+OUTPUT_NAME = 'iso-27017-segregacao-architecture'
+DPI = '600'
+
 def create_segregation_diagram():
     """Cria diagrama de arquitetura de segregação ISO 27017"""
     
@@ -119,13 +126,7 @@ def create_segregation_diagram():
     return dot
 
 if __name__ == '__main__':
-    diagram = create_segregation_diagram()
-    diagram.attr(dpi='600')  # Alta resolução
-    
-    # Renderiza em PNG de altíssima qualidade
-    diagram.render('iso-27017-segregacao-architecture', format='png', cleanup=True)
-    print("✅ Diagrama PNG gerado: iso-27017-segregacao-architecture.png")
-    
-    # Renderiza em PDF vetorial
-    diagram.render('iso-27017-segregacao-architecture', format='pdf', cleanup=True)
-    print("✅ Diagrama PDF gerado: iso-27017-segregacao-architecture.pdf")
+    # Um único layout (dot) desenhado em PNG, PDF e SVG: render_diagrams.py na raiz
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+    from render_diagrams import render_script
+    render_script(__file__)
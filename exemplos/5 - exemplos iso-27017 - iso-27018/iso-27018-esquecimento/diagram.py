@@ -4,8 +4,15 @@ ISO 27018 - Direito ao Esquecimento
 Diagrama mostrando automação do Right to Erasure (LGPD Art. 18, VI)
 """
 
+import os
+import sys
+
 from graphviz import Digraph
 
+# Nome base dos arquivos gerados e resolução dos rasters
+OUTPUT_NAME = 'iso-27018-esquecimento-architecture'
+DPI = '600'
+
 def create_erasure_diagram():
     """Cria diagrama de arquitetura de direito ao esquecimento ISO 27018"""
     
@@ -124,13 +131,7 @@ def create_erasure_diagram():
     return dot
 
 if __name__ == '__main__':
-    diagram = create_erasure_diagram()
-    diagram.attr(dpi='600')  # Alta resolução
-    
-    # Renderiza em PNG de altíssima qualidade
-    diagram.render('iso-27018-esquecimento-architecture', format='png', cleanup=True)
-    print("✅ Diagrama PNG gerado: iso-27018-esquecimento-architecture.png")
-    
-    # Renderiza em PDF vetorial
-    diagram.render('iso-27018-esquecimento-architecture', format='pdf', cleanup=True)
-    print("✅ Diagrama PDF gerado: iso-27018-esquecimento-architecture.pdf")
+    # Um único layout (dot) desenhado em PNG, PDF e SVG: render_diagrams.py na raiz
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+    from render_diagrams import render_script
+    render_script(__file__)
@@ -68,18 +68,18 @@ fi
 echo -e "\n${YELLOW}STAGE 3: ⚖️ Validação de Políticas (OPA)${NC}"
 echo "-----------------------------------"
 
+policies=(
+    "iso-27017-backup"
+    "iso-27017-criptografia"
+    "iso-27017-segregacao"
+    "iso-27018-auditoria"
+    "iso-27018-esquecimento"
+    "iso-27018-localizacao"
+)
+
 if command -v opa &> /dev/null; then
     echo "🔧 Testando políticas OPA..."
     
-    policies=(
-        "iso-27017-backup"
-        "iso-27017-criptografia"
-        "iso-27017-segregacao"
-        "iso-27018-auditoria"
-        "iso-27018-esquecimento"
-        "iso-27018-localizacao"
-    )
-    
     for policy in "${policies[@]}"; do
         policy_dir="../5 - exemplos iso-27017 - iso-27018/$policy"
         if [ -d "$policy_dir" ] && [ -f "$policy_dir/policy.rego" ]; then
@@ -97,6 +97,42 @@ else
     echo -e "${YELLOW}⚠️  OPA não instalado. Instale: brew install opa${NC}"
 fi
 
+POLICY_SERVER="../../policy_server.py"
+if command -v python3 &> /dev/null && python3 "$POLICY_SERVER" start; then
+    # Encerra o servidor em qualquer saída do script (inclusive nas falhas abaixo)
+    trap 'python3 "$POLICY_SERVER" stop > /dev/null 2>&1' EXIT
+    echo "📋 Avaliando planos no servidor local de políticas..."
+    violations=0
+    for policy in "${policies[@]}"; do
+        policy_dir="../5 - exemplos iso-27017 - iso-27018/$policy"
+        if [ -f "$policy_dir/tfplan.json" ]; then
+            # 1 = violações; 2 = servidor inacessível ou com erro
+            status=0
+            python3 "$POLICY_SERVER" eval "$policy_dir/tfplan.json" --policy "$policy_dir/policy.rego" --fail-defined > /dev/null || status=$?
+            if [ "$status" -eq 0 ]; then
+                echo -e "    ${GREEN}✅ $policy${NC}"
+            elif [ "$status" -eq 1 ]; then
+                echo -e "    ${RED}❌ $policy (violações de política)${NC}"
+                violations=1
+            else
+                echo -e "    ${RED}❌ $policy (servidor de políticas falhou, código $status)${NC}"
+                exit "$status"
+            fi
+        else
+            echo "    ⏭️  $policy (sem tfplan.json)"
+        fi
+    done
+    python3 "$POLICY_SERVER" metrics
+    if [ "$violations" -ne 0 ]; then
+        echo -e "${RED}❌ Violações de política encontradas${NC}"
+        exit 1
+    fi
+    python3 "$POLICY_SERVER" stop > /dev/null
+    trap - EXIT
+else
+    echo -e "${YELLOW}⚠️  Servidor de políticas indisponível (requer python3)${NC}"
+fi
+
 # ===== STAGE 4: Terraform Plan =====
 echo -e "\n${YELLOW}STAGE 4: 📋 Terraform Plan${NC}"
 echo "-----------------------------------"
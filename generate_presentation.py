@@ -5,128 +5,163 @@ Gera apresentação sobre ISO 27017/27018 e Pipeline de Compliance Contínuo
 """
 
 from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.enum.text import PP_ALIGN
-from pptx.dml.color import RGBColor
-from PIL import Image
-
-# Aumentar limite de segurança do PIL para aceitar imagens grandes dos diagramas
-Image.MAX_IMAGE_PIXELS = None
+from pptx.chart.data import CategoryChartData
+from pptx.enum.chart import XL_CHART_TYPE
+from pptx.util import Inches
+import argparse
+import io
 import os
-
-def create_presentation():
-    """Cria apresentação PowerPoint sobre as pastas 5 e 6"""
+import sys
+import tempfile
+
+from pipeline_metrics import METRICS_FILE, load_runs, percentile, run_total, stage_summary
+from presentation_cache import SlideCache
+from presentation_diagrams import add_diagram
+from presentation_media import record_dependency
+from presentation_theme import (ISO27017_COLOR, ISO27018_COLOR, NAVY, PIPELINE_COLOR,
+                                TextStyle, add_blank_slide, add_text, apply_style, apply_theme)
+from reproducible import canonicalize_zip, source_date
+
+def slide_builders():
+    """Lista ordenada das funções que constroem cada slide"""
+    return [
+        add_title_slide,                  # Slide 1: Título
+        add_iso_overview_slide,           # Slide 2: Visão Geral ISO 27017/27018
+        add_iso27017_backup_slide,        # Slide 3: ISO 27017 - Backup
+        add_iso27017_encryption_slide,    # Slide 4: ISO 27017 - Criptografia
+        add_iso27017_segregation_slide,   # Slide 5: ISO 27017 - Segregação
+        add_iso27018_audit_slide,         # Slide 6: ISO 27018 - Auditoria
+        add_iso27018_erasure_slide,       # Slide 7: ISO 27018 - Esquecimento
+        add_iso27018_location_slide,      # Slide 8: ISO 27018 - Localização
+        add_pipeline_overview_slide,      # Slide 9: Pipeline - Visão Geral
+        add_pipeline_stages_1_3_slide,    # Slide 10: Pipeline - Stages 1-3
+        add_pipeline_stages_4_5_slide,    # Slide 11: Pipeline - Stages 4-5
+        add_pipeline_metrics_slide,       # Slide 12: Pipeline - Métricas
+        add_conclusion_slide,             # Slide 13: Conclusão
+    ]
+
+# Arquivo de saída padrão
+OUTPUT_FILE = "DevSecOps_ISO27017_27018_Presentation.pptx"
+
+def create_presentation(incremental=False, output_file=OUTPUT_FILE, replacements=None, cache=None,
+                        reproducible=False):
+    """Cria apresentação PowerPoint sobre as pastas 5 e 6
+
+    Com incremental=True, slides cujas entradas (código, textos, imagens de
+    origem e geometria) não mudaram desde a última execução são restaurados
+    do cache em .cache/slides; apenas os slides alterados são reconstruídos.
+    Um SlideCache já aberto pode ser passado em cache (ex.: somente leitura).
+
+    replacements é um dicionário {texto original: novo texto} aplicado a todos
+    os textos do deck, usado para gerar variantes por cliente/idioma/ambiente.
+
+    Com reproducible=True, o .pptx é regravado como ZIP canônico
+    (reproducible.py) e, se SOURCE_DATE_EPOCH estiver definido, as datas de
+    criação e modificação do documento passam a ser essa data: as mesmas
+    entradas geram sempre os mesmos bytes.
+    """
     prs = Presentation()
     prs.slide_width = Inches(10)
     prs.slide_height = Inches(7.5)
+    apply_theme(prs)
     
-    # Slide 1: Título
-    add_title_slide(prs)
-    
-    # Slide 2: Visão Geral ISO 27017/27018
-    add_iso_overview_slide(prs)
-    
-    # Slide 3: ISO 27017 - Backup
-    add_iso27017_backup_slide(prs)
-    
-    # Slide 4: ISO 27017 - Criptografia
-    add_iso27017_encryption_slide(prs)
-    
-    # Slide 5: ISO 27017 - Segregação
-    add_iso27017_segregation_slide(prs)
-    
-    # Slide 6: ISO 27018 - Auditoria
-    add_iso27018_audit_slide(prs)
+    if cache is None and incremental:
+        cache = SlideCache()
+    for builder in slide_builders():
+        if cache:
+            cache.build(prs, builder)
+        else:
+            builder(prs)
     
-    # Slide 7: ISO 27018 - Esquecimento
-    add_iso27018_erasure_slide(prs)
+    if cache:
+        cache.save()
+        print(f"♻️  Cache de slides: {cache.hits} reutilizados, {cache.misses} reconstruídos")
     
-    # Slide 8: ISO 27018 - Localização
-    add_iso27018_location_slide(prs)
-    
-    # Slide 9: Pipeline - Visão Geral
-    add_pipeline_overview_slide(prs)
-    
-    # Slide 10: Pipeline - Stages 1-3
-    add_pipeline_stages_1_3_slide(prs)
-    
-    # Slide 11: Pipeline - Stages 4-5
-    add_pipeline_stages_4_5_slide(prs)
-    
-    # Slide 12: Pipeline - Métricas
-    add_pipeline_metrics_slide(prs)
-    
-    # Slide 13: Conclusão
-    add_conclusion_slide(prs)
+    if replacements:
+        apply_replacements(prs, replacements)
     
     # Salvar apresentação
-    output_file = "DevSecOps_ISO27017_27018_Presentation.pptx"
-    prs.save(output_file)
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if reproducible:
+        if "SOURCE_DATE_EPOCH" in os.environ:
+            prs.core_properties.created = prs.core_properties.modified = source_date()
+        buffer = io.BytesIO()
+        prs.save(buffer)
+        canonicalize_zip(buffer.getvalue(), output_file)
+    else:
+        prs.save(output_file)
     print(f"✅ Apresentação criada: {output_file}")
     return output_file
 
-def set_text_format(text_frame, font_size=20, font_name="Arial", bold=False):
-    """Define formatação padrão do texto"""
-    for paragraph in text_frame.paragraphs:
-        for run in paragraph.runs:
-            run.font.name = font_name
-            run.font.size = Pt(font_size)
-            run.font.bold = bold
+def check_cache(builds=2):
+    """Verifica se builds seguidos com um mesmo SlideCache reaproveitam todos os slides
+
+    Um build aquecido preenche um cache temporário; depois, como nos workers
+    do batch_presentations.py, um único SlideCache somente leitura atende
+    builds seguidos, e cada um deve restaurar todos os slides cacheáveis.
+    Retorna a lista de builds que reconstruíram algum slide.
+    """
+    failures = []
+    with tempfile.TemporaryDirectory() as workdir:
+        cache_dir = os.path.join(workdir, "slides")
+        create_presentation(output_file=os.path.join(workdir, "aquecimento.pptx"),
+                            cache=SlideCache(cache_dir))
+        cache = SlideCache(cache_dir, read_only=True)
+        cacheable = len(cache.index["slides"])
+        for build in range(1, builds + 1):
+            cache.hits = cache.misses = 0
+            create_presentation(output_file=os.path.join(workdir, f"build-{build}.pptx"), cache=cache)
+            if cache.hits != cacheable:
+                failures.append(build)
+            print(f"{'✅' if cache.hits == cacheable else '❌'} build {build}: "
+                  f"{cache.hits}/{cacheable} slides cacheáveis reaproveitados")
+    return failures
+
+def apply_replacements(prs, replacements):
+    """Substitui textos em todos os runs do deck"""
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if not shape.has_text_frame:
+                continue
+            for paragraph in shape.text_frame.paragraphs:
+                for run in paragraph.runs:
+                    text = run.text
+                    for old, new in replacements.items():
+                        text = text.replace(old, new)
+                    if text != run.text:
+                        run.text = text
+
+def set_text_format(text_frame, font_size=20, bold=False):
+    """Define formatação padrão do texto (herdada por todos os parágrafos)"""
+    apply_style(text_frame, TextStyle(font_size, bold=bold))
 
 def add_title_slide(prs):
     """Slide 1: Título"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])  # Blank layout
+    slide = add_blank_slide(prs)
     
     # Título principal
-    title_box = slide.shapes.add_textbox(Inches(1), Inches(2), Inches(8), Inches(1.5))
-    title_frame = title_box.text_frame
-    title_frame.text = "DevSecOps & Compliance Contínuo"
-    title_para = title_frame.paragraphs[0]
-    title_para.alignment = PP_ALIGN.CENTER
-    title_para.font.size = Pt(44)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(0, 51, 102)
+    add_text(slide, Inches(1), Inches(2), Inches(8), Inches(1.5),
+             "DevSecOps & Compliance Contínuo", "cover_title")
     
     # Subtítulo
-    subtitle_box = slide.shapes.add_textbox(Inches(1), Inches(3.8), Inches(8), Inches(1))
-    subtitle_frame = subtitle_box.text_frame
-    subtitle_frame.text = "ISO 27017/27018 & Pipeline Automatizada"
-    subtitle_para = subtitle_frame.paragraphs[0]
-    subtitle_para.alignment = PP_ALIGN.CENTER
-    subtitle_para.font.size = Pt(28)
-    subtitle_para.font.name = "Arial"
-    subtitle_para.font.color.rgb = RGBColor(64, 64, 64)
+    add_text(slide, Inches(1), Inches(3.8), Inches(8), Inches(1),
+             "ISO 27017/27018 & Pipeline Automatizada", "cover_subtitle")
     
     # Rodapé
-    footer_box = slide.shapes.add_textbox(Inches(1), Inches(6.5), Inches(8), Inches(0.5))
-    footer_frame = footer_box.text_frame
-    footer_frame.text = "Exemplos práticos de conformidade em Cloud Computing"
-    footer_para = footer_frame.paragraphs[0]
-    footer_para.alignment = PP_ALIGN.CENTER
-    footer_para.font.size = Pt(16)
-    footer_para.font.name = "Arial"
-    footer_para.font.color.rgb = RGBColor(128, 128, 128)
+    add_text(slide, Inches(1), Inches(6.5), Inches(8), Inches(0.5),
+             "Exemplos práticos de conformidade em Cloud Computing", "cover_footer")
 
 def add_iso_overview_slide(prs):
     """Slide 2: Visão Geral ISO 27017/27018"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.8))
-    title_frame = title_box.text_frame
-    title_frame.text = "🔒 ISO 27017/27018 - Visão Geral"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(32)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(0, 51, 102)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.8),
+             "🔒 ISO 27017/27018 - Visão Geral", "heading", color=NAVY)
     
     # Conteúdo
-    content_box = slide.shapes.add_textbox(Inches(0.8), Inches(1.5), Inches(8.4), Inches(5.5))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """ISO 27017 - Cloud Computing Security
 • Controles de segurança para cloud
 • Backup e recuperação de dados
@@ -139,38 +174,21 @@ ISO 27018 - Personal Data Protection
 • Direito ao esquecimento (LGPD)
 • Data residency - localização dos dados"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(20)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(10)
+    add_text(slide, Inches(0.8), Inches(1.5), Inches(8.4), Inches(5.5),
+             content, "body_spaced", word_wrap=True)
 
 def add_iso27017_backup_slide(prs):
     """Slide 3: ISO 27017 - Backup"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "💾 ISO 27017 - Backup e Recuperação"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(0, 102, 51)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "💾 ISO 27017 - Backup e Recuperação", "title", color=ISO27017_COLOR)
     
     # Imagem do diagrama (esquerda)
-    try:
-        img_path = "exemplos/5 - exemplos iso-27017 - iso-27018/iso-27017-backup/iso-27017-backup-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(4.5))
-    except FileNotFoundError:
-        pass
+    add_diagram(slide, "iso-27017-backup-architecture", Inches(0.5), Inches(1.3), width=Inches(4.5))
     
     # Conteúdo (direita)
-    content_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Conceito:
 Backup automatizado de dados críticos com retenção de 30 dias
 
@@ -191,41 +209,21 @@ Benefícios:
 • Proteção ransomware
 • Custo: $0.05/GB/mês"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(16)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(6)
-        paragraph.font.size = Pt(20)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(8)
+    add_text(slide, Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2),
+             content, "body", word_wrap=True)
 
 def add_iso27017_encryption_slide(prs):
     """Slide 4: ISO 27017 - Criptografia"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "🔐 ISO 27017 - Criptografia"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(0, 102, 51)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "🔐 ISO 27017 - Criptografia", "title", color=ISO27017_COLOR)
     
     # Imagem do diagrama (esquerda)
-    try:
-        img_path = "exemplos/5 - exemplos iso-27017 - iso-27018/iso-27017-criptografia/iso-27017-criptografia-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(4.5))
-    except FileNotFoundError:
-        pass
+    add_diagram(slide, "iso-27017-criptografia-architecture", Inches(0.5), Inches(1.3), width=Inches(4.5))
     
     # Conteúdo (direita)
-    content_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Conceito:
 Criptografia de dados em repouso com chaves gerenciadas
 
@@ -247,38 +245,21 @@ Benefícios:
 • LGPD/PCI DSS/HIPAA
 • Overhead < 5%"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(16)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(6)
+    add_text(slide, Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2),
+             content, "body_compact", word_wrap=True)
 
 def add_iso27017_segregation_slide(prs):
     """Slide 5: ISO 27017 - Segregação"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "🏗️ ISO 27017 - Segregação de Rede"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(0, 102, 51)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "🏗️ ISO 27017 - Segregação de Rede", "title", color=ISO27017_COLOR)
     
     # Imagem do diagrama (esquerda)
-    try:
-        img_path = "exemplos/5 - exemplos iso-27017 - iso-27018/iso-27017-segregacao/iso-27017-segregacao-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(4.5))
-    except FileNotFoundError:
-        pass
+    add_diagram(slide, "iso-27017-segregacao-architecture", Inches(0.5), Inches(1.3), width=Inches(4.5))
     
     # Conteúdo (direita)
-    content_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Conceito:
 Isolamento completo entre ambientes Dev e Prod
 
@@ -300,38 +281,21 @@ Benefícios:
 • 70% menos incidentes
 • SOC 2/PCI DSS"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(16)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(6)
+    add_text(slide, Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2),
+             content, "body_compact", word_wrap=True)
 
 def add_iso27018_audit_slide(prs):
     """Slide 6: ISO 27018 - Auditoria"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "📋 ISO 27018 - Auditoria"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(102, 0, 153)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "📋 ISO 27018 - Auditoria", "title", color=ISO27018_COLOR)
     
     # Imagem do diagrama (esquerda)
-    try:
-        img_path = "exemplos/5 - exemplos iso-27017 - iso-27018/iso-27018-auditoria/iso-27018-auditoria-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(4.5))
-    except FileNotFoundError:
-        pass
+    add_diagram(slide, "iso-27018-auditoria-architecture", Inches(0.5), Inches(1.3), width=Inches(4.5))
     
     # Conteúdo (direita)
-    content_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Conceito:
 Rastreabilidade completa de acessos a dados pessoais (LGPD Art.37)
 
@@ -354,38 +318,21 @@ Benefícios:
 • Latência < 5min
 • Custo: $2/100k eventos"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(16)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(6)
+    add_text(slide, Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2),
+             content, "body_compact", word_wrap=True)
 
 def add_iso27018_erasure_slide(prs):
     """Slide 7: ISO 27018 - Direito ao Esquecimento"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "🗑️ ISO 27018 - Direito ao Esquecimento"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(102, 0, 153)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "🗑️ ISO 27018 - Direito ao Esquecimento", "title", color=ISO27018_COLOR)
     
     # Imagem do diagrama (esquerda)
-    try:
-        img_path = "exemplos/5 - exemplos iso-27017 - iso-27018/iso-27018-esquecimento/iso-27018-esquecimento-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(4.5))
-    except FileNotFoundError:
-        pass
+    add_diagram(slide, "iso-27018-esquecimento-architecture", Inches(0.5), Inches(1.3), width=Inches(4.5))
     
     # Conteúdo (direita)
-    content_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Conceito:
 Automação do direito ao esquecimento (LGPD Art.18, VI)
 
@@ -407,38 +354,21 @@ Benefícios:
 • Custo: $0.001/exclusão
 • Evita multas R$50M"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(16)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(6)
+    add_text(slide, Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2),
+             content, "body_compact", word_wrap=True)
 
 def add_iso27018_location_slide(prs):
     """Slide 8: ISO 27018 - Localização de Dados"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "🌎 ISO 27018 - Data Residency"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(102, 0, 153)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "🌎 ISO 27018 - Data Residency", "title", color=ISO27018_COLOR)
     
     # Imagem do diagrama (esquerda)
-    try:
-        img_path = "exemplos/5 - exemplos iso-27017 - iso-27018/iso-27018-localizacao/iso-27018-localizacao-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(4.5))
-    except FileNotFoundError:
-        pass
+    add_diagram(slide, "iso-27018-localizacao-architecture", Inches(0.5), Inches(1.3), width=Inches(4.5))
     
     # Conteúdo (direita)
-    content_box = slide.shapes.add_textbox(Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Conceito:
 Soberania de dados - 100% em território brasileiro
 
@@ -460,37 +390,19 @@ Benefícios:
 • Sem custos transfer
 • Evita multas 2% fat."""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(16)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(6)
+    add_text(slide, Inches(5.2), Inches(1.3), Inches(4.3), Inches(5.2),
+             content, "body_compact", word_wrap=True)
 
 def add_pipeline_overview_slide(prs):
     """Slide 9: Pipeline - Visão Geral"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.6))
-    title_frame = title_box.text_frame
-    title_frame.text = "🚀 Pipeline de Compliance Contínuo"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(28)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(204, 51, 0)
-    
-    # Imagem da arquitetura do pipeline (se existir)
-    try:
-        img_path = "exemplos/6 - pipeline compliance continuo/compliance-pipeline-architecture.png"
-        slide.shapes.add_picture(img_path, Inches(0.5), Inches(1.3), width=Inches(9))
-    except FileNotFoundError:
-        # Conteúdo alternativo se não houver imagem
-        content_box = slide.shapes.add_textbox(Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6))
-        content_frame = content_box.text_frame
-        content_frame.word_wrap = True
-        
-        content = """Filosofia:
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.6),
+             "🚀 Pipeline de Compliance Contínuo", "title", color=PIPELINE_COLOR)
+    
+    # Imagem da arquitetura do pipeline (sem ela, o quadro de aviso traz o resumo)
+    content = """Filosofia:
 • Falhas não bloqueiam visibilidade
 • Execução completa garantida
 • continue-on-error: true (todos jobs)
@@ -507,32 +419,18 @@ Diferencial:
 • Visibilidade total de issues
 • Métricas agregadas ao final
 • Zero deploy em produção"""
-        
-        content_frame.text = content
-        for paragraph in content_frame.paragraphs:
-            paragraph.font.size = Pt(20)
-            paragraph.font.name = "Arial"
-            paragraph.space_after = Pt(8)
+    add_diagram(slide, "compliance-pipeline-architecture", Inches(0.5), Inches(1.3), width=Inches(9),
+                note=content)
 
 def add_pipeline_stages_1_3_slide(prs):
     """Slide 10: Pipeline Stages 1-3"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.7))
-    title_frame = title_box.text_frame
-    title_frame.text = "📝 Pipeline - Stages 1-3"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(30)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(204, 51, 0)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.7),
+             "📝 Pipeline - Stages 1-3", "title_large", color=PIPELINE_COLOR)
     
     # Conteúdo
-    content_box = slide.shapes.add_textbox(Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Stage 1 - Validação de Código:
 • terraform fmt -check (formatação)
 • terraform validate (sintaxe)
@@ -550,31 +448,18 @@ Stage 3 - Validação de Políticas (OPA):
 • Validação com mock credentials
 • SLA: ~5 minutos"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(20)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(8)
+    add_text(slide, Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6),
+             content, "body", word_wrap=True)
 
 def add_pipeline_stages_4_5_slide(prs):
     """Slide 11: Pipeline Stages 4-5"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.7))
-    title_frame = title_box.text_frame
-    title_frame.text = "📋 Pipeline - Stages 4-6"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(30)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(204, 51, 0)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.7),
+             "📋 Pipeline - Stages 4-6", "title_large", color=PIPELINE_COLOR)
     
     # Conteúdo
-    content_box = slide.shapes.add_textbox(Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Stage 4 - Terraform Plan:
 • Plan com -refresh=false
 • Mock AWS provider para exemplos
@@ -593,31 +478,26 @@ Stage 6 - Relatório de Compliance:
 • Upload de artefatos
 • SLA: ~1 minuto"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(20)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(8)
+    add_text(slide, Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6),
+             content, "body", word_wrap=True)
 
 def add_pipeline_metrics_slide(prs):
     """Slide 12: Pipeline Métricas"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.7))
-    title_frame = title_box.text_frame
-    title_frame.text = "📈 Métricas e Benefícios"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(30)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(204, 51, 0)
-    
-    # Conteúdo
-    content_box = slide.shapes.add_textbox(Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.7),
+             "📈 Métricas e Benefícios", "title_large", color=PIPELINE_COLOR)
+    
+    # Telemetria real da pipeline (se existir): gráficos p50/p95 e tendência
+    runs = []
+    if record_dependency(METRICS_FILE):
+        runs = load_runs(METRICS_FILE)
+    if runs:
+        add_pipeline_charts(slide, runs)
+        return
+    
+    # Conteúdo (sem telemetria)
     content = """Performance:
 • Tempo total: ~13 minutos
 • Execução paralela de stages
@@ -638,31 +518,61 @@ Economia:
 • Validação antes do deploy
 • Prevenção de não-conformidade"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(20)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(8)
+    add_text(slide, Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6),
+             content, "body", word_wrap=True)
+
+def add_pipeline_charts(slide, runs, trend_runs=20):
+    """Gráficos nativos do slide de métricas a partir da telemetria
+
+    Sem dados por stage nas execuções (só o tempo total), o gráfico de
+    stages é omitido e a tendência ocupa a largura toda.
+    """
+    # p50/p95 por stage (minutos)
+    summary = stage_summary(runs)
+    if summary:
+        stage_data = CategoryChartData()
+        stage_data.categories = [label for _, label, _, _ in summary]
+        stage_data.add_series("p50 (min)", [round(p50 / 60, 1) for _, _, p50, _ in summary])
+        stage_data.add_series("p95 (min)", [round(p95 / 60, 1) for _, _, _, p95 in summary])
+        stage_chart = slide.shapes.add_chart(XL_CHART_TYPE.COLUMN_CLUSTERED, Inches(0.5), Inches(1.3),
+                                             Inches(4.6), Inches(3.8), stage_data).chart
+        stage_chart.has_legend = True
+        stage_chart.legend.include_in_layout = False
+        stage_chart.has_title = True
+        stage_chart.chart_title.text_frame.text = "Duração por stage"
+        trend_left, trend_width = Inches(5.2), Inches(4.3)
+    else:
+        trend_left, trend_width = Inches(0.5), Inches(9)
+    
+    # Tendência do tempo total nas últimas execuções
+    recent = runs[-trend_runs:]
+    trend_data = CategoryChartData()
+    trend_data.categories = [run.get("started_at", "")[5:10] or str(run.get("run_id", "")) for run in recent]
+    trend_data.add_series("Total (min)", [round(run_total(run) / 60, 1) for run in recent])
+    trend_chart = slide.shapes.add_chart(XL_CHART_TYPE.LINE_MARKERS, trend_left, Inches(1.3),
+                                         trend_width, Inches(3.8), trend_data).chart
+    trend_chart.has_legend = False
+    trend_chart.has_title = True
+    trend_chart.chart_title.text_frame.text = "Tempo total por execução"
+    
+    totals = [run_total(run) for run in runs]
+    content = f"""Performance ({len(runs)} execuções):
+• Tempo total: p50 {percentile(totals, 50) / 60:.1f} min | p95 {percentile(totals, 95) / 60:.1f} min
+• Execução paralela de stages, continue-on-error para visibilidade total
+• 6 políticas validadas automaticamente | Mock credentials - sem custos AWS"""
+    
+    add_text(slide, Inches(0.8), Inches(5.3), Inches(8.4), Inches(1.8),
+             content, "body_compact", word_wrap=True)
 
 def add_conclusion_slide(prs):
     """Slide 13: Conclusão"""
-    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    slide = add_blank_slide(prs)
     
     # Título
-    title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(0.7))
-    title_frame = title_box.text_frame
-    title_frame.text = "✅ Conclusão"
-    title_para = title_frame.paragraphs[0]
-    title_para.font.size = Pt(30)
-    title_para.font.bold = True
-    title_para.font.name = "Arial"
-    title_para.font.color.rgb = RGBColor(0, 102, 51)
+    add_text(slide, Inches(0.5), Inches(0.5), Inches(9), Inches(0.7),
+             "✅ Conclusão", "title_large", color=ISO27017_COLOR)
     
     # Conteúdo
-    content_box = slide.shapes.add_textbox(Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6))
-    content_frame = content_box.text_frame
-    content_frame.word_wrap = True
-    
     content = """Principais Conquistas:
 
 • Compliance automatizado ISO 27017/27018
@@ -682,11 +592,18 @@ Próximos Passos:
 
 Recursos: github.com/tharles-freire-heyupcharly/devsecops-examples"""
     
-    content_frame.text = content
-    for paragraph in content_frame.paragraphs:
-        paragraph.font.size = Pt(20)
-        paragraph.font.name = "Arial"
-        paragraph.space_after = Pt(8)
+    add_text(slide, Inches(0.8), Inches(1.4), Inches(8.4), Inches(5.6),
+             content, "body", word_wrap=True)
 
 if __name__ == "__main__":
-    create_presentation()
+    parser = argparse.ArgumentParser(description="Gera a apresentação DevSecOps ISO 27017/27018")
+    parser.add_argument("--incremental", action="store_true",
+                        help="reutiliza slides inalterados do cache em .cache/slides")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="datas fixas e ZIP canônico: mesmas entradas, mesmos bytes")
+    parser.add_argument("--check-cache", action="store_true",
+                        help="verifica se builds seguidos reaproveitam todos os slides do cache")
+    args = parser.parse_args()
+    if args.check_cache:
+        sys.exit(1 if check_cache() else 0)
+    create_presentation(incremental=args.incremental, reproducible=args.reproducible)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Métricas da Pipeline - DevSecOps Examples
+Lê a telemetria de duração por stage da pipeline de Compliance Contínuo
+
+Formato do arquivo (JSON Lines, uma execução por linha, durações em segundos):
+    {"run_id": 123, "started_at": "2026-10-01T03:00:12Z",
+     "total_seconds": 655, "stages": {"code-validation": 61, "security-scan": 118, ...}}
+
+Uso (anexa uma execução a partir da API de jobs do GitHub Actions):
+    gh api repos/OWNER/REPO/actions/runs/RUN_ID/jobs > jobs.json
+    python pipeline_metrics.py append jobs.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+
+# Arquivo de telemetria usado pela apresentação e pelo diagrama da pipeline
+# (relativo a este script: vale para qualquer diretório de trabalho)
+METRICS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exemplos",
+                            "6 - pipeline compliance continuo", "pipeline-metrics.jsonl")
+
+# Jobs do workflow compliance-pipeline.yml, na ordem dos stages
+STAGES = [
+    ("code-validation", "Stage 1", "📝 Validação de Código"),
+    ("security-scan", "Stage 2", "🛡️ Análise de Segurança (SAST)"),
+    ("policy-validation", "Stage 3", "⚖️ Validação de Políticas (OPA)"),
+    ("terraform-plan", "Stage 4", "📋 Terraform Plan (Dry Run)"),
+    ("infracost", "Stage 5", "💰 Estimativa de Custos (Infracost)"),
+    ("compliance-report", "Stage 6", "📊 Relatório de Compliance"),
+]
+
+
+def load_runs(path=METRICS_FILE):
+    """Lê as execuções em ordem cronológica; levanta FileNotFoundError se não houver arquivo"""
+    runs = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                runs.append(json.loads(line))
+    runs.sort(key=lambda run: run.get("started_at", ""))
+    return runs
+
+
+def percentile(values, pct):
+    """Percentil com interpolação linear (pct entre 0 e 100)"""
+    ordered = sorted(values)
+    if not ordered:
+        raise ValueError("percentil de uma lista vazia")
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def stage_summary(runs):
+    """Retorna [(job, rótulo, p50, p95)] em segundos, para stages com dados"""
+    summary = []
+    for job, label, _ in STAGES:
+        durations = [run["stages"][job] for run in runs if job in run.get("stages", {})]
+        if durations:
+            summary.append((job, label, percentile(durations, 50), percentile(durations, 95)))
+    return summary
+
+
+def run_total(run):
+    """Duração total da execução (ponta a ponta, não a soma dos jobs paralelos)"""
+    return run.get("total_seconds", sum(run.get("stages", {}).values()))
+
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def run_from_jobs(jobs_document):
+    """Converte a resposta de /actions/runs/{id}/jobs em um registro de execução"""
+    job_ids = {name: job for job, _, name in STAGES}
+    stages = {}
+    starts, ends = [], []
+    run_id = None
+    for job in jobs_document["jobs"]:
+        if job["name"] not in job_ids or not job.get("completed_at"):
+            continue
+        started, completed = _parse_time(job["started_at"]), _parse_time(job["completed_at"])
+        stages[job_ids[job["name"]]] = (completed - started).total_seconds()
+        starts.append(started)
+        ends.append(completed)
+        run_id = job["run_id"]
+
+    if not stages:
+        raise ValueError("nenhum job da pipeline de compliance encontrado")
+    return {
+        "run_id": run_id,
+        "started_at": min(starts).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "total_seconds": (max(ends) - min(starts)).total_seconds(),
+        "stages": stages,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telemetria de duração da pipeline de compliance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    append = subparsers.add_parser("append", help="anexa uma execução a partir do JSON de jobs")
+    append.add_argument("jobs_json", help="saída de gh api .../actions/runs/RUN_ID/jobs")
+    append.add_argument("--metrics", default=METRICS_FILE, help="arquivo de telemetria")
+    summary = subparsers.add_parser("summary", help="mostra p50/p95 por stage")
+    summary.add_argument("--metrics", default=METRICS_FILE, help="arquivo de telemetria")
+    args = parser.parse_args()
+
+    if args.command == "append":
+        with open(args.jobs_json, encoding="utf-8") as f:
+            run = run_from_jobs(json.load(f))
+        with open(args.metrics, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+        print(f"✅ Execução {run['run_id']} registrada: {run['total_seconds'] / 60:.1f} min")
+    else:
+        try:
+            runs = load_runs(args.metrics)
+        except FileNotFoundError:
+            runs = []
+        if not runs:
+            print(f"⚠️  Nenhuma execução registrada em {args.metrics} (use: pipeline_metrics.py append)")
+            sys.exit(1)
+        for _, label, p50, p95 in stage_summary(runs):
+            print(f"{label}: p50 {p50 / 60:.1f} min | p95 {p95 / 60:.1f} min")
+        print(f"Total ({len(runs)} execuções): p50 {percentile([run_total(r) for r in runs], 50) / 60:.1f} min")
+
+
+if __name__ == "__main__":
+    main()
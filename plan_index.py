@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Índice do Plano Terraform - DevSecOps Examples
+Carrega os resource_changes uma vez e responde às junções das políticas por hash
+
+Uso:
+    python plan_index.py tfplan.json                        # resumo dos índices
+    python plan_index.py --benchmark 1000 10000 100000      # varredura x índice
+
+Cada regra dos policy.rego percorre input.resource_changes[_] inteira, e
+auxiliares como has_backup_selection e has_notifications repetem a
+varredura para cada candidato: a junção custa O(n²). Aqui o plano é lido
+uma única vez (terraform_plan.py) e indexado por tipo, endereço, tag
+(chave, valor) e referência (id, name, plan_id, backup_vault_name,
+bucket); cada junção vira uma consulta de dicionário.
+"""
+
+import argparse
+import collections
+import json
+import random
+import time
+
+from terraform_plan import RESOURCE_PROJECTION, iter_plan
+
+# Atributos de change.after indexados para junções por igualdade
+REFERENCE_ATTRIBUTES = ("id", "name", "plan_id", "backup_vault_name", "bucket")
+
+# Junções dos policy.rego: auxiliar -> (tipo do candidato, tipo do parceiro,
+# atributo do parceiro, atributo do candidato, condição extra sobre o parceiro)
+JOINS = {
+    "has_backup_selection": ("aws_backup_plan", "aws_backup_selection", "plan_id", "id", None),
+    "has_notifications": ("aws_backup_vault", "aws_backup_vault_notifications",
+                          "backup_vault_name", "name", None),
+    "has_encryption": ("aws_s3_bucket", "aws_s3_bucket_server_side_encryption_configuration",
+                       "bucket", "id", None),
+    "has_versioning_enabled": ("aws_s3_bucket", "aws_s3_bucket_versioning", "bucket", "id",
+                               lambda after: (after.get("versioning_configuration") or {})
+                               .get("status") == "Enabled"),
+    "is_audit_logs_bucket": ("aws_s3_bucket_lifecycle_configuration", "aws_s3_bucket", "id", "bucket",
+                             lambda after: (after.get("tags") or {}).get("Purpose") == "AuditLogs"),
+}
+
+# Recursos de um "ambiente" sintético do benchmark (repetido até o tamanho pedido)
+_BENCHMARK_UNIT = (
+    "aws_backup_plan", "aws_backup_selection", "aws_backup_vault", "aws_backup_vault_notifications",
+    "aws_s3_bucket", "aws_s3_bucket_server_side_encryption_configuration",
+    "aws_s3_bucket_versioning", "aws_s3_bucket_lifecycle_configuration", "aws_kms_key", "aws_vpc",
+)
+
+# Acima deste tamanho a varredura aninhada é medida em uma amostra de candidatos
+SCAN_SAMPLE = 200
+
+
+def after(change):
+    """change.after do resource_change ({} em remoções e valores ausentes)"""
+    return (change.get("change") or {}).get("after") or {}
+
+
+def reference_key(value):
+    """Chave de igualdade com a semântica do Rego (true != 1); None se não indexável"""
+    if isinstance(value, (dict, list)):
+        return None
+    if isinstance(value, bool):
+        return (bool, value)
+    return value
+
+
+class PlanIndex:
+    """resource_changes de um plano com índices por tipo, endereço, tag e referência"""
+
+    def __init__(self, resource_changes=()):
+        self.resources = []
+        self.by_type = collections.defaultdict(list)
+        self.by_address = {}
+        self.by_tag = collections.defaultdict(list)
+        self.by_reference = collections.defaultdict(list)
+        for change in resource_changes:
+            self.add(change)
+
+    @classmethod
+    def from_plan(cls, path, projection=RESOURCE_PROJECTION):
+        """Indexa o tfplan.json lendo um resource_change por vez"""
+        return cls(item for _, item in iter_plan(path, projection=projection))
+
+    def add(self, change):
+        self.resources.append(change)
+        self.by_type[change.get("type")].append(change)
+        if "address" in change:
+            self.by_address[change["address"]] = change
+        values = after(change)
+        tags = values.get("tags")
+        if isinstance(tags, dict):
+            for key, value in tags.items():
+                if reference_key(value) is not None:
+                    self.by_tag[(key, reference_key(value))].append(change)
+        for attr in REFERENCE_ATTRIBUTES:
+            if attr in values and reference_key(values[attr]) is not None:
+                self.by_reference[(attr, reference_key(values[attr]))].append(change)
+
+    def __len__(self):
+        return len(self.resources)
+
+    def of_type(self, resource_type):
+        return self.by_type.get(resource_type, ())
+
+    def tagged(self, key, value, resource_type=None):
+        """Recursos com tags[key] == value (opcionalmente de um tipo)"""
+        found = self.by_tag.get((key, reference_key(value)), ())
+        return [change for change in found if resource_type is None or change.get("type") == resource_type]
+
+    def referencing(self, resource_type, attr, value):
+        """Recursos do tipo cujo change.after[attr] == value"""
+        key = reference_key(value)
+        if key is None:
+            return []
+        return [change for change in self.by_reference.get((attr, key), ())
+                if change.get("type") == resource_type]
+
+    def partners(self, join, change):
+        """Parceiros de change na junção JOINS[join] (vazio se o atributo não existe)"""
+        _, partner_type, partner_attr, own_attr, condition = JOINS[join]
+        values = after(change)
+        if own_attr not in values:
+            return []
+        found = self.referencing(partner_type, partner_attr, values[own_attr])
+        return [partner for partner in found if condition is None or condition(after(partner))]
+
+    def has_partner(self, join, change):
+        return bool(self.partners(join, change))
+
+    def summary(self):
+        return {"resources": len(self), "types": len(self.by_type), "addresses": len(self.by_address),
+                "tags": len(self.by_tag), "references": len(self.by_reference)}
+
+
+def scan_has_partner(resources, join, change):
+    """A mesma junção como o OPA a avalia: varredura completa por candidato"""
+    _, partner_type, partner_attr, own_attr, condition = JOINS[join]
+    values = after(change)
+    if own_attr not in values:
+        return False
+    for partner in resources:
+        if partner.get("type") != partner_type:
+            continue
+        partner_values = after(partner)
+        if (partner_attr in partner_values
+                and reference_key(partner_values[partner_attr]) == reference_key(values[own_attr])
+                and (condition is None or condition(partner_values))):
+            return True
+    return False
+
+
+def synthetic_plan(size, missing=0.1, seed=0):
+    """resource_changes sintéticos: ambientes completos com ~missing parceiros faltando"""
+    rng = random.Random(seed)
+    changes = []
+    for i in range(size):
+        unit, position = divmod(i, len(_BENCHMARK_UNIT))
+        resource_type = _BENCHMARK_UNIT[position]
+        values = {"id": f"{resource_type}-{unit}", "name": f"{resource_type}-{unit}",
+                  "tags": {"Environment": "production" if unit % 2 else "development"}}
+        # Parceiros apontam para o candidato da mesma unidade, exceto uma fração
+        target = unit if rng.random() >= missing else -1 - unit
+        if resource_type == "aws_backup_selection":
+            values["plan_id"] = f"aws_backup_plan-{target}"
+        elif resource_type == "aws_backup_vault_notifications":
+            values["backup_vault_name"] = f"aws_backup_vault-{target}"
+        elif resource_type in ("aws_s3_bucket_server_side_encryption_configuration",
+                               "aws_s3_bucket_lifecycle_configuration"):
+            values["bucket"] = f"aws_s3_bucket-{target}"
+        elif resource_type == "aws_s3_bucket_versioning":
+            values["bucket"] = f"aws_s3_bucket-{target}"
+            values["versioning_configuration"] = {"status": "Enabled"}
+        elif resource_type == "aws_s3_bucket":
+            values["tags"]["Purpose"] = "AuditLogs"
+        changes.append({"address": f"{resource_type}.r{unit}", "type": resource_type,
+                        "name": f"r{unit}", "change": {"actions": ["create"], "after": values}})
+    return changes
+
+
+def benchmark(sizes, sample=SCAN_SAMPLE):
+    """Tempo das junções por varredura aninhada e por índice para cada tamanho
+
+    A varredura é medida em até `sample` candidatos por junção e extrapolada
+    para todos (a 100k recursos, a varredura completa levaria horas).
+    """
+    rows = []
+    for size in sizes:
+        resources = synthetic_plan(size)
+        started = time.perf_counter()
+        index = PlanIndex(resources)
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        indexed = {join: sum(not index.has_partner(join, change) for change in index.of_type(JOINS[join][0]))
+                   for join in JOINS}
+        lookup = time.perf_counter() - started
+
+        scan = 0.0
+        for join in JOINS:
+            candidates = index.of_type(JOINS[join][0])
+            measured = candidates[:sample]
+            started = time.perf_counter()
+            scanned = sum(not scan_has_partner(resources, join, change) for change in measured)
+            elapsed = time.perf_counter() - started
+            if len(measured) == len(candidates) and scanned != indexed[join]:
+                raise AssertionError(f"{join}: varredura={scanned} índice={indexed[join]}")
+            scan += elapsed * len(candidates) / max(1, len(measured))
+
+        rows.append({"resources": size, "index_build_s": build, "index_lookup_s": lookup,
+                     "scan_s": scan, "scan_estimated": any(len(index.of_type(JOINS[join][0])) > sample
+                                                            for join in JOINS),
+                     "missing_partners": indexed})
+    return rows
+
+
+def print_benchmark(rows):
+    header = f"{'Recursos':>10} {'Varredura':>12} {'Índice (build)':>15} {'Índice (junções)':>17} {'Ganho':>9}"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        indexed = row["index_build_s"] + row["index_lookup_s"]
+        mark = "~" if row["scan_estimated"] else " "
+        print(f"{row['resources']:>10} {mark}{row['scan_s']:>10.3f}s {row['index_build_s']:>14.3f}s "
+              f"{row['index_lookup_s']:>16.3f}s {row['scan_s'] / indexed:>8.0f}x")
+    print("-" * len(header))
+    print(f"~ varredura extrapolada de {SCAN_SAMPLE} candidatos por junção")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indexa os resource_changes de um tfplan.json")
+    parser.add_argument("plan", nargs="?", help="saída de terraform show -json")
+    parser.add_argument("--benchmark", type=int, nargs="+", metavar="N",
+                        help="compara varredura e índice em planos sintéticos de N recursos")
+    parser.add_argument("--output", help="grava o resultado do benchmark em JSON")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        rows = benchmark(args.benchmark)
+        print_benchmark(rows)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(rows, f, indent=2)
+            print(f"✅ Resultados gravados: {args.output}")
+        return
+    if not args.plan:
+        parser.error("informe o tfplan.json ou --benchmark")
+
+    started = time.perf_counter()
+    index = PlanIndex.from_plan(args.plan)
+    elapsed = time.perf_counter() - started
+    summary = index.summary()
+    print(f"✅ {summary['resources']} recursos indexados em {elapsed:.2f}s: {summary['types']} tipos, "
+          f"{summary['tags']} tags, {summary['references']} referências")
+    for join, (candidate_type, *_) in JOINS.items():
+        candidates = index.of_type(candidate_type)
+        if candidates:
+            missing = sum(not index.has_partner(join, change) for change in candidates)
+            print(f"   {join:<24} {len(candidates):>6} {candidate_type} ({missing} sem parceiro)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Otimização de PNGs - DevSecOps Examples
+Recomprime sem perdas os PNGs renderizados dos diagramas
+
+Uso:
+    python png_optimize.py                          # todos os PNGs de exemplos/
+    python png_optimize.py diagrama.png --workers 2
+    python render_diagrams.py --optimize-png        # já no render
+
+Para cada imagem:
+- o canal alfa é descartado quando todos os pixels são opacos;
+- com até 256 cores, a imagem vira paleta (modo P), conferida pixel a pixel;
+- o encoder do Pillow escolhe o filtro de cada linha (heurística do libpng)
+  e o deflate roda no nível 9 com as estratégias padrão e Z_FILTERED,
+  ficando a menor saída;
+- metadados (tEXt, iTXt, zTXt, tIME, iCCP, eXIf) são removidos; só a
+  resolução (pHYs) é mantida.
+
+O arquivo só é substituído se ficar menor. Os SHA-256 das imagens já
+otimizadas ficam em .cache/png-optimize.json e elas são puladas nas próximas
+execuções. O relatório (--report) traz os bytes poupados por arquivo.
+"""
+
+import argparse
+import glob
+import io
+import json
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image, ImageChops
+
+from diagram_builders import DIAGRAM_ROOT
+from presentation_media import open_unchecked, source_digest
+
+# Registro dos PNGs já otimizados (SHA-256 do arquivo final)
+CACHE_PATH = os.path.join(".cache", "png-optimize.json")
+
+# Relatório padrão de bytes poupados
+REPORT_PATH = "png-optimize-report.json"
+
+# Incrementar quando as transformações mudarem (as imagens voltam a ser otimizadas)
+OPTIMIZER_VERSION = 2
+
+# Estratégias de deflate testadas em cada imagem
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+
+# Processos em paralelo: cada um decodifica uma imagem inteira (até ~1,5 GB)
+DEFAULT_WORKERS = 2
+
+
+def reduce_mode(img):
+    """Converte a imagem para o modo mais compacto que preserva os pixels
+
+    Retorna (imagem, descrição da redução ou None).
+    """
+    reduction = None
+    if img.mode == "RGBA" and img.getextrema()[3] == (255, 255):
+        img = img.convert("RGB")
+        reduction = "sem alfa"
+
+    if img.mode in ("RGB", "L"):
+        colors = img.getcolors(256)
+        if colors:
+            palette = Image.new("P", (1, 1))
+            entries = [color if img.mode == "RGB" else (color,) * 3 for _, color in colors]
+            palette.putpalette([channel for entry in entries for channel in entry])
+            indexed = img.quantize(palette=palette, dither=Image.Dither.NONE)
+            # Cada cor existe na paleta: a conversão deve ser exata
+            if ImageChops.difference(indexed.convert(img.mode), img).getbbox() is None:
+                img = indexed
+                reduction = f"paleta de {len(colors)} cores"
+    return img, reduction
+
+
+def encode(img, dpi=None):
+    """Codifica com cada estratégia de deflate e retorna o menor PNG
+
+    icc_profile=None explícito: sem ele o Pillow regrava o iCCP de img.info,
+    que convert() e quantize() copiam da imagem de origem.
+    """
+    best = None
+    for strategy in ZLIB_STRATEGIES:
+        out = io.BytesIO()
+        img.save(out, format="PNG", compress_level=9, compress_type=strategy, dpi=dpi, icc_profile=None)
+        if best is None or out.tell() < len(best):
+            best = out.getvalue()
+    return best
+
+
+def optimize_file(path, known=frozenset()):
+    """Otimiza um PNG no lugar
+
+    known: SHA-256 de arquivos já otimizados (pulados). Retorna a linha do
+    relatório: arquivo, tamanhos, modos, situação e o SHA-256 final.
+    """
+    started = time.perf_counter()
+    before = os.path.getsize(path)
+    digest = source_digest(path)
+    entry = {"file": path, "before": before, "after": before, "saved": 0, "digest": digest}
+    if digest in known:
+        entry.update(status="cache", seconds=time.perf_counter() - started)
+        return entry
+
+    img = open_unchecked(path)
+    try:
+        img.load()
+        dpi = img.info.get("dpi")
+        entry["mode_before"] = img.mode
+        reduced, reduction = reduce_mode(img)
+        png = encode(reduced, dpi)
+        entry.update(mode_after=reduced.mode, reduction=reduction)
+    finally:
+        img.close()
+
+    if len(png) < before:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+        entry.update(after=len(png), saved=before - len(png), status="otimizado",
+                     digest=source_digest(path))
+    else:
+        entry["status"] = "sem ganho"
+    entry["seconds"] = time.perf_counter() - started
+    return entry
+
+
+def load_known(cache_path=CACHE_PATH):
+    """SHA-256 dos PNGs já otimizados pela versão atual"""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return set()
+    if cache.get("version") != OPTIMIZER_VERSION:
+        return set()
+    return set(cache.get("optimized", []))
+
+
+def save_known(known, cache_path=CACHE_PATH):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": OPTIMIZER_VERSION, "optimized": sorted(known)}, f, indent=2)
+    os.replace(tmp_path, cache_path)
+
+
+def discover_pngs(root=DIAGRAM_ROOT):
+    """PNGs renderizados em exemplos/, em ordem de caminho"""
+    return sorted(glob.glob(os.path.join(root, "**", "*.png"), recursive=True))
+
+
+def optimize_all(paths, workers=DEFAULT_WORKERS, cache_path=CACHE_PATH):
+    """Otimiza os PNGs em um pool de processos e atualiza o cache
+
+    Retorna as linhas do relatório na ordem dos caminhos.
+    """
+    known = load_known(cache_path)
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(optimize_file, path, frozenset(known)): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                entries[path] = future.result()
+            except Exception as exc:
+                entries[path] = {"file": path, "status": "erro", "error": f"{type(exc).__name__}: {exc}"}
+
+    for entry in entries.values():
+        if entry["status"] in ("otimizado", "sem ganho", "cache"):
+            known.add(entry["digest"])
+    save_known(known, cache_path)
+    return [entries[path] for path in paths]
+
+
+def print_report(entries, elapsed):
+    """Bytes poupados por arquivo (♻️ = pulado pelo cache)"""
+    header = f"{'PNG':<50} {'Antes':>10} {'Depois':>10} {'Poupado':>9} {'Tempo':>8}"
+    print(header)
+    print("-" * len(header))
+    for entry in entries:
+        name = os.path.basename(entry["file"])
+        if entry["status"] == "erro":
+            print(f"❌ {name:<48} {entry['error']}")
+            continue
+        icon = "♻️ " if entry["status"] == "cache" else "✅"
+        percent = 100 * entry["saved"] / entry["before"] if entry["before"] else 0
+        print(f"{icon} {name:<48} {entry['before'] / 1024:8.0f}KB {entry['after'] / 1024:8.0f}KB "
+              f"{percent:8.1f}% {entry['seconds']:7.2f}s"
+              + (f"  ({entry['reduction']})" if entry.get("reduction") else ""))
+    saved = sum(entry.get("saved", 0) for entry in entries)
+    print("-" * len(header))
+    print(f"⏱️  {len(entries)} PNGs em {elapsed:.2f}s, {saved / 1024 / 1024:.2f} MB poupados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recomprime sem perdas os PNGs dos diagramas")
+    parser.add_argument("pngs", nargs="*", help="arquivos PNG (padrão: todos em exemplos/)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"número de processos (padrão: {DEFAULT_WORKERS})")
+    parser.add_argument("--report", default=REPORT_PATH,
+                        help=f"relatório JSON de bytes poupados (padrão: {REPORT_PATH})")
+    args = parser.parse_args()
+
+    paths = args.pngs or discover_pngs()
+    started = time.perf_counter()
+    entries = optimize_all(paths, args.workers)
+    print_report(entries, time.perf_counter() - started)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2, ensure_ascii=False)
+    print(f"📄 Relatório: {args.report}")
+    if any(entry["status"] == "erro" for entry in entries):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
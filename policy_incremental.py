@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Avaliação Incremental de Políticas - DevSecOps Examples
+Reavalia só as regras cujos recursos mudaram desde a última execução
+
+Uso:
+    python policy_incremental.py tfplan.json                       # todas as políticas
+    python policy_incremental.py tfplan.json policy.rego --fail-defined
+    terraform show -json tfplan | python policy_incremental.py - --snapshot .cache/prod.json
+
+A maioria dos PRs muda poucos recursos, mas cada execução avaliava todas as
+regras sobre o plano inteiro. Aqui cada resource_change (projetado como
+no rego_eval.py) recebe um SHA-256 do seu JSON canônico, comparado com o
+snapshot da execução anterior (.cache/policy-incremental/):
+
+- definições que leem um recurso por vez (Policy.split) rodam só para os
+  recursos novos ou alterados; as demais reaproveitam o resultado guardado
+  por endereço;
+- definições com junção guardam o resultado por candidato (o recurso da
+  varredura inicial) e reavaliam o candidato alterado e os candidatos
+  ligados a parceiros alterados, novos ou removidos pela igualdade da
+  junção: uma aws_backup_selection alterada reavalia o aws_backup_plan
+  cujo id é o plan_id dela, antes e depois da mudança;
+- junções sem igualdade com o candidato (VPCs sobrepostas, alarmes de
+  anomalia) são reavaliadas inteiras quando algum recurso dos tipos que
+  leem muda.
+
+Os resultados novos e os reaproveitados são unidos em um único conjunto
+por política. Mudar o policy.rego (SHA-256 do fonte), a regra ou a versão
+do snapshot invalida o que foi guardado para aquela política.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from plan_index import REFERENCE_ATTRIBUTES, PlanIndex, after, reference_key
+from rego_eval import DEFAULT_RULE, Policy, discover_policies
+from terraform_plan import RESOURCE_PROJECTION, iter_plan
+
+# Diretório dos snapshots (um por tfplan.json)
+SNAPSHOT_DIR = os.path.join(".cache", "policy-incremental")
+
+# Incrementar quando o formato do snapshot ou o hash dos recursos mudar
+SNAPSHOT_VERSION = 1
+
+
+def resource_digest(change):
+    """SHA-256 do JSON canônico de um resource_change"""
+    canonical = json.dumps(change, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def resource_address(change, position):
+    """Endereço do recurso (posição no plano se o Terraform não informou)"""
+    return change.get("address") or f"#{position}"
+
+
+def snapshot_path(plan, snapshot_dir=SNAPSHOT_DIR):
+    """Snapshot padrão de um plano: derivado do caminho absoluto do tfplan.json"""
+    name = "stdin" if plan == "-" else hashlib.sha256(os.path.abspath(plan).encode()).hexdigest()[:16]
+    return os.path.join(snapshot_dir, f"{name}.json")
+
+
+def load_snapshot(path, rule=DEFAULT_RULE):
+    """Snapshot da execução anterior, ou um vazio (sem path, inexistente, de outra versão/regra)"""
+    empty = {"version": SNAPSHOT_VERSION, "rule": rule, "resources": {}, "packages": {}}
+    if path is None:
+        return empty
+    try:
+        with open(path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return empty
+    if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("rule") != rule:
+        return empty
+    return snapshot
+
+
+def save_snapshot(snapshot, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _value_key(value):
+    return json.dumps(value, sort_keys=True)
+
+
+class _PackageState:
+    """Definições de uma política e o que o snapshot anterior guardou para ela"""
+
+    def __init__(self, policy, snapshot, rule):
+        self.policy = policy
+        self.local, self.joins, self.types = policy.split(rule)
+        cached = snapshot["packages"].get(policy.package)
+        self.cached = cached if cached and cached.get("digest") == policy.digest else None
+        self.entry = {"digest": policy.digest, "local": {}, "joins": []}
+
+    def cached_local(self, address):
+        return self.cached["local"].get(address, []) if self.cached else None
+
+    def cached_join(self, position):
+        if self.cached is None or position >= len(self.cached["joins"]):
+            return None
+        return self.cached["joins"][position]
+
+
+def _linked_candidates(definition, index, entries):
+    """Candidatos ligados pela junção aos recursos (antes e depois) em entries
+
+    entries são (tipo, valores de change.after) dos parceiros que mudaram.
+    Retorna None se algum valor não é comparável por chave (reavaliar todos).
+    """
+    linked = set()
+    for partner_type, partner_attr, own_attr in definition.joins:
+        for resource_type, values in entries:
+            if resource_type != partner_type or partner_attr not in values:
+                continue
+            value = values[partner_attr]
+            if reference_key(value) is None:
+                return None
+            if own_attr in REFERENCE_ATTRIBUTES:
+                found = index.referencing(definition.driver_type, own_attr, value)
+            else:
+                found = [change for change in index.of_type(definition.driver_type)
+                         if own_attr in after(change)
+                         and reference_key(after(change)[own_attr]) == reference_key(value)]
+            linked.update(id(change) for change in found)
+    return linked
+
+
+def evaluate_incremental(policies, changes, snapshot, rule=DEFAULT_RULE):
+    """Avalia as políticas reaproveitando os resultados do snapshot anterior
+
+    Lê os resource_changes em uma única passada, como evaluate_stream do
+    rego_eval.py. Retorna ({pacote: [valores]}, novo snapshot, estatísticas).
+    """
+    states = [_PackageState(policy, snapshot, rule) for policy in policies]
+    keep_all = any(state.types is None for state in states)
+    keep = set().union(*(state.types for state in states if state.types is not None))
+    # Atributos de parceiros guardados no snapshot para achar os candidatos ligados
+    tracked = {}
+    for state in states:
+        for definition in state.joins:
+            for partner_type, partner_attr, _ in definition.joins or ():
+                tracked.setdefault(partner_type, set()).add(partner_attr)
+
+    previous = snapshot["resources"]
+    resources, changed, retained, addresses = {}, set(), [], {}
+    stats = {"resources": 0, "changed": 0, "added": 0, "removed": 0, "local_evaluated": 0,
+             "local_reused": 0, "candidates_evaluated": 0, "candidates_reused": 0,
+             "joins_evaluated": 0, "joins_reused": 0}
+    for position, change in enumerate(changes):
+        stats["resources"] += 1
+        address = resource_address(change, position)
+        resource_type = change.get("type")
+        entry = {"hash": resource_digest(change), "type": resource_type}
+        values = after(change)
+        keys = {attr: values[attr] for attr in tracked.get(resource_type, ()) if attr in values}
+        if keys:
+            entry["keys"] = keys
+        resources[address] = entry
+        old = previous.get(address)
+        if old is None or old["hash"] != entry["hash"]:
+            changed.add(address)
+            stats["added" if old is None else "changed"] += 1
+
+        single = None
+        for state in states:
+            definitions = state.local.get(resource_type)
+            if not definitions:
+                continue
+            found = state.cached_local(address)
+            if found is None or address in changed:
+                single = single or {"resource_changes": [change]}
+                found = state.policy.evaluate_definitions(definitions, single)
+                stats["local_evaluated"] += 1
+            else:
+                stats["local_reused"] += 1
+            if found:
+                state.entry["local"][address] = found
+        if keep_all or resource_type in keep:
+            retained.append(change)
+            addresses[id(change)] = address
+
+    removed = set(previous) - set(resources)
+    stats["removed"] = len(removed)
+    changed_types = {resources[address]["type"] for address in changed}
+    changed_types |= {previous[address]["type"] for address in changed | removed if address in previous}
+    # Parceiros alterados, novos ou removidos: valores antes (snapshot) e depois (plano)
+    touched = [(previous[address]["type"], previous[address].get("keys", {}))
+               for address in changed | removed if address in previous]
+    touched += [(resources[address]["type"], resources[address].get("keys", {})) for address in changed]
+
+    document = {"resource_changes": retained}
+    index = PlanIndex(retained)
+    for state in states:
+        for position, definition in enumerate(state.joins):
+            cached = state.cached_join(position)
+            if definition.driver_type is None:
+                if (cached is not None and None not in definition.scans
+                        and not changed_types & set(definition.scans)):
+                    state.entry["joins"].append(cached)
+                    stats["joins_reused"] += 1
+                    continue
+                found = state.policy.evaluate_definitions([definition], document, index)
+                state.entry["joins"].append({"all": found})
+                stats["joins_evaluated"] += 1
+                continue
+
+            partners = set(definition.scans[1:])
+            affected = None
+            if cached is not None and None not in partners:
+                if not partners & changed_types:
+                    affected = set()
+                elif definition.joins is not None:
+                    affected = _linked_candidates(definition, index, touched)
+            candidates = index.of_type(definition.driver_type)
+            results, pending = {}, []
+            for candidate in candidates:
+                address = addresses[id(candidate)]
+                if affected is None or id(candidate) in affected or address in changed:
+                    pending.append(candidate)
+                else:
+                    found = cached["candidates"].get(address, [])
+                    stats["candidates_reused"] += 1
+                    if found:
+                        results[address] = found
+            for candidate, found in state.policy.evaluate_candidates(definition, pending, document, index):
+                stats["candidates_evaluated"] += 1
+                if found:
+                    results[addresses[id(candidate)]] = found
+            state.entry["joins"].append({"candidates": results})
+
+    outcome = {}
+    for state in states:
+        unique = {}
+        for found in state.entry["local"].values():
+            for value in found:
+                unique.setdefault(_value_key(value), value)
+        for entry in state.entry["joins"]:
+            for found in ([entry["all"]] if "all" in entry else entry["candidates"].values()):
+                for value in found:
+                    unique.setdefault(_value_key(value), value)
+        outcome[state.policy.package] = [unique[key] for key in sorted(unique)]
+    new_snapshot = {"version": SNAPSHOT_VERSION, "rule": rule, "resources": resources,
+                    "packages": {state.policy.package: state.entry for state in states}}
+    return outcome, new_snapshot, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia os policy.rego só sobre o que mudou no plano")
+    parser.add_argument("plan", help="tfplan.json (saída de terraform show -json; - para stdin)")
+    parser.add_argument("policies", nargs="*", help="arquivos policy.rego (padrão: todos os exemplos)")
+    parser.add_argument("--rule", default=DEFAULT_RULE, help=f"regra avaliada (padrão: {DEFAULT_RULE})")
+    parser.add_argument("--snapshot", help=f"snapshot da execução anterior (padrão: em {SNAPSHOT_DIR})")
+    parser.add_argument("--full", action="store_true",
+                        help="ignora o snapshot e avalia tudo (o snapshot é regravado)")
+    parser.add_argument("--fail-defined", action="store_true",
+                        help="termina com código 1 se alguma regra produzir valores (como no opa eval)")
+    args = parser.parse_args()
+
+    path = args.snapshot or snapshot_path(args.plan)
+    started = time.perf_counter()
+    policies = [Policy.load(policy_path) for policy_path in args.policies or discover_policies()]
+    snapshot = load_snapshot(None if args.full else path, args.rule)
+    changes = (item for _, item in iter_plan(args.plan, projection=RESOURCE_PROJECTION))
+    results, snapshot, stats = evaluate_incremental(policies, changes, snapshot, args.rule)
+    save_snapshot(snapshot, path)
+    elapsed = time.perf_counter() - started
+
+    for package, values in results.items():
+        icon = "❌" if values else "✅"
+        print(f"{icon} {package}: {len(values)} violações")
+        for value in values:
+            print(f"   - {value}")
+    print(f"📋 {stats['resources']} recursos: {stats['added']} novos, {stats['changed']} alterados, "
+          f"{stats['removed']} removidos")
+    print(f"♻️  reaproveitados: {stats['local_reused']} recursos, {stats['candidates_reused']} candidatos "
+          f"de junção, {stats['joins_reused']} junções inteiras")
+    print(f"⏱️  reavaliados em {elapsed:.3f}s: {stats['local_evaluated']} recursos, "
+          f"{stats['candidates_evaluated']} candidatos de junção, {stats['joins_evaluated']} junções inteiras")
+    print(f"📄 Snapshot: {path}")
+    if args.fail_defined and any(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
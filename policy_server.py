@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Servidor Local de Políticas - DevSecOps Examples
+Carrega os seis policy.rego uma vez e avalia planos por HTTP, em lotes
+
+Uso:
+    python policy_server.py start                          # sobe em segundo plano
+    python policy_server.py eval tfplan.json --policy policy.rego --fail-defined
+    python policy_server.py eval */tfplan.json --batch-size 4
+    python policy_server.py metrics
+    python policy_server.py stop
+    python policy_server.py serve --port 8182              # em primeiro plano
+
+O Stage 3 da pipeline chamava o OPA uma vez por exemplo: cada chamada pagava
+o início do processo e a compilação da política. Aqui um processo de longa
+duração (127.0.0.1, sem dependências além da stdlib) compila as políticas
+com rego_eval.py na subida e responde:
+
+- POST /v1/evaluate   {"documents": [{"id", "input"}], "packages", "rule"}
+                      -> {"results": [{"id", "deny": {pacote: [mensagens]}}]}
+- GET  /v1/health     pacotes carregados
+- GET  /v1/metrics    latências por requisição (p50/p95/p99) em JSON
+- GET  /metrics       o mesmo histograma no formato texto do Prometheus
+
+As latências do servidor medem só o handler (decodificar, avaliar,
+responder), sem o transporte; o cliente registra em PolicyClient.observed
+o tempo de ida e volta de cada requisição, que o eval imprime ao final.
+- POST /v1/shutdown   encerra o servidor
+
+O cliente (PolicyClient) mantém um pool de conexões HTTP/1.1 keep-alive,
+agrupa os planos em lotes e envia vários lotes ao mesmo tempo pelo pool.
+Isso sobrepõe rede e espera, não a avaliação: o ThreadingHTTPServer atende
+cada lote em uma thread, mas a avaliação é Python puro e roda sob o GIL,
+um lote por vez. O ganho vem de compilar as políticas uma vez só.
+
+O eval termina com código 1 quando há violações (--fail-defined) e com
+código 2 quando o servidor está inacessível ou responde com erro, para
+que a pipeline não confunda um servidor fora do ar com violações.
+"""
+
+import argparse
+import collections
+import contextlib
+import http.client
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from rego_eval import DEFAULT_RULE, Policy, discover_policies, evaluate_all, load_plan
+
+# Endereço padrão (8181 é a porta do `opa run --server`)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8182
+
+# URL usada pelo cliente quando --url não é informada
+DEFAULT_URL = os.environ.get("POLICY_SERVER_URL", f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+
+# Conexões mantidas pelo cliente e planos por requisição
+DEFAULT_POOL_SIZE = 4
+DEFAULT_BATCH_SIZE = 8
+
+# Código de saída para falhas do servidor ou da conexão (1 = violações)
+EXIT_SERVER_ERROR = 2
+
+# Log do servidor iniciado com `start`
+LOG_PATH = os.path.join(".cache", "policy-server.log")
+
+# Limites dos buckets do histograma de latência (segundos)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Latências recentes guardadas por rota para os percentis
+LATENCY_WINDOW = 1024
+
+
+class LatencyMetrics:
+    """Histograma e janela de latências por rota"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.buckets = collections.defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+        self.count = collections.Counter()
+        self.total = collections.Counter()
+        self.recent = collections.defaultdict(lambda: collections.deque(maxlen=LATENCY_WINDOW))
+        self.documents = 0
+        self.errors = 0
+
+    def record(self, route, seconds, documents=0, error=False):
+        with self._lock:
+            for position, limit in enumerate(LATENCY_BUCKETS):
+                if seconds <= limit:
+                    self.buckets[route][position] += 1
+            self.count[route] += 1
+            self.total[route] += seconds
+            self.recent[route].append(seconds)
+            self.documents += documents
+            self.errors += error
+
+    def snapshot(self):
+        """Contagens e percentis (ms) por rota"""
+        with self._lock:
+            routes = {}
+            for route, recent in self.recent.items():
+                ordered = sorted(recent)
+                routes[route] = {
+                    "requests": self.count[route],
+                    "mean_ms": 1000 * self.total[route] / self.count[route],
+                    **{f"p{q}_ms": 1000 * ordered[min(len(ordered) - 1, len(ordered) * q // 100)]
+                       for q in (50, 95, 99)},
+                }
+            return {"routes": routes, "documents": self.documents, "errors": self.errors}
+
+    def prometheus(self, packages):
+        """Texto no formato de exposição do Prometheus"""
+        lines = ["# HELP policy_server_request_seconds Latência por requisição",
+                 "# TYPE policy_server_request_seconds histogram"]
+        with self._lock:
+            for route in sorted(self.count):
+                label = f'route="{route}"'
+                for limit, count in zip(LATENCY_BUCKETS, self.buckets[route]):
+                    lines.append(f'policy_server_request_seconds_bucket{{{label},le="{limit}"}} {count}')
+                lines.append(f'policy_server_request_seconds_bucket{{{label},le="+Inf"}} {self.count[route]}')
+                lines.append(f"policy_server_request_seconds_sum{{{label}}} {self.total[route]:.6f}")
+                lines.append(f"policy_server_request_seconds_count{{{label}}} {self.count[route]}")
+            lines += ["# TYPE policy_server_documents_total counter",
+                      f"policy_server_documents_total {self.documents}",
+                      "# TYPE policy_server_errors_total counter",
+                      f"policy_server_errors_total {self.errors}",
+                      "# TYPE policy_server_packages gauge",
+                      f"policy_server_packages {packages}"]
+        return "\n".join(lines) + "\n"
+
+
+class PolicyServer(ThreadingHTTPServer):
+    """Servidor HTTP com as políticas compiladas uma única vez"""
+
+    daemon_threads = True
+
+    def __init__(self, address, policy_paths, quiet=True):
+        started = time.perf_counter()
+        self.policies = [Policy.load(path) for path in policy_paths]
+        self.compile_seconds = time.perf_counter() - started
+        self.metrics = LatencyMetrics()
+        self.quiet = quiet
+        super().__init__(address, _Handler)
+
+    @property
+    def packages(self):
+        return [policy.package for policy in self.policies]
+
+    def evaluate(self, request):
+        """Resposta de /v1/evaluate para o corpo já decodificado"""
+        rule = request.get("rule", DEFAULT_RULE)
+        wanted = request.get("packages")
+        policies = self.policies
+        if wanted:
+            unknown = set(wanted) - set(self.packages)
+            if unknown:
+                raise ValueError(f"pacotes desconhecidos: {', '.join(sorted(unknown))}")
+            policies = [policy for policy in self.policies if policy.package in wanted]
+        results = []
+        for position, document in enumerate(request.get("documents", [])):
+            started = time.perf_counter()
+            found = evaluate_all(policies, document.get("input", {}), rule)
+            results.append({"id": document.get("id", position), rule: found,
+                            "elapsed_ms": 1000 * (time.perf_counter() - started)})
+        return {"results": results}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1: a conexão continua aberta entre requisições (pool do cliente)
+    protocol_version = "HTTP/1.1"
+    # Cabeçalhos e corpo saem em duas escritas: com Nagle e o ACK atrasado do
+    # cliente, a segunda esperava ~40 ms em cada requisição keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _reply(self, status, payload, content_type="application/json"):
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _timed(self, handler):
+        started = time.perf_counter()
+        route = urlsplit(self.path).path
+        documents, error = 0, False
+        try:
+            status, payload, documents = handler()
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            status, payload, error = 400, {"error": f"{type(exc).__name__}: {exc}"}, True
+        elapsed = time.perf_counter() - started
+        if isinstance(payload, dict):
+            payload.setdefault("elapsed_ms", 1000 * elapsed)
+        self._reply(status, payload, "text/plain; version=0.0.4" if isinstance(payload, str) else "application/json")
+        self.server.metrics.record(route, elapsed, documents, error or status >= 400)
+
+    def do_GET(self):
+        route = urlsplit(self.path).path
+        if route == "/v1/health":
+            self._timed(lambda: (200, {"status": "ok", "packages": self.server.packages,
+                                       "policies": {policy.package: os.path.abspath(policy.path)
+                                                    for policy in self.server.policies},
+                                       "compile_ms": 1000 * self.server.compile_seconds}, 0))
+        elif route == "/v1/metrics":
+            self._timed(lambda: (200, self.server.metrics.snapshot(), 0))
+        elif route == "/metrics":
+            self._timed(lambda: (200, self.server.metrics.prometheus(len(self.server.policies)), 0))
+        else:
+            self._timed(lambda: (404, {"error": f"rota desconhecida: {route}"}, 0))
+
+    def do_POST(self):
+        route = urlsplit(self.path).path
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if route == "/v1/evaluate":
+            def evaluate():
+                request = json.loads(body)
+                return 200, self.server.evaluate(request), len(request.get("documents", []))
+            self._timed(evaluate)
+        elif route == "/v1/shutdown":
+            self._timed(lambda: (200, {"status": "encerrando"}, 0))
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            self._timed(lambda: (404, {"error": f"rota desconhecida: {route}"}, 0))
+
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, policy_paths=None, quiet=True):
+    server = PolicyServer((host, port), policy_paths or discover_policies(), quiet)
+    print(f"✅ {len(server.policies)} pacotes compilados em {server.compile_seconds:.3f}s; "
+          f"ouvindo em http://{host}:{server.server_address[1]}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+class ServerError(RuntimeError):
+    """Resposta de erro do servidor de políticas"""
+
+
+class PolicyClient:
+    """Cliente com pool de conexões keep-alive e envio em lotes"""
+
+    def __init__(self, url=DEFAULT_URL, pool_size=DEFAULT_POOL_SIZE, batch_size=DEFAULT_BATCH_SIZE, timeout=120):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        # (documentos no lote, segundos no cliente, ms no servidor) por requisição
+        self.latencies = []
+        # Ida e volta vista pelo cliente, por rota (inclui o transporte)
+        self.observed = LatencyMetrics()
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """Conexão do pool; no máximo pool_size abertas ao mesmo tempo"""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            self._idle.put(conn)
+
+    def request(self, method, path, payload=None):
+        """Envia a requisição e devolve o JSON (ou texto) da resposta"""
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        started = time.perf_counter()
+        for attempt in (1, 2):
+            with self._connection() as conn:
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                    response = conn.getresponse()
+                    data = response.read()
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    # Conexão ociosa fechada pelo servidor: tenta uma vez com outra
+                    conn.close()
+                    if attempt == 2:
+                        raise
+                    continue
+            if response.getheader("Content-Type", "").startswith("application/json"):
+                data = json.loads(data)
+            self.observed.record(urlsplit(path).path, time.perf_counter() - started,
+                                 error=response.status >= 400)
+            if response.status >= 400:
+                raise ServerError(data.get("error") if isinstance(data, dict) else data)
+            return data
+
+    def health(self):
+        return self.request("GET", "/v1/health")
+
+    def metrics(self):
+        return self.request("GET", "/v1/metrics")
+
+    def packages_for(self, policy_paths):
+        """Pacotes que o servidor carregou a partir destes policy.rego"""
+        loaded = {path: package for package, path in self.health()["policies"].items()}
+        packages = []
+        for path in policy_paths:
+            if os.path.abspath(path) not in loaded:
+                raise ServerError(f"{path} não foi carregado pelo servidor")
+            packages.append(loaded[os.path.abspath(path)])
+        return packages
+
+    def shutdown(self):
+        return self.request("POST", "/v1/shutdown", {})
+
+    def _evaluate_batch(self, batch, packages, rule):
+        started = time.perf_counter()
+        reply = self.request("POST", "/v1/evaluate", {"documents": batch, "packages": packages, "rule": rule})
+        self.latencies.append((len(batch), time.perf_counter() - started, reply.get("elapsed_ms")))
+        return reply["results"]
+
+    def evaluate(self, documents, packages=None, rule=DEFAULT_RULE):
+        """{pacote: [valores]} de cada documento, na ordem recebida
+
+        Os documentos seguem em lotes de batch_size, vários lotes ao mesmo
+        tempo (até pool_size). No servidor, a avaliação dos lotes concorrentes
+        divide o GIL: a concorrência esconde a latência da rede, não soma CPU.
+        """
+        batches = [[{"id": start + offset, "input": document}
+                    for offset, document in enumerate(documents[start:start + self.batch_size])]
+                   for start in range(0, len(documents), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.pool_size) as pool:
+            replies = list(pool.map(lambda batch: self._evaluate_batch(batch, packages, rule), batches))
+        return [result[rule] for reply in replies for result in reply]
+
+
+def start(host=DEFAULT_HOST, port=DEFAULT_PORT, policy_paths=None, wait=10.0):
+    """Sobe o servidor em segundo plano (ou reaproveita um já ativo); retorna o health"""
+    client = PolicyClient(f"http://{host}:{port}", pool_size=1)
+    with contextlib.suppress(OSError):
+        return client.health()
+    os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--host", host, "--port", str(port)]
+    command += policy_paths or []
+    with open(LOG_PATH, "ab") as log:
+        process = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL,
+                                   start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"o servidor terminou com código {process.returncode} (veja {LOG_PATH})")
+        with contextlib.suppress(OSError):
+            return client.health()
+        time.sleep(0.05)
+    raise RuntimeError(f"o servidor não respondeu em {wait:.0f}s (veja {LOG_PATH})")
+
+
+def print_latencies(latencies):
+    for documents, seconds, server_ms in latencies:
+        print(f"   ⏱️  lote de {documents} planos: {1000 * seconds:8.1f} ms no cliente, "
+              f"{server_ms:8.1f} ms no servidor")
+
+
+def print_metrics(metrics, totals=True):
+    for route, stats in sorted(metrics["routes"].items()):
+        print(f"{route:<16} {stats['requests']:>6} req  média {stats['mean_ms']:7.1f} ms  "
+              f"p50 {stats['p50_ms']:7.1f}  p95 {stats['p95_ms']:7.1f}  p99 {stats['p99_ms']:7.1f}")
+    if totals:
+        print(f"📄 {metrics['documents']} planos avaliados, {metrics['errors']} erros")
+
+
+def evaluate_plans(client, args):
+    """Avalia os planos do comando eval e imprime as violações; retorna o total"""
+    started = time.perf_counter()
+    packages = args.packages + client.packages_for(args.policy_paths) or None
+    documents = [load_plan(path) for path in args.plans]
+    results = client.evaluate(documents, packages, args.rule)
+    elapsed = time.perf_counter() - started
+    violations = 0
+    for path, found in zip(args.plans, results):
+        print(f"📋 {path}")
+        for package, values in found.items():
+            print(f"  {'❌' if values else '✅'} {package}: {len(values)} violações")
+            for value in values:
+                print(f"     - {value}")
+            violations += len(values)
+    print_latencies(client.latencies)
+    print("📋 Latência no cliente (ida e volta):")
+    print_metrics(client.observed.snapshot(), totals=False)
+    print(f"⏱️  {len(documents)} planos em {elapsed:.3f}s ({violations} violações)")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local de políticas e seu cliente")
+    parser.add_argument("--url", default=DEFAULT_URL, help=f"endereço do servidor (padrão: {DEFAULT_URL})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("serve", "start"):
+        command = commands.add_parser(name, help="sobe o servidor" + (" em segundo plano" if name == "start" else ""))
+        command.add_argument("policies", nargs="*", help="arquivos policy.rego (padrão: todos os exemplos)")
+        command.add_argument("--host", default=DEFAULT_HOST)
+        command.add_argument("--port", type=int, default=DEFAULT_PORT)
+        if name == "serve":
+            command.add_argument("--verbose", action="store_true", help="registra cada requisição")
+
+    evaluate = commands.add_parser("eval", help="avalia planos no servidor")
+    evaluate.add_argument("plans", nargs="+", help="arquivos tfplan.json")
+    evaluate.add_argument("--package", action="append", dest="packages", default=[],
+                          help="pacote avaliado (repetível; padrão: todos)")
+    evaluate.add_argument("--policy", action="append", dest="policy_paths", default=[],
+                          help="avalia o pacote deste policy.rego (repetível)")
+    evaluate.add_argument("--rule", default=DEFAULT_RULE)
+    evaluate.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    evaluate.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    evaluate.add_argument("--fail-defined", action="store_true",
+                          help="termina com código 1 se alguma regra produzir valores (como no opa eval)")
+
+    commands.add_parser("metrics", help="latências registradas pelo servidor")
+    commands.add_parser("stop", help="encerra o servidor")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(args.host, args.port, args.policies, quiet=not args.verbose)
+        return
+    if args.command == "start":
+        try:
+            health = start(args.host, args.port, args.policies)
+        except RuntimeError as exc:
+            print(f"❌ Servidor de políticas: {exc}")
+            sys.exit(EXIT_SERVER_ERROR)
+        print(f"✅ Servidor de políticas em http://{args.host}:{args.port} "
+              f"({len(health['packages'])} pacotes)")
+        return
+
+    with PolicyClient(args.url, getattr(args, "pool_size", 1), getattr(args, "batch_size", 1)) as client:
+        if args.command == "stop":
+            with contextlib.suppress(OSError):
+                client.shutdown()
+            print("✅ Servidor de políticas encerrado")
+            return
+        try:
+            if args.command == "metrics":
+                print_metrics(client.metrics())
+            else:
+                violations = evaluate_plans(client, args)
+                if args.fail_defined and violations:
+                    sys.exit(1)
+        except (ServerError, OSError) as exc:
+            print(f"❌ Servidor de políticas ({args.url}): {exc}")
+            sys.exit(EXIT_SERVER_ERROR)
+
+
+if __name__ == "__main__":
+    main()
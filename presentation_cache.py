@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Cache Incremental de Slides - DevSecOps Examples
+Reaproveita o XML e as imagens de slides cujas entradas não mudaram
+"""
+
+import functools
+import hashlib
+import inspect
+import io
+import json
+import os
+import shutil
+import types
+
+from lxml import etree
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml import parse_xml
+
+from presentation_media import add_svg_part, source_digest, track_dependencies
+
+# Diretório do cache de slides
+CACHE_DIR = os.path.join(".cache", "slides")
+
+# Incrementar quando o formato das entradas do cache mudar
+CACHE_VERSION = 1
+
+_REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+_R_EMBED = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed"
+
+
+def _is_local(obj):
+    """Indica se o objeto foi definido em um módulo deste repositório"""
+    module = inspect.getmodule(obj)
+    path = getattr(module, "__file__", None)
+    return bool(path) and os.path.abspath(path).startswith(_REPO_DIR)
+
+
+@functools.lru_cache(maxsize=None)
+def _source_of(func):
+    """Código-fonte da função (memorizado: inspect.getsource é caro)"""
+    return inspect.getsource(func)
+
+
+def _fingerprint(func, digest, seen):
+    """Acumula no digest o código da função e de tudo que ela referencia
+
+    Funções e constantes globais usadas pelo slide (ex.: set_text_format,
+    slide_image) entram na chave, então alterar um helper invalida apenas os
+    slides que dependem dele. Nomes com _ e dicts que não são constantes
+    (MAIÚSCULAS) ficam de fora: são estado do processo, não código.
+    """
+    if func in seen:
+        return
+    seen.add(func)
+    digest.update(func.__qualname__.encode())
+    digest.update(_source_of(func).encode())
+
+    for name in func.__code__.co_names:
+        if name not in func.__globals__:
+            continue
+        value = func.__globals__[name]
+        if isinstance(value, types.FunctionType) and _is_local(value):
+            _fingerprint(value, digest, seen)
+        elif name.startswith("_"):
+            # Estado privado do módulo (ex.: memo de digests) muda durante o build
+            continue
+        elif isinstance(value, (str, int, float, tuple, frozenset)) or (
+                isinstance(value, dict) and name.isupper()):
+            # Inclui constantes e tabelas de estilo (namedtuples têm repr estável)
+            digest.update(f"{name}={value!r}".encode())
+
+
+class SlideCache:
+    """Cache em disco de slides, indexado pela função que os constrói"""
+
+    def __init__(self, cache_dir=CACHE_DIR, read_only=False):
+        self.cache_dir = cache_dir
+        # Somente leitura: usado por workers em paralelo, que não gravam entradas
+        self.read_only = read_only
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+        if self.index.get("version") != CACHE_VERSION:
+            self.index = {"version": CACHE_VERSION, "slides": {}}
+
+    def _source_key(self, prs, builder):
+        digest = hashlib.sha256()
+        digest.update(f"{prs.slide_width}x{prs.slide_height}".encode())
+        _fingerprint(builder, digest, set())
+        return digest.hexdigest()
+
+    def build(self, prs, builder):
+        """Adiciona os slides de builder(prs), do cache quando possível"""
+        name = builder.__qualname__
+        source_key = self._source_key(prs, builder)
+        entry = self.index["slides"].get(name)
+
+        if entry and entry["source_key"] == source_key and all(
+                source_digest(path) == digest
+                for path, digest in entry["dependencies"].items()):
+            if self._restore(prs, entry):
+                self.hits += 1
+                return
+
+        self.misses += 1
+        first = len(prs.slides)
+        with track_dependencies() as dependencies:
+            builder(prs)
+        slides = list(prs.slides)[first:]
+        if self.read_only:
+            return
+
+        stored = self._store(prs, source_key, slides)
+        if stored is None:
+            self.index["slides"].pop(name, None)
+            return
+        stored["dependencies"] = dependencies
+        self.index["slides"][name] = stored
+
+    def save(self):
+        """Grava o índice do cache em disco"""
+        if self.read_only:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+        # Remove entradas que nenhum slide referencia mais
+        live = {entry["source_key"] for entry in self.index["slides"].values()}
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isdir(path) and name not in live:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _store(self, prs, source_key, slides):
+        """Serializa XML e imagens dos slides; None se não forem cacheáveis"""
+        layouts = list(prs.slide_layouts)
+        entry_dir = os.path.join(self.cache_dir, source_key)
+        records = []
+
+        for position, slide in enumerate(slides):
+            media = {}
+            for rel in slide.part.rels.values():
+                if rel.reltype == RT.SLIDE_LAYOUT:
+                    continue
+                if rel.is_external or rel.reltype != RT.IMAGE:
+                    # Gráficos e outros parts não são suportados: sempre reconstruir
+                    return None
+                media[rel.rId] = (rel.target_part.blob, rel.target_part.partname.ext)
+            records.append((position, slide, media))
+
+        os.makedirs(entry_dir, exist_ok=True)
+        stored_slides = []
+        for position, slide, media in records:
+            media_files = {}
+            for rId, (blob, ext) in media.items():
+                filename = f"{position}-{rId}.{ext}"
+                with open(os.path.join(entry_dir, filename), "wb") as f:
+                    f.write(blob)
+                media_files[rId] = filename
+
+            xml_file = f"{position}.xml"
+            with open(os.path.join(entry_dir, xml_file), "wb") as f:
+                f.write(etree.tostring(slide._element.cSld.spTree))
+
+            stored_slides.append({
+                "layout": layouts.index(slide.slide_layout),
+                "xml": xml_file,
+                "media": media_files,
+            })
+
+        return {"source_key": source_key, "slides": stored_slides}
+
+    def _restore(self, prs, entry):
+        """Recria os slides a partir do cache; False se a entrada estiver incompleta"""
+        entry_dir = os.path.join(self.cache_dir, entry["source_key"])
+        loaded = []
+        try:
+            for record in entry["slides"]:
+                with open(os.path.join(entry_dir, record["xml"]), "rb") as f:
+                    sp_tree = parse_xml(f.read())
+                media = {}
+                for rId, filename in record["media"].items():
+                    with open(os.path.join(entry_dir, filename), "rb") as f:
+                        media[rId] = (f.read(), os.path.splitext(filename)[1][1:])
+                loaded.append((record["layout"], sp_tree, media))
+        except FileNotFoundError:
+            return False
+
+        for layout, sp_tree, media in loaded:
+            slide = prs.slides.add_slide(prs.slide_layouts[layout])
+            # Troca o conteúdo (não o elemento) para manter válido o slide.shapes já criado
+            target = slide._element.cSld.spTree
+            for child in list(target):
+                target.remove(child)
+            target.extend(list(sp_tree))
+            sp_tree = target
+
+            new_ids = {}
+            for old_rId, (blob, ext) in media.items():
+                if ext == "svg":
+                    new_ids[old_rId] = add_svg_part(slide.part, blob)
+                else:
+                    _, new_ids[old_rId] = slide.part.get_or_add_image_part(io.BytesIO(blob))
+            for element in sp_tree.iter():
+                old_rId = element.get(_R_EMBED)
+                if old_rId in new_ids:
+                    element.set(_R_EMBED, new_ids[old_rId])
+        return True
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Diagramas da Apresentação - DevSecOps Examples
+Renderiza os diagramas dos slides em memória, direto dos create_*_diagram()
+
+Os slides não leem mais PNGs por caminho fixo: cada slide pede um diagrama
+pelo nome (OUTPUT_NAME do script) e DIAGRAM_MANIFEST liga esse nome ao
+builder Graphviz. O grafo é posicionado uma vez (render_diagrams.layout_once)
+e desenhado com pipe() em SVG e em PNG já na largura do quadro do slide; os
+bytes vão para o slide como stream, sem arquivo temporário. Os artefatos ficam
+no cache de renderização (.cache/renders), indexados pelo fonte DOT.
+
+Sem Graphviz instalado, é usado o nível mais próximo da pirâmide
+(<nome>.pyramid) ou o PNG já renderizado ao lado do script. Se nenhum
+existir, o slide recebe um quadro de aviso no lugar do diagrama.
+"""
+
+import io
+import os
+import shutil
+import time
+
+from pptx.dml.color import RGBColor
+from pptx.enum.dml import MSO_LINE_DASH_STYLE
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import MSO_ANCHOR
+from pptx.util import Inches
+
+from diagram_builders import DIAGRAM_ROOT, load_builder
+from diagram_cache import RenderCache, render_key
+from diagram_pyramid import PYRAMID_FORMAT, Pyramid
+from presentation_media import FALLBACK_DPI, TARGET_DPI, add_diagram_picture, link_svg, record_dependency
+from presentation_theme import apply_style
+from render_diagrams import DRAW_ENGINE, layout_once
+from tiled_raster import draw_png
+
+# Diagrama usado pelos slides: OUTPUT_NAME -> (script relativo a exemplos/, builder)
+DIAGRAM_MANIFEST = {
+    "iso-27017-backup-architecture": (
+        "5 - exemplos iso-27017 - iso-27018/iso-27017-backup/diagram.py", "create_backup_diagram"),
+    "iso-27017-criptografia-architecture": (
+        "5 - exemplos iso-27017 - iso-27018/iso-27017-criptografia/diagram.py", "create_encryption_diagram"),
+    "iso-27017-segregacao-architecture": (
+        "5 - exemplos iso-27017 - iso-27018/iso-27017-segregacao/diagram.py", "create_segregation_diagram"),
+    "iso-27018-auditoria-architecture": (
+        "5 - exemplos iso-27017 - iso-27018/iso-27018-auditoria/diagram.py", "create_audit_diagram"),
+    "iso-27018-esquecimento-architecture": (
+        "5 - exemplos iso-27017 - iso-27018/iso-27018-esquecimento/diagram.py", "create_erasure_diagram"),
+    "iso-27018-localizacao-architecture": (
+        "5 - exemplos iso-27017 - iso-27018/iso-27018-localizacao/diagram.py", "create_residency_diagram"),
+    "compliance-pipeline-architecture": (
+        "6 - pipeline compliance continuo/diagram.py", "create_compliance_pipeline_diagram"),
+}
+
+# Engines chamadas para posicionar (dot) e desenhar (neato -n2) os diagramas
+_REQUIRED_ENGINES = ("dot", DRAW_ENGINE)
+
+# Cores do quadro de aviso de diagrama ausente
+PLACEHOLDER_COLOR = RGBColor(0x99, 0x33, 0x00)
+PLACEHOLDER_FILL = RGBColor(0xFF, 0xF4, 0xE5)
+
+
+def graphviz_available():
+    """True se os executáveis do Graphviz estão no PATH"""
+    return all(shutil.which(engine) for engine in _REQUIRED_ENGINES)
+
+
+def _script_path(name):
+    try:
+        script, _ = DIAGRAM_MANIFEST[name]
+    except KeyError:
+        raise LookupError(f"diagrama {name!r} não está em DIAGRAM_MANIFEST") from None
+    return os.path.join(DIAGRAM_ROOT, script)
+
+
+def diagram_bytes(name, frame_width, dpi=FALLBACK_DPI, cache=None):
+    """Renderiza o diagrama do manifesto; retorna (png, svg) em bytes
+
+    frame_width é a largura do quadro em polegadas; o PNG (fallback do SVG)
+    sai com frame_width * dpi pixels. O script do diagrama e os DATA_FILES
+    dele (ex.: a telemetria do SLA) são registrados como dependências do
+    slide, então o cache de slides é invalidado quando algum deles muda.
+    """
+    script = _script_path(name)
+    record_dependency(script)
+    builder = load_builder(script, DIAGRAM_MANIFEST[name][1])
+    for path in builder.data_files:
+        record_dependency(path)
+    cache = cache or RenderCache()
+
+    dot = builder.func()
+    if builder.dpi:
+        dot.attr(dpi=builder.dpi)
+    target_width = int(round(frame_width * dpi))
+    keys = {"svg": render_key(dot, "svg"), "png": render_key(dot, f"png@{target_width}px")}
+    blobs = {fmt: cache.load(key) for fmt, key in keys.items()}
+    if None not in blobs.values():
+        return blobs["png"], blobs["svg"]
+
+    started = time.perf_counter()
+    positioned, degraded = layout_once(dot)
+    blobs = {"svg": positioned.pipe(format="svg", neato_no_op=2),
+             "png": draw_png(positioned.source, target_width)}
+    seconds = time.perf_counter() - started
+    # Layout que caiu para um nível mais agregado por tempo não vale para as próximas builds
+    if not degraded:
+        for fmt, key in keys.items():
+            cache.save(key, blobs[fmt], seconds / len(keys))
+    print(f"🖼️  {name}: renderizado em memória em {seconds:.2f}s")
+    return blobs["png"], blobs["svg"]
+
+
+def add_diagram_placeholder(slide, name, left, top, width, note=None):
+    """Quadro tracejado de aviso no lugar de um diagrama ausente
+
+    A altura vai até 0,5" da base do slide, no máximo 3/4 da largura.
+    note é acrescentado ao aviso (ex.: o conteúdo alternativo do slide).
+    """
+    slide_height = slide.part.package.presentation_part.presentation.slide_height
+    height = min(int(width * 3 / 4), slide_height - top - Inches(0.5))
+    frame = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, width, height)
+    frame.fill.solid()
+    frame.fill.fore_color.rgb = PLACEHOLDER_FILL
+    frame.line.color.rgb = PLACEHOLDER_COLOR
+    frame.line.dash_style = MSO_LINE_DASH_STYLE.DASH
+    text_frame = frame.text_frame
+    text_frame.word_wrap = True
+    if note:
+        text_frame.vertical_anchor = MSO_ANCHOR.TOP
+    text = f"⚠️ Diagrama indisponível: {name}\n(gere com: python render_diagrams.py)"
+    text_frame.text = f"{text}\n\n{note}" if note else text
+    apply_style(text_frame, "body_compact", color=PLACEHOLDER_COLOR)
+    return frame
+
+
+def add_diagram(slide, name, left, top, width, note=None):
+    """Adiciona ao slide o diagrama do manifesto, construído sob demanda
+
+    Sem Graphviz, usa o que render_diagrams.py gravou ao lado do script: o
+    nível da pirâmide mais próximo do quadro ou o PNG (e o SVG, se houver).
+    Se nenhum dos caminhos estiver disponível, o slide recebe o quadro de
+    add_diagram_placeholder (com note) e um aviso é impresso; as dependências
+    ficam registradas, então o slide é refeito quando o diagrama existir.
+    """
+    try:
+        return _add_diagram(slide, name, left, top, width)
+    except FileNotFoundError as exc:
+        graphviz = "" if graphviz_available() else "Graphviz não instalado, "
+        print(f"⚠️  {name}: {graphviz}{os.path.relpath(exc.filename or exc.args[0])} ausente, quadro de aviso no slide")
+        return add_diagram_placeholder(slide, name, left, top, width, note)
+
+
+def _add_diagram(slide, name, left, top, width):
+    if not graphviz_available():
+        basename = os.path.join(os.path.dirname(_script_path(name)), name)
+        if record_dependency(f"{basename}.{PYRAMID_FORMAT}") is not None:
+            pyramid = Pyramid(f"{basename}.{PYRAMID_FORMAT}")
+            level = pyramid.closest(int(round(width.inches * TARGET_DPI)))
+            picture = slide.shapes.add_picture(io.BytesIO(pyramid.read(level)), left, top, width=width)
+            if record_dependency(f"{basename}.svg") is not None:
+                with open(f"{basename}.svg", "rb") as f:
+                    link_svg(picture, slide, f.read())
+            return picture
+        return add_diagram_picture(slide, f"{basename}.png", left, top, width)
+
+    png, svg = diagram_bytes(name, width.inches)
+    picture = slide.shapes.add_picture(io.BytesIO(png), left, top, width=width)
+    link_svg(picture, slide, svg)
+    return picture
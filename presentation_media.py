@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+Mídia da Apresentação - DevSecOps Examples
+Gera derivados dos diagramas em resolução de slide, com cache por conteúdo,
+e embute as versões vetoriais (SVG) quando disponíveis
+"""
+
+import contextlib
+import hashlib
+import io
+import os
+import warnings
+import zlib
+
+from lxml import etree
+import PIL
+from PIL import Image
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.opc.package import Part
+
+# Diretório do cache de derivados (chave = hash do PNG de origem + geometria)
+CACHE_DIR = os.path.join(".cache", "slide-images")
+
+# Resolução alvo dos derivados: suficiente para projeção e telas HiDPI
+TARGET_DPI = 200
+
+# Resolução do PNG de fallback quando o slide embute a versão SVG
+FALLBACK_DPI = 96
+
+# Tamanho máximo do cache em disco antes de remover os derivados menos usados
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Orçamento de memória de pixels por imagem decodificada. Substitui o antigo
+# Image.MAX_IMAGE_PIXELS = None global: imagens enormes são lidas em faixas
+IMAGE_MEMORY_BUDGET = int(os.environ.get("PRESENTATION_IMAGE_BUDGET_MB", "256")) * 1024 * 1024
+
+# Modos PNG de 8 bits cujas linhas podem ser decodificadas em faixas
+_BANDED_MODES = ("L", "LA", "RGB", "RGBA")
+
+# Resultado da verificação do decodificador em faixas com o Pillow instalado
+_banded_supported = None
+
+# Extensão do Office 2016+ que associa um SVG ao blip raster de fallback
+SVG_CONTENT_TYPE = "image/svg+xml"
+_SVG_EXT_URI = "{96DAC541-7B7A-43D3-8B79-37D633B846F1}"
+_NS_A = "http://schemas.openxmlformats.org/drawingml/2006/main"
+_NS_ASVG = "http://schemas.microsoft.com/office/drawing/2016/SVG/main"
+_NS_R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Digests já calculados neste processo: {(caminho, mtime_ns, tamanho): sha256}
+_digests = {}
+
+# Registros ativos de dependências (arquivos de origem lidos por cada slide)
+_dependency_logs = []
+
+
+def _file_digest(path):
+    """Calcula SHA-256 do conteúdo do arquivo"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextlib.contextmanager
+def track_dependencies():
+    """Registra {caminho: sha256} de cada imagem de origem lida no bloco
+
+    Imagens ausentes são registradas com digest None, para que o cache de
+    slides detecte quando elas passarem a existir.
+    """
+    log = {}
+    _dependency_logs.append(log)
+    try:
+        yield log
+    finally:
+        _dependency_logs.remove(log)
+
+
+def _record_dependency(path, digest):
+    for log in _dependency_logs:
+        log[path] = digest
+
+
+def record_dependency(path):
+    """Registra um arquivo de entrada do slide atual e retorna seu digest (ou None)"""
+    digest = source_digest(path)
+    _record_dependency(path, digest)
+    return digest
+
+
+def source_digest(path):
+    """Retorna o SHA-256 do arquivo, ou None se ele não existir
+
+    O resultado é memorizado por (caminho, mtime, tamanho) dentro do processo,
+    então builds repetidos (ex.: variantes em lote) não relêem as imagens.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key not in _digests:
+        _digests[key] = _file_digest(path)
+    return _digests[key]
+
+
+class ImageBudgetError(Exception):
+    """A imagem não pode ser decodificada dentro do orçamento de memória"""
+
+
+def _pixel_bytes(mode, width, height):
+    """Memória ocupada pelo Pillow para uma imagem (RGB usa 4 bytes/pixel)"""
+    per_pixel = 1 if mode in ("1", "L", "P") else 4
+    return per_pixel * width * height
+
+
+def open_unchecked(path):
+    """Abre a imagem sem o guarda global de decompression bomb
+
+    Apenas o cabeçalho é lido aqui; o limite real é o orçamento aplicado por
+    load_image antes de qualquer decodificação.
+    """
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+            return Image.open(path)
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def _banded_png(img):
+    """PNG de 8 bits, não entrelaçado e em um único bloco IDAT lógico"""
+    return (img.format == "PNG" and not img.info.get("interlace")
+            and len(img.tile) == 1 and img.tile[0].args == img.mode
+            and img.mode in _BANDED_MODES)
+
+
+def banded_decoding_supported():
+    """Verifica se _decode_bands funciona com o Pillow instalado
+
+    O decodificador em faixas usa detalhes internos do Pillow (verificado no
+    12.3): PngImageFile.__prepare_idat, load_read, Image._getdecoder e
+    Image.Image()._new. Na primeira chamada, um PNG pequeno é decodificado em
+    faixas e comparado com reduce() da imagem completa; o resultado é
+    memorizado no processo.
+    """
+    global _banded_supported
+    if _banded_supported is None:
+        sample = Image.new("RGB", (37, 29))
+        sample.putdata([(x * 7 % 256, y * 13 % 256, x * y % 256) for y in range(29) for x in range(37)])
+        buffer = io.BytesIO()
+        sample.save(buffer, format="PNG")
+        expected = sample.reduce(2).tobytes()
+        try:
+            with Image.open(buffer) as img:
+                decoded, _ = _decode_bands(img, 2, None, band_rows=4)
+            _banded_supported = decoded.tobytes() == expected
+        except Exception:
+            _banded_supported = False
+        if not _banded_supported:
+            print(f"⚠️  Leitura de PNG em faixas indisponível no Pillow {PIL.__version__}")
+    return _banded_supported
+
+
+def _decode_bands(img, factor, budget, band_rows=None):
+    """Decodifica um PNG não entrelaçado em faixas de linhas, reduzindo cada uma
+
+    O fluxo zlib é inflado incrementalmente; cada faixa é desfiltrada pelo
+    decodificador do Pillow precedida da última linha da faixa anterior (com
+    filtro None), o que preserva os filtros Up/Average/Paeth entre faixas.
+    O resultado é idêntico a img.reduce(factor) sobre a imagem completa.
+    Retorna (imagem, pico estimado em bytes); band_rows fixa a altura das
+    faixas em vez de derivá-la do orçamento.
+    """
+    width, height = img.size
+    tile = img.tile[0]
+    stride = width * len(img.getbands())
+    out_size = ((width + factor - 1) // factor, (height + factor - 1) // factor)
+    out_bytes = _pixel_bytes(img.mode, *out_size)
+
+    # Por linha: bytes filtrados pendentes, cópia zlib e a faixa decodificada
+    row_bytes = 2 * (stride + 1) + _pixel_bytes(img.mode, width, 1)
+    if band_rows is None:
+        available = budget - out_bytes - 2 * row_bytes
+        band_rows = (available // row_bytes) // factor * factor
+    if band_rows < factor:
+        raise ImageBudgetError(
+            f"{img.filename}: orçamento de {budget} bytes insuficiente para decodificar em faixas")
+
+    out = Image.new(img.mode, out_size)
+    peak = out_bytes
+    inflater = zlib.decompressobj()
+    pending = bytearray()
+    compressed = b""
+    previous = None
+
+    # Mesmo preparo de PngImageFile.load_prepare, sem alocar a imagem inteira
+    img._PngImageFile__idat = img._PngImageFile__prepare_idat
+    img.fp.seek(tile.offset)
+
+    y = 0
+    while y < height:
+        rows = min(band_rows, height - y)
+        needed = rows * (stride + 1)
+        while len(pending) < needed:
+            if not compressed:
+                compressed = img.load_read(1 << 16)
+                if not compressed:
+                    raise OSError(f"{img.filename}: dados PNG truncados")
+            # max_length limita a saída ao que a faixa precisa
+            pending += inflater.decompress(compressed, needed - len(pending))
+            compressed = inflater.unconsumed_tail
+
+        raw = bytes(pending[:needed])
+        del pending[:needed]
+        carry = 0
+        if previous is not None:
+            raw = b"\x00" + previous + raw
+            carry = 1
+
+        band = Image.core.new(img.mode, (width, rows + carry))
+        decoder = Image._getdecoder(img.mode, "zip", tile.args)
+        decoder.setimage(band, (0, 0, width, rows + carry))
+        packed = zlib.compress(raw, 0)
+        decoder.decode(packed)
+        peak = max(peak, out_bytes + len(raw) + len(packed) + len(pending)
+                   + _pixel_bytes(img.mode, width, rows + carry))
+        del raw, packed
+
+        band = Image.Image()._new(band)
+        previous = band.crop((0, rows + carry - 1, width, rows + carry)).tobytes()
+        if carry:
+            band = band.crop((0, 1, width, rows + 1))
+        out.paste(band.reduce(factor) if factor > 1 else band, (0, y // factor))
+        y += rows
+
+    return out, peak
+
+
+def load_image(path, target_width=None, budget=IMAGE_MEMORY_BUDGET):
+    """Carrega uma imagem respeitando o orçamento de memória de pixels
+
+    Com target_width, a imagem é reduzida por um fator inteiro (draft para
+    JPEG, reduce para os demais) até a menor largura >= target_width. Se a
+    decodificação completa não couber no orçamento, PNGs são lidos em faixas
+    (se o Pillow instalado suportar; senão ImageBudgetError). Retorna
+    (imagem, estatísticas); peak_estimate_bytes é calculado pelo tamanho dos
+    buffers de pixels, não medido.
+    """
+    img = open_unchecked(path)
+    width, height = img.size
+    factor = max(1, width // target_width) if target_width else 1
+    full_bytes = _pixel_bytes(img.mode, width, height)
+    stats = {"path": path, "source_size": img.size, "factor": factor}
+
+    try:
+        if img.format == "JPEG" and factor > 1:
+            img.draft(img.mode, (width // factor, height // factor))
+            full_bytes = _pixel_bytes(img.mode, *img.size)
+            factor = max(1, img.width // target_width)
+
+        if full_bytes + _pixel_bytes(img.mode, width // factor, height // factor) <= budget:
+            img.load()
+            result = img.reduce(factor) if factor > 1 else img.copy()
+            stats.update(method="full",
+                         peak_estimate_bytes=full_bytes + _pixel_bytes(result.mode, *result.size))
+        elif _banded_png(img) and not banded_decoding_supported():
+            raise ImageBudgetError(
+                f"{path}: {full_bytes} bytes decodificados excedem o orçamento de {budget} bytes "
+                f"e a leitura em faixas não funciona com o Pillow {PIL.__version__} "
+                f"(aumente PRESENTATION_IMAGE_BUDGET_MB)")
+        elif _banded_png(img):
+            result, peak = _decode_bands(img, factor, budget)
+            stats.update(method="bands", peak_estimate_bytes=peak)
+        else:
+            raise ImageBudgetError(
+                f"{path}: {full_bytes} bytes decodificados excedem o orçamento de {budget} bytes")
+    finally:
+        img.close()
+
+    stats["size"] = result.size
+    return result, stats
+
+
+def _evict(cache_dir, max_bytes):
+    """Remove os derivados menos recentemente usados até caber no limite"""
+    entries = []
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.endswith(".png") and os.path.isfile(path):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def slide_image(img_path, frame_width, dpi=TARGET_DPI, cache_dir=CACHE_DIR,
+                max_bytes=CACHE_MAX_BYTES):
+    """Retorna o caminho de um derivado do PNG dimensionado para o quadro do slide
+
+    frame_width é a largura do quadro em polegadas (ex.: 4.5 ou 9). O derivado
+    é gerado uma única vez por conteúdo de origem; execuções seguintes reutilizam
+    o arquivo em cache. Levanta FileNotFoundError se a imagem não existir e
+    ImageBudgetError se ela não puder ser lida dentro de IMAGE_MEMORY_BUDGET.
+    """
+    digest = record_dependency(img_path)
+    if digest is None:
+        raise FileNotFoundError(img_path)
+
+    target_width = int(round(frame_width * dpi))
+    key = hashlib.sha256(
+        f"{digest}:{target_width}".encode()).hexdigest()[:32]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    cached_path = os.path.join(cache_dir, f"{key}.png")
+
+    if os.path.exists(cached_path):
+        # Atualiza mtime para a política de remoção (menos recentemente usado)
+        os.utime(cached_path)
+        return cached_path
+
+    img, stats = load_image(img_path, target_width)
+    if img.width > target_width:
+        target_height = max(1, round(img.height * target_width / img.width))
+        img.thumbnail((target_width, target_height), Image.LANCZOS)
+    tmp_path = f"{cached_path}.{os.getpid()}.tmp"
+    img.save(tmp_path, format="PNG", optimize=True, dpi=(dpi, dpi))
+    print(f"🖼️  {os.path.basename(img_path)}: {stats['source_size'][0]}x{stats['source_size'][1]} "
+          f"→ {img.width}x{img.height} ({stats['method']}, pico estimado {stats['peak_estimate_bytes'] / 2**20:.1f} MB)")
+
+    os.replace(tmp_path, cached_path)
+    _evict(cache_dir, max_bytes)
+    return cached_path
+
+
+def add_svg_part(slide_part, blob):
+    """Relaciona um SVG ao slide, reaproveitando um part idêntico; retorna o rId"""
+    package = slide_part.package
+    for part in package.iter_parts():
+        if part.content_type == SVG_CONTENT_TYPE and part.blob == blob:
+            break
+    else:
+        partname = package.next_image_partname("svg")
+        part = Part(partname, SVG_CONTENT_TYPE, package, blob)
+    return slide_part.relate_to(part, RT.IMAGE)
+
+
+def add_diagram_picture(slide, img_path, left, top, width):
+    """Adiciona um diagrama ao slide, vetorial quando houver SVG ao lado do PNG
+
+    O PNG em resolução de slide (slide_image) é sempre embutido como fallback
+    para visualizadores sem suporte a SVG; se existir <nome>.svg, ele é ligado
+    ao mesmo blip pela extensão asvg:svgBlip e passa a ser o que o PowerPoint
+    renderiza, e o fallback cai para FALLBACK_DPI. Levanta FileNotFoundError se o PNG não existir.
+    """
+    svg_path = os.path.splitext(img_path)[0] + ".svg"
+    digest = record_dependency(svg_path)
+
+    dpi = TARGET_DPI if digest is None else FALLBACK_DPI
+    picture = slide.shapes.add_picture(slide_image(img_path, width.inches, dpi=dpi),
+                                       left, top, width=width)
+    if digest is None:
+        return picture
+
+    with open(svg_path, "rb") as f:
+        link_svg(picture, slide, f.read())
+    return picture
+
+
+def link_svg(picture, slide, blob):
+    """Liga um SVG ao blip raster da imagem (extensão asvg:svgBlip)"""
+    rId = add_svg_part(slide.part, blob)
+    blip = picture._element.find(f".//{{{_NS_A}}}blip")
+    ext_lst = etree.SubElement(blip, f"{{{_NS_A}}}extLst")
+    ext = etree.SubElement(ext_lst, f"{{{_NS_A}}}ext", uri=_SVG_EXT_URI)
+    svg_blip = etree.SubElement(ext, f"{{{_NS_ASVG}}}svgBlip", nsmap={"asvg": _NS_ASVG})
+    svg_blip.set(f"{{{_NS_R}}}embed", rId)
+    return picture
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tema da Apresentação - DevSecOps Examples
+Fonte e estilos de texto definidos uma vez, herdados pelos slides
+
+A fonte vai para o font scheme do tema. Cada classe de estilo (STYLES)
+vira um placeholder de corpo no layout Blank, com a formatação no
+a:lstStyle do layout; as caixas de texto dos slides são placeholders
+ligados a ele pelo idx e gravam só posição e texto. Caixas de texto
+comuns não herdam estilos nomeados (o master tem um único otherStyle),
+por isso os placeholders.
+"""
+
+import collections
+
+from lxml import etree
+from pptx.dml.color import RGBColor
+from pptx.enum.text import PP_ALIGN
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.ns import qn
+from pptx.util import Inches
+
+# Fonte do deck, gravada no font scheme do tema (títulos e corpo)
+FONT_NAME = "Arial"
+
+# Paleta por seção
+NAVY = RGBColor(0, 51, 102)
+ISO27017_COLOR = RGBColor(0, 102, 51)
+ISO27018_COLOR = RGBColor(102, 0, 153)
+PIPELINE_COLOR = RGBColor(204, 51, 0)
+DARK_GRAY = RGBColor(64, 64, 64)
+GRAY = RGBColor(128, 128, 128)
+
+TextStyle = collections.namedtuple(
+    "TextStyle", ["size", "bold", "color", "align", "space_after"],
+    defaults=(False, None, None, None))
+
+# Classes de estilo usadas pelos slides
+STYLES = {
+    "cover_title": TextStyle(44, bold=True, color=NAVY, align=PP_ALIGN.CENTER),
+    "cover_subtitle": TextStyle(28, color=DARK_GRAY, align=PP_ALIGN.CENTER),
+    "cover_footer": TextStyle(16, color=GRAY, align=PP_ALIGN.CENTER),
+    "heading": TextStyle(32, bold=True),
+    "title": TextStyle(28, bold=True),
+    "title_large": TextStyle(30, bold=True),
+    "body": TextStyle(20, space_after=8),
+    "body_spaced": TextStyle(20, space_after=10),
+    "body_compact": TextStyle(16, space_after=6),
+}
+
+# Layout usado pelos slides do deck (Blank do template padrão)
+STYLE_LAYOUT = 6
+
+# idx do placeholder da primeira classe de estilo (os do template vão até 12)
+STYLE_IDX_BASE = 100
+
+_ALIGN = {PP_ALIGN.LEFT: "l", PP_ALIGN.CENTER: "ctr", PP_ALIGN.RIGHT: "r", PP_ALIGN.JUSTIFY: "just"}
+
+
+def apply_theme(prs):
+    """Define a fonte do deck no tema e as classes de estilo no layout dos slides
+
+    Todo texto sem fonte explícita herda o font scheme, então os slides não
+    precisam repetir o nome da fonte em cada run.
+    """
+    theme_part = prs.slide_master.part.part_related_by(RT.THEME)
+    theme = etree.fromstring(theme_part.blob)
+    for font in ("majorFont", "minorFont"):
+        latin = theme.find(f".//{qn('a:fontScheme')}/{qn('a:' + font)}/{qn('a:latin')}")
+        latin.set("typeface", FONT_NAME)
+    theme_part._blob = etree.tostring(theme, xml_declaration=True, encoding="UTF-8", standalone=True)
+    install_styles(prs.slide_layouts[STYLE_LAYOUT], prs.slide_width)
+
+
+def style_idx(name):
+    """idx do placeholder da classe de estilo no layout"""
+    return STYLE_IDX_BASE + list(STYLES).index(name)
+
+
+def _style_ppr(style, inherited=True):
+    """a:lvl1pPr da classe de estilo
+
+    Os placeholders herdam o bodyStyle do master (marcadores, recuo e
+    espaço antes de 20%): inherited=True anula esses valores.
+    """
+    ppr = etree.Element(qn("a:lvl1pPr"))
+    if inherited:
+        ppr.set("marL", "0")
+        ppr.set("indent", "0")
+    if style.align is not None:
+        ppr.set("algn", _ALIGN[style.align])
+    if inherited:
+        spc_bef = etree.SubElement(ppr, qn("a:spcBef"))
+        etree.SubElement(spc_bef, qn("a:spcPts"), val="0")
+    if style.space_after is not None:
+        spc_aft = etree.SubElement(ppr, qn("a:spcAft"))
+        etree.SubElement(spc_aft, qn("a:spcPts"), val=str(style.space_after * 100))
+    if inherited:
+        etree.SubElement(ppr, qn("a:buNone"))
+
+    rpr = etree.SubElement(ppr, qn("a:defRPr"), sz=str(style.size * 100))
+    if style.bold:
+        rpr.set("b", "1")
+    if style.color is not None:
+        fill = etree.SubElement(rpr, qn("a:solidFill"))
+        etree.SubElement(fill, qn("a:srgbClr"), val=str(style.color))
+    return ppr
+
+
+def install_styles(layout, slide_width):
+    """Grava cada classe de STYLES como placeholder de corpo no layout (idempotente)"""
+    sp_tree = layout.shapes._spTree
+    for shape in list(layout.placeholders):
+        if shape.placeholder_format.idx >= STYLE_IDX_BASE:
+            sp_tree.remove(shape.element)
+    next_id = max(int(element.get("id")) for element in sp_tree.iter(qn("p:cNvPr"))) + 1
+    for position, (name, style) in enumerate(STYLES.items()):
+        sp = etree.SubElement(sp_tree, qn("p:sp"))
+        nv_sp_pr = etree.SubElement(sp, qn("p:nvSpPr"))
+        etree.SubElement(nv_sp_pr, qn("p:cNvPr"), id=str(next_id + position), name=f"Estilo {name}")
+        locks = etree.SubElement(etree.SubElement(nv_sp_pr, qn("p:cNvSpPr")), qn("a:spLocks"))
+        locks.set("noGrp", "1")
+        etree.SubElement(etree.SubElement(nv_sp_pr, qn("p:nvPr")), qn("p:ph"),
+                         type="body", sz="quarter", idx=str(style_idx(name)))
+        xfrm = etree.SubElement(etree.SubElement(sp, qn("p:spPr")), qn("a:xfrm"))
+        etree.SubElement(xfrm, qn("a:off"), x="0", y="0")
+        etree.SubElement(xfrm, qn("a:ext"), cx=str(slide_width), cy=str(Inches(1)))
+        tx_body = etree.SubElement(sp, qn("p:txBody"))
+        # Como uma caixa de texto: sem quebra de linha e ajustada ao texto
+        body_pr = etree.SubElement(tx_body, qn("a:bodyPr"), wrap="none")
+        etree.SubElement(body_pr, qn("a:spAutoFit"))
+        etree.SubElement(tx_body, qn("a:lstStyle")).append(_style_ppr(style))
+        run = etree.SubElement(etree.SubElement(tx_body, qn("a:p")), qn("a:r"))
+        etree.SubElement(run, qn("a:t")).text = name
+
+
+def add_blank_slide(prs):
+    """Novo slide no layout dos estilos, sem cópias vazias dos placeholders de estilo"""
+    slide = prs.slides.add_slide(prs.slide_layouts[STYLE_LAYOUT])
+    for shape in list(slide.placeholders):
+        if shape.placeholder_format.idx >= STYLE_IDX_BASE:
+            shape.element.getparent().remove(shape.element)
+    return slide
+
+
+def apply_style(text_frame, style, color=None):
+    """Grava uma classe de estilo no a:lstStyle de um text frame avulso
+
+    Para texto fora dos placeholders de estilo (ex.: estilos ad hoc de
+    set_text_format); todos os parágrafos e runs herdam do nível 1.
+    """
+    if isinstance(style, str):
+        style = STYLES[style]
+    if color is not None:
+        style = style._replace(color=color)
+    _set_lst_style(text_frame, _style_ppr(style, inherited=False))
+
+
+def _set_lst_style(text_frame, ppr):
+    tx_body = text_frame._txBody
+    lst_style = tx_body.find(qn("a:lstStyle"))
+    if lst_style is None:
+        lst_style = etree.Element(qn("a:lstStyle"))
+        tx_body.find(qn("a:bodyPr")).addnext(lst_style)
+    for child in list(lst_style):
+        lst_style.remove(child)
+    lst_style.append(ppr)
+
+
+def add_text(slide, left, top, width, height, text, style, color=None, word_wrap=None):
+    """Adiciona uma caixa de texto da classe de estilo indicada
+
+    A caixa é um placeholder ligado ao da classe no layout: o slide grava só
+    posição, tamanho e texto. color sobrescreve apenas a cor da classe (cores
+    de seção nos títulos).
+    """
+    layout_placeholder = slide.slide_layout.placeholders.get(idx=style_idx(style))
+    if layout_placeholder is None:
+        raise ValueError(f"layout sem o estilo {style!r}: chame apply_theme(prs) e use add_blank_slide")
+    slide.shapes.clone_placeholder(layout_placeholder)
+    box = slide.shapes[-1]
+    box.left, box.top, box.width, box.height = left, top, width, height
+    text_frame = box.text_frame
+    if word_wrap is not None:
+        text_frame.word_wrap = word_wrap
+    text_frame.text = text
+    if color is not None:
+        override = etree.Element(qn("a:lvl1pPr"))
+        fill = etree.SubElement(etree.SubElement(override, qn("a:defRPr")), qn("a:solidFill"))
+        etree.SubElement(fill, qn("a:srgbClr"), val=str(color))
+        _set_lst_style(text_frame, override)
+    return box
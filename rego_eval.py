@@ -0,0 +1,1188 @@
+#!/usr/bin/env python3
+"""
+Avaliador de Políticas Rego - DevSecOps Examples
+Avalia os policy.rego dos exemplos ISO 27017/27018 em processo, sem o OPA
+
+Uso:
+    terraform show -json tfplan.binary > tfplan.json
+    python rego_eval.py tfplan.json                         # as seis políticas
+    python rego_eval.py tfplan.json policy.rego --fail-defined
+    terraform show -json tfplan.binary | python rego_eval.py -
+    python rego_eval.py --conformance                       # compara com `opa eval`
+
+A pipeline chamava `opa eval -i tfplan.json -d policy.rego` uma vez por
+exemplo, pagando a cada chamada o início do processo, a compilação da
+política e a leitura do JSON. Aqui cada policy.rego é compilado uma vez em
+closures Python e o plano é lido uma vez para todas.
+
+Subconjunto suportado (o que as políticas usam): package, regras de conjunto
+(deny[msg] { ... }), regras booleanas e funções auxiliares (várias
+definições = ou), :=, =, ==, !=, <, <=, >, >=, not, referências com [_],
+to_number, contains, sprintf, count, startswith e endswith. O resto
+(some, every, with, else, compreensões, import) gera RegoError.
+
+Varreduras de input.resource_changes[_] seguidas de `x.type == "T"` usam o
+PlanIndex (plan_index.py): por tipo, por tag ou, em junções como
+`selection.change.after.plan_id == plan.change.after.id`, por referência.
+As comparações originais continuam sendo avaliadas sobre cada candidato.
+
+O plano é lido em uma única passada (terraform_plan.py, com projeção em
+type, name e change.after): definições deny que olham um recurso por vez
+são avaliadas à medida que os itens chegam e os itens são descartados; só
+os tipos lidos por junções (has_backup_selection, has_encryption, ...)
+ficam em memória até o fim do arquivo.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from plan_index import REFERENCE_ATTRIBUTES, PlanIndex, reference_key, synthetic_plan
+from terraform_plan import RESOURCE_PROJECTION, iter_plan
+
+# Pasta com um policy.rego por exemplo ISO 27017/27018
+POLICY_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exemplos",
+                           "5 - exemplos iso-27017 - iso-27018")
+
+# Regra avaliada por padrão (a mesma consultada na pipeline)
+DEFAULT_RULE = "deny"
+
+_TOKEN = re.compile(r"""
+    (?P<newline>\n) | (?P<space>[ \t\r]+) | (?P<comment>\#[^\n]*)
+  | (?P<string>"(?:[^"\\\n]|\\.)*") | (?P<raw>`[^`]*`)
+  | (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<op>:=|==|!=|<=|>=|[<>=\[\](){}.,;:])
+""", re.X)
+
+# Strings aceitas por to_number
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+_UNSUPPORTED = {"import", "some", "every", "with", "else", "default", "in", "if"}
+
+_COMPARISONS = {
+    "==": lambda a, b: _equal(a, b),
+    "!=": lambda a, b: not _equal(a, b),
+    "<": lambda a, b: _compare(a, b) < 0,
+    "<=": lambda a, b: _compare(a, b) <= 0,
+    ">": lambda a, b: _compare(a, b) > 0,
+    ">=": lambda a, b: _compare(a, b) >= 0,
+}
+
+
+class RegoError(ValueError):
+    """Política fora do subconjunto suportado ou inválida"""
+
+
+class _Undefined(Exception):
+    """Erro de builtin: no OPA a expressão fica indefinida"""
+
+
+def _type_rank(value):
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, str):
+        return 3
+    if isinstance(value, list):
+        return 4
+    return 5
+
+
+def _equal(a, b):
+    """Igualdade do Rego: tipos diferentes nunca são iguais (true != 1), 1 == 1.0"""
+    if _type_rank(a) != _type_rank(b):
+        return False
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_equal(a[key], b[key]) for key in a)
+    return a == b
+
+
+def _compare(a, b):
+    """Ordem total do Rego: null < booleanos < números < strings < arrays < objetos"""
+    ranks = _type_rank(a), _type_rank(b)
+    if ranks[0] != ranks[1]:
+        return -1 if ranks[0] < ranks[1] else 1
+    if isinstance(a, list):
+        for x, y in zip(a, b):
+            order = _compare(x, y)
+            if order:
+                return order
+        return (len(a) > len(b)) - (len(a) < len(b))
+    if isinstance(a, dict):
+        return _compare(sorted(a.items()), sorted(b.items()))
+    return (a > b) - (a < b)
+
+
+def _format_value(value):
+    """Valor no sprintf (%s/%v): strings cruas, demais em JSON"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _sprintf(fmt, args):
+    if not isinstance(fmt, str) or not isinstance(args, list):
+        raise _Undefined
+    values = iter(args)
+
+    def substitute(match):
+        verb = match.group(1)
+        if verb == "%":
+            return "%"
+        value = next(values, None)
+        if verb == "d" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(int(value))
+        return _format_value(value)
+    return re.sub(r"%([svd%])", substitute, fmt)
+
+
+def _to_number(value):
+    if isinstance(value, bool):
+        return int(value)
+    if value is None:
+        return 0
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str) and _NUMBER.fullmatch(value):
+        number = float(value)
+        return int(number) if number.is_integer() and not re.search(r"[.eE]", value) else number
+    raise _Undefined
+
+
+def _strings(*values):
+    if not all(isinstance(value, str) for value in values):
+        raise _Undefined
+    return values
+
+
+def _contains(s, sub):
+    s, sub = _strings(s, sub)
+    return sub in s
+
+
+def _startswith(s, prefix):
+    s, prefix = _strings(s, prefix)
+    return s.startswith(prefix)
+
+
+def _endswith(s, suffix):
+    s, suffix = _strings(s, suffix)
+    return s.endswith(suffix)
+
+
+def _count(value):
+    if isinstance(value, (list, dict, str)):
+        return len(value)
+    raise _Undefined
+
+
+BUILTINS = {
+    "to_number": _to_number,
+    "contains": _contains,
+    "startswith": _startswith,
+    "endswith": _endswith,
+    "sprintf": _sprintf,
+    "count": _count,
+}
+
+
+# ---------------------------------------------------------------------------
+# Análise sintática: tuplas simples como AST
+#   ("var", nome) ("const", valor) ("array", [termos]) ("call", nome, [termos])
+#   ("ref", termo, [("field", nome) | ("index", termo) | ("any",)])
+#   instruções: ("expr", t) ("not", instr) ("assign", var, t) ("cmp", op, t, t)
+# ---------------------------------------------------------------------------
+
+def _tokenize(source):
+    tokens = []
+    depth = 0
+    pos = 0
+    line = 1
+    while pos < len(source):
+        match = _TOKEN.match(source, pos)
+        if not match:
+            raise RegoError(f"linha {line}: caractere inesperado {source[pos]!r}")
+        kind, text = match.lastgroup, match.group()
+        pos = match.end()
+        if kind == "newline":
+            line += 1
+            # Dentro de () e [] a quebra de linha não separa instruções
+            if not depth:
+                tokens.append(("sep", "\n", line - 1))
+            continue
+        if kind in ("space", "comment"):
+            continue
+        if kind == "op":
+            if text in "([":
+                depth += 1
+            elif text in ")]":
+                depth = max(0, depth - 1)
+            elif text == ";":
+                kind = "sep"
+        tokens.append((kind, text, line))
+    tokens.append(("eof", "", line))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, source):
+        self.tokens = _tokenize(source)
+        self.pos = 0
+
+    def peek(self, offset=0):
+        return self.tokens[self.pos + offset]
+
+    def next(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def accept(self, text):
+        if self.peek()[1] == text and self.peek()[0] != "string":
+            return self.next()
+        return None
+
+    def expect(self, text):
+        token = self.next()
+        if token[1] != text or token[0] == "string":
+            raise RegoError(f"linha {token[2]}: esperado {text!r}, encontrado {token[1]!r}")
+        return token
+
+    def skip_separators(self):
+        while self.peek()[0] == "sep":
+            self.next()
+
+    def name(self):
+        token = self.next()
+        if token[0] != "name":
+            raise RegoError(f"linha {token[2]}: esperado um nome, encontrado {token[1]!r}")
+        if token[1] in _UNSUPPORTED:
+            raise RegoError(f"linha {token[2]}: '{token[1]}' não é suportado")
+        return token[1]
+
+    def module(self):
+        self.skip_separators()
+        self.expect("package")
+        package = [self.name()]
+        while self.accept("."):
+            package.append(self.name())
+        rules = []
+        self.skip_separators()
+        while self.peek()[0] != "eof":
+            rules.append(self.rule())
+            self.skip_separators()
+        return ".".join(package), rules
+
+    def rule(self):
+        line = self.peek()[2]
+        name = self.name()
+        if self.accept("["):
+            kind, head = "set", self.term()
+            self.expect("]")
+        elif self.accept("("):
+            kind, head = "function", []
+            while not self.accept(")"):
+                head.append(self.name())
+                self.accept(",")
+        else:
+            kind, head = "boolean", None
+        self.expect("{")
+        body = self.body()
+        self.expect("}")
+        return {"name": name, "kind": kind, "head": head, "body": body, "line": line}
+
+    def body(self):
+        statements = []
+        self.skip_separators()
+        while self.peek()[1] != "}":
+            statements.append(self.statement())
+            if self.peek()[1] != "}":
+                if self.peek()[0] != "sep":
+                    token = self.peek()
+                    raise RegoError(f"linha {token[2]}: fim de instrução esperado, encontrado {token[1]!r}")
+                self.skip_separators()
+        return statements
+
+    def statement(self):
+        if self.accept("not"):
+            return ("not", self.statement())
+        left = self.term()
+        token = self.peek()
+        if token[0] == "op" and token[1] in (":=", "="):
+            self.next()
+            right = self.term()
+            if token[1] == ":=" and left[0] != "var":
+                raise RegoError(f"linha {token[2]}: ':=' só atribui a variáveis")
+            return ("assign" if token[1] == ":=" else "unify", left, right)
+        if token[0] == "op" and token[1] in _COMPARISONS:
+            self.next()
+            return ("cmp", token[1], left, self.term())
+        return ("expr", left)
+
+    def term(self):
+        token = self.next()
+        kind, text, line = token
+        if kind == "string":
+            base = ("const", json.loads(text))
+        elif kind == "raw":
+            base = ("const", text[1:-1])
+        elif kind == "number":
+            base = ("const", json.loads(text))
+        elif text == "[" and kind == "op":
+            items = []
+            while not self.accept("]"):
+                items.append(self.term())
+                self.accept(",")
+            base = ("array", items)
+        elif text == "(" and kind == "op":
+            base = self.term()
+            self.expect(")")
+        elif kind == "name" and text in ("true", "false", "null"):
+            base = ("const", {"true": True, "false": False, "null": None}[text])
+        elif kind == "name":
+            if text in _UNSUPPORTED:
+                raise RegoError(f"linha {line}: '{text}' não é suportado")
+            # nome.pontuado(args) é chamada; nome.campo é referência
+            dotted = [text]
+            while (self.peek()[1] == "." and self.peek(1)[0] == "name"
+                   and self._dotted_call_ahead()):
+                self.next()
+                dotted.append(self.next()[1])
+            if self.accept("("):
+                args = []
+                while not self.accept(")"):
+                    args.append(self.term())
+                    self.accept(",")
+                base = ("call", ".".join(dotted), args)
+            else:
+                base = ("var", text)
+        else:
+            raise RegoError(f"linha {line}: termo inesperado {text!r}")
+        return self.path(base)
+
+    def _dotted_call_ahead(self):
+        """nome(.nome)* seguido de '(' a partir da posição atual"""
+        offset = 0
+        while self.peek(offset)[1] == "." and self.peek(offset + 1)[0] == "name":
+            offset += 2
+        return self.peek(offset)[1] == "("
+
+    def path(self, base):
+        steps = []
+        while True:
+            if self.peek()[1] == "." and self.peek()[0] == "op":
+                self.next()
+                token = self.next()
+                if token[0] != "name":
+                    raise RegoError(f"linha {token[2]}: esperado um campo, encontrado {token[1]!r}")
+                steps.append(("field", token[1]))
+            elif self.peek()[1] == "[" and self.peek()[0] == "op":
+                self.next()
+                if self.peek()[1] == "_" and self.peek(1)[1] == "]":
+                    self.next()
+                    steps.append(("any",))
+                else:
+                    steps.append(("index", self.term()))
+                self.expect("]")
+            else:
+                return ("ref", base, steps) if steps else base
+
+
+_INPUT_SCAN = ("ref", ("var", "input"), [("field", "resource_changes"), ("any",)])
+
+
+def _scan_variable(node, scope=()):
+    """Nome de x em `x := input.resource_changes[_]` (None se a instrução é outra)"""
+    if (node[0] in ("assign", "unify") and node[1][0] == "var" and node[1][1] not in scope
+            and node[2] == _INPUT_SCAN):
+        return node[1][1]
+    return None
+
+
+def _equalities(name, following):
+    """Gera (caminho de campos em x, outro lado) para cada `x.a.b == termo` seguinte"""
+    for other in following:
+        if other[0] not in ("cmp", "unify") or (other[0] == "cmp" and other[1] != "=="):
+            continue
+        left, right = other[1:] if other[0] == "unify" else other[2:]
+        for mine, theirs in ((left, right), (right, left)):
+            if mine[0] == "ref" and mine[1] == ("var", name) and all(s[0] == "field" for s in mine[2]):
+                yield tuple(step[1] for step in mine[2]), theirs
+
+
+def _join_key(name, driver, following):
+    """(tipo de x, atributo de x, atributo de driver) de `x.change.after.a == driver.change.after.b`"""
+    resource_type = _scan_type(name, following)
+    if resource_type is None:
+        return None
+    for path, theirs in _equalities(name, following):
+        if (len(path) == 3 and path[:2] == ("change", "after") and theirs[0] == "ref"
+                and theirs[1] == ("var", driver) and len(theirs[2]) == 3
+                and all(step[0] == "field" for step in theirs[2])
+                and (theirs[2][0][1], theirs[2][1][1]) == ("change", "after")):
+            return resource_type, path[2], theirs[2][2][1]
+    return None
+
+
+def _scan_type(name, following):
+    """Tipo fixado por `x.type == "T"` após a varredura (None se não houver)"""
+    for path, theirs in _equalities(name, following):
+        if path == ("type",) and theirs[0] == "const" and isinstance(theirs[1], str):
+            return theirs[1]
+    return None
+
+
+def _names(node):
+    """Variáveis e funções citadas por uma instrução ou termo (inclusive sob not)"""
+    kind = node[0]
+    if kind == "var":
+        yield node[1]
+    elif kind == "call":
+        yield node[1]
+        for arg in node[2]:
+            yield from _names(arg)
+    elif kind == "array":
+        for item in node[1]:
+            yield from _names(item)
+    elif kind == "ref":
+        yield from _names(node[1])
+        for step in node[2]:
+            if step[0] == "index":
+                yield from _names(step[1])
+    elif kind == "not":
+        yield from _names(node[1])
+    elif kind in ("assign", "unify"):
+        yield from _names(node[1])
+        yield from _names(node[2])
+    elif kind == "cmp":
+        yield from _names(node[2])
+        yield from _names(node[3])
+    elif kind == "expr":
+        yield from _names(node[1])
+
+
+def _calls(node):
+    """(função, argumentos) de cada chamada em uma instrução ou termo"""
+    kind = node[0]
+    if kind == "call":
+        yield node[1], node[2]
+        for arg in node[2]:
+            yield from _calls(arg)
+    elif kind == "array":
+        for item in node[1]:
+            yield from _calls(item)
+    elif kind == "ref":
+        yield from _calls(node[1])
+        for step in node[2]:
+            if step[0] == "index":
+                yield from _calls(step[1])
+    elif kind in ("not", "expr"):
+        yield from _calls(node[1])
+    elif kind in ("assign", "unify"):
+        yield from _calls(node[1])
+        yield from _calls(node[2])
+    elif kind == "cmp":
+        yield from _calls(node[2])
+        yield from _calls(node[3])
+
+
+def _variables(node):
+    """Variáveis referenciadas por um termo"""
+    if node[0] == "var":
+        return {node[1]}
+    if node[0] == "ref":
+        found = _variables(node[1])
+        for step in node[2]:
+            if step[0] == "index":
+                found |= _variables(step[1])
+        return found
+    if node[0] in ("array", "call"):
+        items = node[1] if node[0] == "array" else node[2]
+        return set().union(*(_variables(item) for item in items)) if items else set()
+    return set()
+
+
+# ---------------------------------------------------------------------------
+# Compilação para closures
+#   termo:      f(env, ctx) -> iterador de valores (nenhum = indefinido)
+#   instrução:  f(env, ctx) -> iterador de ambientes
+# ---------------------------------------------------------------------------
+
+class _Context:
+    """Estado de uma avaliação: o input, o índice do plano e as regras já avaliadas"""
+
+    def __init__(self, document, index=None):
+        self.input = document
+        self._index = index
+        self.rules = {}
+
+    @property
+    def index(self):
+        if self._index is None:
+            changes = self.input.get("resource_changes") if isinstance(self.input, dict) else None
+            self._index = PlanIndex(changes if isinstance(changes, list) else ())
+        return self._index
+
+
+def _walk(value, steps, env, ctx, position=0):
+    if position == len(steps):
+        yield value
+        return
+    step = steps[position]
+    if step[0] == "field":
+        if isinstance(value, dict) and step[1] in value:
+            yield from _walk(value[step[1]], steps, env, ctx, position + 1)
+    elif step[0] == "any":
+        if isinstance(value, list):
+            for item in value:
+                yield from _walk(item, steps, env, ctx, position + 1)
+        elif isinstance(value, dict):
+            for item in value.values():
+                yield from _walk(item, steps, env, ctx, position + 1)
+    else:
+        for key in step[1](env, ctx):
+            if isinstance(value, dict) and isinstance(key, str) and key in value:
+                yield from _walk(value[key], steps, env, ctx, position + 1)
+            elif (isinstance(value, list) and isinstance(key, (int, float)) and not isinstance(key, bool)
+                  and float(key).is_integer() and 0 <= key < len(value)):
+                yield from _walk(value[int(key)], steps, env, ctx, position + 1)
+
+
+class _Compiler:
+    def __init__(self, package, rules):
+        self.package = package
+        self.rules = {}
+        for rule in rules:
+            previous = self.rules.get(rule["name"])
+            if previous and previous[0]["kind"] != rule["kind"]:
+                raise RegoError(f"linha {rule['line']}: '{rule['name']}' definida com formas diferentes")
+            self.rules.setdefault(rule["name"], []).append(rule)
+        self.compiled = {}
+        self.definitions = {}
+
+    def compile_all(self):
+        for name, definitions in self.rules.items():
+            self.compiled[name] = self.rule(name, definitions)
+        return self.compiled
+
+    # -- termos -------------------------------------------------------------
+
+    def term(self, node, scope):
+        kind = node[0]
+        if kind == "const":
+            value = node[1]
+            return lambda env, ctx: iter((value,))
+        if kind == "var":
+            return self.variable(node[1], scope)
+        if kind == "array":
+            items = [self.term(item, scope) for item in node[1]]
+
+            def array(env, ctx):
+                for values in _product([item(env, ctx) for item in items]):
+                    yield list(values)
+            return array
+        if kind == "call":
+            return self.call(node[1], [self.term(arg, scope) for arg in node[2]])
+        base = self.term(node[1], scope)
+        steps = []
+        for step in node[2]:
+            if step[0] == "index":
+                if step[1][0] == "var" and step[1][1] not in scope and step[1][1] not in self.rules:
+                    raise RegoError(f"índice com variável livre '{step[1][1]}' não é suportado (use [_])")
+                steps.append(("index", self.term(step[1], scope)))
+            else:
+                steps.append(step)
+
+        def ref(env, ctx):
+            for value in base(env, ctx):
+                yield from _walk(value, steps, env, ctx)
+        return ref
+
+    def variable(self, name, scope):
+        if name == "input":
+            return lambda env, ctx: iter((ctx.input,))
+        if name in scope:
+            return lambda env, ctx: iter((env[name],))
+        if name in self.rules and self.rules[name][0]["kind"] != "function":
+            return lambda env, ctx: iter(self.rule_value(name, ctx))
+        raise RegoError(f"variável '{name}' não definida")
+
+    def rule_value(self, name, ctx):
+        if name not in ctx.rules:
+            ctx.rules[name] = list(self.compiled[name](ctx))
+        return ctx.rules[name]
+
+    def call(self, name, args):
+        if name in self.rules:
+            if self.rules[name][0]["kind"] != "function":
+                raise RegoError(f"'{name}' não é uma função")
+
+            def user_call(env, ctx):
+                for values in _product([arg(env, ctx) for arg in args]):
+                    if self.compiled[name](ctx, values):
+                        yield True
+                        return
+            return user_call
+        builtin = BUILTINS.get(name)
+        if builtin is None:
+            raise RegoError(f"função '{name}' não suportada")
+
+        def builtin_call(env, ctx):
+            for values in _product([arg(env, ctx) for arg in args]):
+                try:
+                    yield builtin(*values)
+                except (_Undefined, TypeError):
+                    continue
+        return builtin_call
+
+    # -- instruções ---------------------------------------------------------
+
+    def statement(self, node, scope):
+        """Retorna (closure, variáveis ligadas pela instrução)"""
+        kind = node[0]
+        if kind == "not":
+            inner, _ = self.statement(node[1], set(scope))
+
+            def negation(env, ctx):
+                for _ in inner(env, ctx):
+                    return
+                yield env
+            return negation, set()
+        if kind in ("assign", "unify") and node[1][0] == "var" and node[1][1] not in scope:
+            name, value = node[1][1], self.term(node[2], scope)
+
+            def assign(env, ctx):
+                for item in value(env, ctx):
+                    yield {**env, name: item}
+            return assign, {name}
+        if kind == "assign":
+            raise RegoError(f"variável '{node[1][1]}' já definida")
+        if kind in ("cmp", "unify"):
+            op, left, right = ("==", node[1], node[2]) if kind == "unify" else node[1:]
+            compare = _COMPARISONS[op]
+            left, right = self.term(left, scope), self.term(right, scope)
+
+            def comparison(env, ctx):
+                rights = list(right(env, ctx))
+                if any(compare(a, b) for a in left(env, ctx) for b in rights):
+                    yield env
+            return comparison, set()
+        value = self.term(node[1], scope)
+
+        def truthy(env, ctx):
+            if any(item is not False for item in value(env, ctx)):
+                yield env
+        return truthy, set()
+
+    def body(self, statements, scope):
+        """Compila o corpo em uma cadeia de instruções; devolve (closure, escopo final)"""
+        scope = set(scope)
+        steps = []
+        for position, node in enumerate(statements):
+            step = self.indexed_scan(node, statements[position + 1:], scope)
+            if step:
+                steps.append(step)
+                scope.add(node[1][1])
+                continue
+            step, bound = self.statement(node, scope)
+            steps.append(step)
+            scope |= bound
+
+        def run(env, ctx, position=0):
+            if position == len(steps):
+                yield env
+                return
+            for item in steps[position](env, ctx):
+                yield from run(item, ctx, position + 1)
+        return run, scope
+
+    def indexed_scan(self, node, following, scope):
+        """x := input.resource_changes[_] seguido de x.type == "T": candidatos pelo PlanIndex
+
+        Retorna a closure que liga x a cada candidato, ou None se o padrão não se aplica.
+        """
+        name = _scan_variable(node, scope)
+        if name is None:
+            return None
+        resource_type, reference, tag = _scan_type(name, following), None, None
+        for path, theirs in _equalities(name, following):
+            if (len(path) == 3 and path[:2] == ("change", "after") and path[2] in REFERENCE_ATTRIBUTES
+                    and _variables(theirs) <= scope and "input" not in _variables(theirs)):
+                reference = (path[2], self.term(theirs, scope))
+            elif len(path) == 4 and path[:3] == ("change", "after", "tags") and theirs[0] == "const":
+                tag = (path[3], theirs[1])
+        if resource_type is None:
+            return None
+
+        def scan(env, ctx):
+            index = ctx.index
+            values = list(reference[1](env, ctx)) if reference else None
+            if values is not None and all(reference_key(item) is not None for item in values):
+                seen = set()
+                for item in values:
+                    for change in index.referencing(resource_type, reference[0], item):
+                        if id(change) not in seen:
+                            seen.add(id(change))
+                            yield {**env, name: change}
+                return
+            if tag:
+                candidates = index.tagged(tag[0], tag[1], resource_type)
+            else:
+                candidates = index.of_type(resource_type)
+            for change in candidates:
+                yield {**env, name: change}
+        return scan
+
+    def input_scans(self, statements, visiting=()):
+        """Tipo de cada varredura de input no corpo e nas regras que ele chama
+
+        None representa um acesso ao input que não é uma varredura filtrada
+        por tipo (pode ler qualquer recurso).
+        """
+        scans = []
+        for position, node in enumerate(statements):
+            name = _scan_variable(node)
+            if name is not None:
+                scans.append(_scan_type(name, statements[position + 1:]))
+                continue
+            for used in set(_names(node)):
+                if used == "input":
+                    scans.append(None)
+                elif used in self.rules and used not in visiting:
+                    for rule in self.rules[used]:
+                        scans += self.input_scans(rule["body"], visiting + (used,))
+        return scans
+
+    def join_keys(self, statements, driver, visiting=()):
+        """Como cada varredura de input do corpo se liga ao recurso em `driver`
+
+        Segue as funções que recebem driver como argumento. Retorna
+        [(tipo do parceiro, atributo do parceiro, atributo de driver)], um
+        por varredura, ou None se alguma leitura do input não se liga a driver
+        por uma igualdade `x.change.after.a == driver.change.after.b`.
+        """
+        keys = []
+        for position, node in enumerate(statements):
+            name = _scan_variable(node)
+            if name is not None:
+                key = _join_key(name, driver, statements[position + 1:])
+                if key is None:
+                    return None
+                keys.append(key)
+                continue
+            for used in set(_names(node)):
+                if used == "input":
+                    return None
+                if (used in self.rules and used not in visiting and self.rules[used][0]["kind"] != "function"
+                        and self.input_scans(sum((rule["body"] for rule in self.rules[used]), []),
+                                             visiting + (used,))):
+                    return None
+            for called, args in _calls(node):
+                if called not in self.rules or called in visiting:
+                    continue
+                positions = [i for i, arg in enumerate(args) if arg == ("var", driver)]
+                for rule in self.rules[called]:
+                    if not self.input_scans(rule["body"], visiting + (called,)):
+                        continue
+                    found = None
+                    for i in positions:
+                        found = self.join_keys(rule["body"], rule["head"][i], visiting + (called,))
+                        if found is not None:
+                            break
+                    if found is None:
+                        return None
+                    keys += found
+        return keys
+
+    # -- regras -------------------------------------------------------------
+
+    def rule(self, name, definitions):
+        kind = definitions[0]["kind"]
+        if kind == "function":
+            bodies = []
+            for rule in definitions:
+                body, _ = self.body(rule["body"], set(rule["head"]))
+                bodies.append((rule["head"], body))
+
+            def function(ctx, args):
+                for params, body in bodies:
+                    if len(params) != len(args):
+                        raise RegoError(f"'{name}' espera {len(params)} argumentos")
+                    for _ in body(dict(zip(params, args)), ctx):
+                        return True
+                return False
+            return function
+
+        compiled = []
+        for rule in definitions:
+            body, scope = self.body(rule["body"], set())
+            head = self.term(rule["head"], scope) if kind == "set" else None
+            definition = _Definition(body, head, self.input_scans(rule["body"], (name,)))
+            statements = rule["body"]
+            driver = _scan_variable(statements[0]) if statements and kind == "set" else None
+            if driver is not None:
+                # O mesmo corpo sem a varredura inicial: avalia um candidato por vez
+                definition.driver = driver
+                definition.rest, _ = self.body(statements[1:], {driver})
+                definition.joins = self.join_keys(statements[1:], driver, (name,))
+            compiled.append(definition)
+        self.definitions[name] = compiled
+
+        def evaluate(ctx):
+            if kind == "boolean":
+                if any(True for definition in compiled for _ in definition.body({}, ctx)):
+                    yield True
+                return
+            yield from _set_values(compiled, ctx)
+        return evaluate
+
+
+class _Definition:
+    """Uma definição de regra compilada e as varreduras de input que ela faz"""
+
+    def __init__(self, body, head, scans):
+        self.body = body
+        self.head = head
+        self.scans = scans
+        # Definições que começam por `x := input.resource_changes[_]`: nome de x,
+        # o restante do corpo com x já ligado e as junções com x (join_keys)
+        self.driver = None
+        self.rest = None
+        self.joins = None
+
+    @property
+    def driver_type(self):
+        """Tipo dos candidatos da varredura inicial (None se não há ou não é filtrada)"""
+        return self.scans[0] if self.driver is not None else None
+
+    @property
+    def local_type(self):
+        """Tipo do único recurso lido, se a definição olha um recurso por vez"""
+        if len(self.scans) == 1:
+            return self.scans[0]
+        return None
+
+
+def _set_values(definitions, ctx, seen=None):
+    """Valores distintos produzidos pelas definições de uma regra de conjunto"""
+    seen = set() if seen is None else seen
+    for definition in definitions:
+        for env in definition.body({}, ctx):
+            for value in definition.head(env, ctx):
+                key = json.dumps(value, sort_keys=True)
+                if key not in seen:
+                    seen.add(key)
+                    yield value
+
+
+def _product(iterators):
+    """Produto cartesiano preguiçoso dos valores de cada argumento"""
+    if not iterators:
+        yield ()
+        return
+    rest = None
+    for first in iterators[0]:
+        if rest is None:
+            rest = list(_product(iterators[1:]))
+        for tail in rest:
+            yield (first, *tail)
+
+
+class Policy:
+    """Um policy.rego compilado"""
+
+    def __init__(self, source, path="<policy>"):
+        self.path = path
+        self.digest = hashlib.sha256(source.encode()).hexdigest()
+        try:
+            self.package, rules = _Parser(source).module()
+            self._compiler = _Compiler(self.package, rules)
+            self._rules = self._compiler.compile_all()
+        except RegoError as exc:
+            raise RegoError(f"{path}: {exc}") from None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(f.read(), path)
+
+    @property
+    def rule_names(self):
+        return sorted(name for name, rules in self._compiler.rules.items() if rules[0]["kind"] != "function")
+
+    def evaluate(self, document, rule=DEFAULT_RULE, index=None):
+        """Valores da regra para o input (lista ordenada; vazia se a regra não existe)"""
+        if rule not in self._rules or self._compiler.rules[rule][0]["kind"] == "function":
+            return []
+        ctx = _Context(document, index)
+        return sorted(self._compiler.rule_value(rule, ctx), key=_sort_key)
+
+    def split(self, rule=DEFAULT_RULE):
+        """Separa as definições de uma regra de conjunto para a avaliação em streaming
+
+        Retorna ({tipo: [definições que leem um único recurso desse tipo]},
+        [definições com junção], tipos lidos pelas junções ou None = todos).
+        """
+        rules = self._compiler.rules.get(rule)
+        if not rules:
+            return {}, [], set()
+        if rules[0]["kind"] != "set":
+            raise RegoError(f"{self.path}: '{rule}' não é uma regra de conjunto")
+        local, joins, types = {}, [], set()
+        for definition in self._compiler.definitions[rule]:
+            if definition.local_type:
+                local.setdefault(definition.local_type, []).append(definition)
+                continue
+            joins.append(definition)
+            if types is not None:
+                types = None if None in definition.scans else types | set(definition.scans)
+        return local, joins, types
+
+    def evaluate_definitions(self, definitions, document, index=None, seen=None):
+        """Valores de um subconjunto das definições (de split) para o input"""
+        return list(_set_values(definitions, _Context(document, index), seen))
+
+
+    def evaluate_candidates(self, definition, candidates, document, index=None):
+        """Gera (candidato, [valores]) de uma definição com varredura inicial (driver)
+
+        Cada candidato é ligado à variável da varredura e o restante do corpo
+        é avaliado sobre o input inteiro: a união dos valores de todos os
+        recursos do tipo é o valor da definição.
+        """
+        ctx = _Context(document, index)
+        for candidate in candidates:
+            found = {}
+            for env in definition.rest({definition.driver: candidate}, ctx):
+                for value in definition.head(env, ctx):
+                    found.setdefault(_sort_key(value), value)
+            yield candidate, list(found.values())
+
+
+def _sort_key(value):
+    return json.dumps(value, sort_keys=True)
+
+
+def discover_policies(root=POLICY_ROOT):
+    """policy.rego de cada exemplo, em ordem de caminho"""
+    return sorted(glob.glob(os.path.join(root, "*", "policy.rego")))
+
+
+def load_plan(path, projection=RESOURCE_PROJECTION):
+    """Documento de input com os resource_changes do tfplan.json (lidos em streaming)"""
+    return {"resource_changes": [item for _, item in iter_plan(path, projection=projection)]}
+
+
+def evaluate_all(policies, document, rule=DEFAULT_RULE):
+    """{pacote: [valores da regra]} com um único PlanIndex para todas as políticas"""
+    changes = document.get("resource_changes") if isinstance(document, dict) else None
+    index = PlanIndex(changes if isinstance(changes, list) else ())
+    return {policy.package: policy.evaluate(document, rule, index) for policy in policies}
+
+
+def evaluate_stream(policies, changes, rule=DEFAULT_RULE):
+    """Avalia as políticas em uma única passada pelos resource_changes
+
+    Definições que leem um recurso por vez (a maioria das regras deny)
+    rodam à medida que cada item chega, e o item é descartado em seguida.
+    Só os recursos dos tipos lidos por definições com junção ficam em
+    memória até o fim, quando essas definições são avaliadas sobre eles.
+    Retorna ({pacote: [valores]}, {"resources": lidos, "retained": mantidos}).
+    """
+    plans = [(policy, *policy.split(rule)) for policy in policies]
+    keep_all = any(types is None for *_, types in plans)
+    keep = set().union(*(types for *_, types in plans if types is not None))
+    seen = {policy.package: set() for policy in policies}
+    values = {policy.package: [] for policy in policies}
+    retained = []
+    count = 0
+    for change in changes:
+        count += 1
+        single = None
+        for policy, local, _, _ in plans:
+            definitions = local.get(change.get("type"))
+            if definitions:
+                single = single or {"resource_changes": [change]}
+                values[policy.package] += policy.evaluate_definitions(definitions, single,
+                                                                      seen=seen[policy.package])
+        if keep_all or change.get("type") in keep:
+            retained.append(change)
+
+    document = {"resource_changes": retained}
+    index = PlanIndex(retained)
+    for policy, _, joins, _ in plans:
+        if joins:
+            values[policy.package] += policy.evaluate_definitions(joins, document, index,
+                                                                  seen=seen[policy.package])
+    results = {package: sorted(found, key=_sort_key) for package, found in values.items()}
+    return results, {"resources": count, "retained": len(retained)}
+
+
+# ---------------------------------------------------------------------------
+# Conformidade com o OPA
+# ---------------------------------------------------------------------------
+
+def _change(resource_type, name, after, actions=("create",)):
+    return {"address": f"{resource_type}.{name}", "type": resource_type, "name": name,
+            "change": {"actions": list(actions), "after": after}}
+
+
+def conformance_plans():
+    """Planos de entrada da conformidade: casos de borda de cada política e um plano sintético"""
+    edge = [
+        _change("aws_backup_plan", "sem_cron", {"id": "p1", "rule": [
+            {"schedule": "rate(1 day)", "lifecycle": {"delete_after": "7"}},
+            {"schedule": "cron(0 5 * * ? *)", "lifecycle": {"delete_after": 35}}]}),
+        _change("aws_backup_plan", "sem_regra", {"id": "p2"}),
+        _change("aws_backup_plan", "removido", None, ("delete",)),
+        _change("aws_backup_selection", "sel", {"plan_id": "p1"}),
+        _change("aws_backup_vault", "vault", {"name": "v1"}),
+        _change("aws_backup_vault", "vault_notificado", {"name": "v2"}),
+        _change("aws_backup_vault_notifications", "notif", {"backup_vault_name": "v2"}),
+        _change("aws_s3_bucket", "pessoal", {"id": "b1", "tags": {"DataType": "PersonalData",
+                                                                    "LGPD": True}}),
+        _change("aws_s3_bucket", "auditoria", {"id": "b2", "tags": {"Purpose": "AuditLogs",
+                                                                      "DataType": "PersonalData",
+                                                                      "Region": "sa-east-1", "LGPD": "true"}}),
+        _change("aws_s3_bucket", "sem_tags", {"id": "b3", "tags": None}),
+        _change("aws_s3_bucket_server_side_encryption_configuration", "sse", {"bucket": "b1", "rule": [
+            {"apply_server_side_encryption_by_default": {"sse_algorithm": "AES256"}},
+            {"apply_server_side_encryption_by_default": {"sse_algorithm": "aws:kms"}}]}),
+        _change("aws_s3_bucket_versioning", "versao", {"bucket": "b2",
+                                                       "versioning_configuration": {"status": "Suspended"}}),
+        _change("aws_s3_bucket_lifecycle_configuration", "ciclo", {"bucket": "b2", "rule": [
+            {"expiration": {"days": 365}}, {"expiration": {"days": "3650"}}, {"expiration": None}]}),
+        _change("aws_kms_key", "sem_rotacao", {"enable_key_rotation": False}),
+        _change("aws_kms_key", "rotacao_texto", {"enable_key_rotation": "true"}),
+        _change("aws_vpc", "producao", {"cidr_block": "10.0.0.0/16", "tags": {"Environment": "production"}}),
+        _change("aws_vpc", "desenvolvimento", {"cidr_block": "10.0.0.0/16",
+                                               "tags": {"Environment": "development"}}),
+        _change("aws_vpc", "sem_ambiente", {"cidr_block": "10.1.0.0/16", "tags": {"Environment": False}}),
+        _change("aws_network_acl", "acl", {"egress": [{"action": "allow"}]}),
+        _change("aws_cloudtrail", "trilha", {"enable_log_file_validation": False, "is_multi_region_trail": None,
+                                             "event_selector": [{"data_resource": []}]}),
+        _change("aws_cloudwatch_metric_alarm", "alarme", {"tags": {"Compliance": "ISO-27017"}}),
+        _change("aws_lambda_function", "esquecimento", {"function_name": "lgpd-esquecimento",
+                                                        "timeout": 60}),
+        _change("aws_lambda_function", "outra", {"function_name": 42, "timeout": 3}),
+        _change("aws_sqs_queue", "fila", {"message_retention_seconds": "86400"}),
+        _change("aws_sqs_queue", "fila_invalida", {"message_retention_seconds": "quatorze dias"}),
+        _change("aws_cloudwatch_log_group", "logs", {"retention_in_days": 365,
+                                                     "tags": {"Purpose": "AuditoriaEsquecimento"}}),
+        _change("aws_dynamodb_table", "registro", {"tags": {"LGPD": "RegistroExclusoes"},
+                                                   "point_in_time_recovery": [{"enabled": True}]}),
+        _change("aws_s3_bucket_replication_configuration", "replica", {"rule": [{"status": "Enabled"}]}),
+    ]
+    return {"casos-de-borda": {"resource_changes": edge},
+            "sintetico-2000": {"resource_changes": synthetic_plan(2000)}}
+
+
+def opa_evaluate(policy_path, package, document, rule=DEFAULT_RULE, opa="opa"):
+    """Valores da regra segundo `opa eval` (lista ordenada)"""
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "input.json")
+        with open(input_path, "w", encoding="utf-8") as f:
+            json.dump(document, f)
+        result = subprocess.run([opa, "eval", "-f", "json", "-i", input_path, "-d", policy_path,
+                                 f"data.{package}.{rule}"], capture_output=True, text=True, check=True)
+    output = json.loads(result.stdout)
+    values = []
+    for entry in output.get("result", []):
+        for expression in entry.get("expressions", []):
+            values.extend(expression.get("value") or [])
+    return sorted(values, key=_sort_key)
+
+
+def conformance(policy_paths, plans=None, rule=DEFAULT_RULE, opa="opa"):
+    """Compara avaliador nativo e OPA; retorna [(política, plano, nativo, opa)] divergentes"""
+    plans = plans or conformance_plans()
+    failures = []
+    for path in policy_paths:
+        policy = Policy.load(path)
+        for plan_name, document in plans.items():
+            native = policy.evaluate(document, rule)
+            expected = opa_evaluate(path, policy.package, document, rule, opa)
+            status = "✅" if native == expected else "❌"
+            print(f"{status} {policy.package:<40} {plan_name:<16} {len(native):>4} nativo / {len(expected):>4} opa")
+            if native != expected:
+                failures.append((path, plan_name, native, expected))
+    return failures
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reporta bytes; Linux reporta KB
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avalia os policy.rego em processo, sem o OPA")
+    parser.add_argument("plan", nargs="?", help="tfplan.json (saída de terraform show -json)")
+    parser.add_argument("policies", nargs="*", help="arquivos policy.rego (padrão: todos os exemplos)")
+    parser.add_argument("--rule", default=DEFAULT_RULE, help=f"regra avaliada (padrão: {DEFAULT_RULE})")
+    parser.add_argument("--fail-defined", action="store_true",
+                        help="termina com código 1 se alguma regra produzir valores (como no opa eval)")
+    parser.add_argument("--conformance", action="store_true",
+                        help="compara o resultado com `opa eval` em planos de teste (ou no plano dado)")
+    parser.add_argument("--opa", default="opa", help="executável do OPA para --conformance")
+    parser.add_argument("--no-projection", action="store_true",
+                        help="decodifica cada resource_change inteiro (padrão: só type, name e change.after)")
+    args = parser.parse_args()
+    projection = None if args.no_projection else RESOURCE_PROJECTION
+
+    paths = args.policies or discover_policies()
+    if args.conformance:
+        if not shutil.which(args.opa):
+            print(f"⚠️  OPA não encontrado ({args.opa}): conformidade não verificada")
+            sys.exit(2)
+        plans = {os.path.basename(args.plan): load_plan(args.plan, projection)} if args.plan else None
+        failures = conformance(paths, plans, args.rule, args.opa)
+        for path, plan_name, native, expected in failures:
+            print(f"\n❌ {path} [{plan_name}]")
+            print(f"   só no nativo: {[v for v in native if v not in expected]}")
+            print(f"   só no opa:    {[v for v in expected if v not in native]}")
+        if failures:
+            sys.exit(1)
+        print("✅ Avaliador nativo em conformidade com o OPA")
+        return
+    if not args.plan:
+        parser.error("informe o tfplan.json ou --conformance")
+
+    started = time.perf_counter()
+    policies = [Policy.load(path) for path in paths]
+    compiled = time.perf_counter()
+    changes = (item for _, item in iter_plan(args.plan, projection=projection))
+    results, stats = evaluate_stream(policies, changes, args.rule)
+    finished = time.perf_counter()
+
+    for package, values in results.items():
+        icon = "❌" if values else "✅"
+        print(f"{icon} {package}: {len(values)} violações")
+        for value in values:
+            print(f"   - {value}")
+    print(f"⏱️  compilação {compiled - started:.3f}s, leitura e avaliação {finished - compiled:.3f}s: "
+          f"{stats['resources']} recursos, {stats['retained']} mantidos para junções, "
+          f"pico de {_peak_rss_mb():.0f} MB")
+    if args.fail_defined and any(results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Renderização dos Diagramas - DevSecOps Examples
+Renderiza todos os diagramas Graphviz de exemplos/ em paralelo
+
+Uso:
+    python render_diagrams.py
+    python render_diagrams.py --formats png svg --workers 4 --only iso-27017-backup-architecture
+
+Cada diagrama é renderizado em um diretório temporário próprio e os arquivos
+finais são movidos atomicamente para o lado do script (<OUTPUT_NAME>.<formato>),
+então execuções concorrentes nunca deixam arquivos pela metade. Artefatos cujo
+fonte DOT e opções não mudaram vêm do cache em .cache/renders (--no-cache
+desativa).
+
+O layout é calculado uma única vez por diagrama (dot -Tdot, com as posições de
+nós, rótulos e splines gravadas no próprio DOT) e cada formato é apenas
+desenhado a partir dele com neato -n2, sem refazer o roteamento ortogonal.
+O formato "pyramid" grava todas as resoluções usadas pelos consumidores em um
+único artefato (diagram_pyramid.py).
+Grafos grandes passam antes pelo nível de detalhe (diagram_lod.py).
+PNGs cujo bitmap excede o orçamento (DIAGRAM_RASTER_BUDGET_MB ou
+--raster-budget-mb) são rasterizados em faixas (tiled_raster.py);
+--verify-strips confere, em dpi baixo, que as faixas reproduzem o render
+completo pixel a pixel (roda no CI).
+Com --optimize-png, cada PNG é recomprimido sem perdas (png_optimize.py)
+antes de ir para o cache. Com --reproducible, datas e /ID dos PDFs são
+fixados (reproducible.py): o mesmo fonte DOT gera sempre os mesmos bytes.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import graphviz
+
+import diagram_lod
+from diagram_builders import DOT_WRITERS, discover_builders, load_builder, script_builders
+from diagram_cache import RenderCache, render_key
+from diagram_pyramid import LEVELS_VERSION, PYRAMID_FORMAT, PYRAMID_LEVELS, PYRAMID_VERSION, write_pyramid
+from png_optimize import OPTIMIZER_VERSION, optimize_file
+from reproducible import normalize_pdf_file
+from tiled_raster import RASTER_MEMORY_BUDGET, raster_geometry, render_tiled, single_shot_bytes, verify
+
+# Formatos gerados pelos blocos __main__ dos scripts
+DEFAULT_FORMATS = ("png", "pdf", "svg")
+
+# Verificação faixas x render completo (--verify-strips): dpi baixo para caber
+# o render completo na memória e orçamento pequeno para forçar várias faixas
+VERIFY_DPI = 72
+VERIFY_BUDGET = 1024 * 1024
+
+# neato -n2 usa as posições de nós e arestas já presentes no DOT, sem layout
+LAYOUT_FORMAT = "dot"
+DRAW_ENGINE = "neato"
+
+
+def layout_once(dot):
+    """Executa o layout uma vez; retorna (Source já posicionado, degradado?)
+
+    O resultado pode ser desenhado em qualquer formato sem recalcular posições
+    nem splines (splines='ortho' é a parte cara do dot). Grafos grandes são
+    simplificados pelo nível de detalhe adequado (diagram_lod.py). Degradado
+    indica que o layout estourou o tempo e caiu para um nível mais agregado
+    que o planejado: o resultado não deve ir para o cache.
+    """
+    positioned, level, visible, _ = diagram_lod.layout(dot, LAYOUT_FORMAT)
+    if level is not diagram_lod.LEVELS[0]:
+        print(f"⚠️  Layout no nível '{level.name}' ({visible} nós visíveis)")
+    degraded = level is not diagram_lod.planned_level(dot.source)
+    return graphviz.Source(positioned, engine=DRAW_ENGINE), degraded
+
+
+def render_formats(source, basename, formats, raster_budget=RASTER_MEMORY_BUDGET, optimize_png=False,
+                   reproducible=False):
+    """Desenha um Source posicionado em vários formatos
+
+    Retorna {formato: (caminho, segundos)}.
+    """
+    outputs = {}
+    geometry = raster_geometry(source.source) if "png" in formats else None
+    for fmt in formats:
+        started = time.perf_counter()
+        if fmt == "png" and geometry and single_shot_bytes(geometry) > raster_budget:
+            path = f"{basename}.png"
+            render_tiled(source.source, path, raster_budget)
+        elif fmt == PYRAMID_FORMAT:
+            path = f"{basename}.{fmt}"
+            write_pyramid(source.source, path)
+        else:
+            path = source.render(basename, format=fmt, neato_no_op=2, cleanup=True)
+        if fmt == "png" and optimize_png:
+            optimize_file(path)
+        elif fmt == "pdf" and reproducible:
+            normalize_pdf_file(path)
+        outputs[fmt] = (path, time.perf_counter() - started)
+    return outputs
+
+
+def cache_format(fmt, optimize_png=False, reproducible=False):
+    """Formato como entra na chave do cache (inclui as opções que mudam o artefato)"""
+    if fmt == PYRAMID_FORMAT:
+        levels = ",".join(f"{name}={width}" for name, width in PYRAMID_LEVELS)
+        return f"{fmt}:v{PYRAMID_VERSION}.{LEVELS_VERSION}:{levels}"
+    if fmt == "png" and optimize_png:
+        return f"{fmt}:otimizado-v{OPTIMIZER_VERSION}"
+    if fmt == "pdf" and reproducible:
+        return f"{fmt}:reproduzivel"
+    return fmt
+
+
+def render_diagram(builder, formats=DEFAULT_FORMATS, output_dir=None, cache=None,
+                   raster_budget=RASTER_MEMORY_BUDGET, optimize_png=False, reproducible=False):
+    """Renderiza um diagrama nos formatos pedidos
+
+    output_dir padrão: o diretório do script do diagrama. Com um RenderCache,
+    formatos cujo artefato já existe no cache são copiados sem chamar o dot.
+    Retorna ({formato: segundos}, {formato: segundos de render poupados}); o
+    tempo do layout compartilhado aparece na chave "layout".
+    """
+    output_dir = output_dir or os.path.dirname(builder.script)
+    timings, saved = {}, {}
+
+    dot = builder.func()
+    if builder.dpi:
+        dot.attr(dpi=builder.dpi)
+    keys = {fmt: render_key(dot, cache_format(fmt, optimize_png, reproducible))
+            for fmt in formats} if cache else {}
+
+    # Diretório temporário no mesmo sistema de arquivos: os.replace é atômico
+    with tempfile.TemporaryDirectory(prefix=".render-", dir=output_dir) as workdir:
+        basename = os.path.join(workdir, builder.output_name)
+        rendered = {}
+        missing = []
+        for fmt in formats:
+            started = time.perf_counter()
+            path = f"{basename}.{fmt}"
+            cached_seconds = cache.fetch(keys[fmt], path) if cache else None
+            if cached_seconds is None:
+                missing.append(fmt)
+                continue
+            saved[fmt] = cached_seconds
+            timings[fmt] = time.perf_counter() - started
+            rendered[fmt] = path
+
+        if missing:
+            started = time.perf_counter()
+            source, degraded = layout_once(dot)
+            timings["layout"] = time.perf_counter() - started
+            if cache and degraded:
+                print(f"⚠️  {builder.output_name}: layout degradado por tempo, não vai para o cache")
+            outputs = render_formats(source, basename, missing, raster_budget, optimize_png, reproducible)
+            for fmt, (path, seconds) in outputs.items():
+                timings[fmt] = seconds
+                rendered[fmt] = path
+                if cache and not degraded:
+                    # O layout é dividido entre os formatos que o usaram
+                    cache.store(keys[fmt], path, seconds + timings["layout"] / len(missing))
+
+        for fmt, path in rendered.items():
+            os.replace(path, os.path.join(output_dir, f"{builder.output_name}.{fmt}"))
+    return timings, saved
+
+
+def render_script(script, formats=DEFAULT_FORMATS):
+    """Renderiza os diagramas de um único script (blocos __main__ em exemplos/)
+
+    Mesmo caminho do render em paralelo: um layout por diagrama, cada formato
+    desenhado a partir dele e PNGs acima do orçamento em faixas. Os arquivos
+    ficam ao lado do script.
+    """
+    for builder in script_builders(os.path.abspath(script)):
+        timings, _ = render_diagram(builder, formats)
+        print(f"⏱️  Layout de {builder.output_name} em {timings['layout']:.2f}s")
+        for fmt in formats:
+            print(f"✅ Diagrama {fmt.upper()} gerado: {builder.output_name}.{fmt} ({timings[fmt]:.2f}s)")
+
+
+def verify_strips(builders, dpi=VERIFY_DPI, budget=VERIFY_BUDGET):
+    """Compara o PNG em faixas com o render em uma única passada, em dpi baixo
+
+    O layout é o mesmo da produção; só a resolução muda. Retorna os nomes
+    dos diagramas cujos bitmaps diferem.
+    """
+    failures = []
+    for builder in builders:
+        dot = builder.func()
+        # dpi e resolution são sinônimos no Graphviz: alguns scripts fixam os dois
+        dot.attr(dpi=str(dpi), resolution=str(dpi))
+        source, _ = layout_once(dot)
+        geometry = raster_geometry(source.source)
+        if geometry is None:
+            print(f"⚠️  {builder.output_name}: usa size/ratio/rotate, nunca é rasterizado em faixas")
+            continue
+        if verify(source.source, budget):
+            print(f"✅ {builder.output_name}: faixas idênticas ao render completo "
+                  f"({geometry.width}x{geometry.height} px a {dpi} dpi)")
+        else:
+            print(f"❌ {builder.output_name}: render em faixas difere do render completo")
+            failures.append(builder.output_name)
+    return failures
+
+
+def _render_job(script, name, formats, use_cache, raster_budget, writer, optimize_png, reproducible):
+    """Executado no worker: recarrega o builder pelo caminho e renderiza"""
+    builder = load_builder(script, name, writer)
+    started = time.perf_counter()
+    try:
+        timings, saved = render_diagram(builder, formats, cache=RenderCache() if use_cache else None,
+                                        raster_budget=raster_budget, optimize_png=optimize_png,
+                                        reproducible=reproducible)
+    except Exception as exc:
+        return builder.output_name, time.perf_counter() - started, {}, {}, f"{type(exc).__name__}: {exc}"
+    return builder.output_name, time.perf_counter() - started, timings, saved, None
+
+
+def render_all(builders, formats=DEFAULT_FORMATS, workers=None, use_cache=True,
+               raster_budget=RASTER_MEMORY_BUDGET, writer="graphviz", optimize_png=False,
+               reproducible=False):
+    """Renderiza todos os builders em um pool de processos
+
+    Retorna [(nome, segundos, {formato: segundos}, {formato: poupados}, erro)]
+    na ordem de conclusão.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_job, builder.script, builder.name, tuple(formats), use_cache,
+                               raster_budget, writer, optimize_png, reproducible)
+                   for builder in builders]
+        for future in as_completed(futures):
+            results.append(future.result())
+    return results
+
+
+def print_table(results, formats, elapsed):
+    """Tabela de tempos por diagrama e por formato (♻️ = veio do cache)"""
+    header = (f"{'Diagrama':<42} {'Total':>8} {'layout':>9} "
+              + " ".join(f"{fmt:>9}" for fmt in formats))
+    print(header)
+    print("-" * len(header))
+    for name, total, timings, saved, error in sorted(results):
+        if error:
+            print(f"❌ {name:<40} {total:7.2f}s  {error}")
+            continue
+        layout = f"{timings['layout']:7.2f}s " if "layout" in timings else f"{'-':>8} "
+        cells = layout + " ".join(f"{timings[fmt]:7.2f}s{'♻' if fmt in saved else ' '}" for fmt in formats)
+        print(f"✅ {name:<40} {total:7.2f}s {cells}")
+    busy = sum(result[1] for result in results)
+    print("-" * len(header))
+    print(f"⏱️  {len(results)} diagramas em {elapsed:.2f}s (soma dos tempos: {busy:.2f}s)")
+
+
+def record_cache_stats(results, formats):
+    """Acumula acertos/falhas desta execução nos contadores do cache"""
+    hits = sum(len(saved) for _, _, _, saved, error in results if not error)
+    misses = sum(len(formats) - len(saved) for _, _, _, saved, error in results if not error)
+    seconds_saved = sum(sum(saved.values()) for _, _, _, saved, _ in results)
+    stats = RenderCache().record(hits, misses, seconds_saved)
+    print(f"♻️  Cache: {hits} acertos, {misses} falhas nesta execução "
+          f"(acumulado: {stats['hits']} acertos, {stats['misses']} falhas, "
+          f"{stats['seconds_saved']:.1f}s de render poupados)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderiza todos os diagramas Graphviz em paralelo")
+    parser.add_argument("--formats", nargs="+", default=list(DEFAULT_FORMATS),
+                        help="formatos de saída (padrão: png pdf svg; pyramid = várias resoluções)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="número de processos (padrão: número de CPUs)")
+    parser.add_argument("--only", nargs="+", metavar="OUTPUT_NAME",
+                        help="renderiza apenas os diagramas com estes OUTPUT_NAME")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignora o cache de renderizações e sempre chama o dot")
+    parser.add_argument("--raster-budget-mb", type=int, default=RASTER_MEMORY_BUDGET // (1024 * 1024),
+                        help="PNGs maiores que isto são rasterizados em faixas (padrão: 256)")
+    parser.add_argument("--dot-writer", choices=DOT_WRITERS, default="graphviz",
+                        help="construtor do DOT: biblioteca graphviz ou escritor em fluxo (dot_writer.py)")
+    parser.add_argument("--optimize-png", action="store_true",
+                        help="recomprime os PNGs sem perdas (png_optimize.py) antes de gravá-los")
+    parser.add_argument("--reproducible", action="store_true",
+                        help="fixa datas e /ID dos PDFs: mesmo fonte, mesmos bytes")
+    parser.add_argument("--verify-strips", action="store_true",
+                        help=f"em vez de renderizar, compara PNG em faixas e render completo a {VERIFY_DPI} dpi")
+    args = parser.parse_args()
+
+    builders = discover_builders(writer=args.dot_writer)
+    if args.only:
+        builders = [builder for builder in builders if builder.output_name in args.only]
+    if args.verify_strips:
+        if verify_strips(builders):
+            raise SystemExit(1)
+        return
+
+    started = time.perf_counter()
+    results = render_all(builders, args.formats, args.workers, use_cache=not args.no_cache,
+                         raster_budget=args.raster_budget_mb * 1024 * 1024, writer=args.dot_writer,
+                         optimize_png=args.optimize_png, reproducible=args.reproducible)
+    print_table(results, args.formats, time.perf_counter() - started)
+    if not args.no_cache:
+        record_cache_stats(results, args.formats)
+    if any(result[-1] for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Builds Reproduzíveis - DevSecOps Examples
+Mesmas entradas, mesmos bytes: datas fixas, ZIPs canônicos e IDs estáveis
+
+Uso:
+    python render_diagrams.py --reproducible
+    python generate_presentation.py --reproducible
+    SOURCE_DATE_EPOCH=1735689600 python generate_presentation.py --reproducible
+
+A data fixa segue a convenção SOURCE_DATE_EPOCH (reproducible-builds.org);
+sem ela, vale 1980-01-01, a menor data representável em um ZIP.
+
+- PDFs do Graphviz (cairo) trazem /CreationDate, /ModDate e um /ID
+  derivado do momento do render: os três são reescritos com o mesmo
+  tamanho, então a tabela xref continua válida.
+- ZIPs (.pptx, .pyramid) são regravados com [Content_Types].xml primeiro e
+  os demais membros em ordem de nome, data fixa, atributos fixos e o
+  mesmo nível de compressão.
+"""
+
+import datetime
+import hashlib
+import io
+import os
+import re
+import zipfile
+
+# Data usada sem SOURCE_DATE_EPOCH: 1980-01-01T00:00:00Z
+ZIP_EPOCH = 315532800
+
+# Nível de deflate dos membros comprimidos
+ZIP_COMPRESS_LEVEL = 6
+
+# Parte que o OPC exige como primeiro membro do pacote
+_CONTENT_TYPES = "[Content_Types].xml"
+
+# Permissões gravadas em cada membro (rw-r--r--, arquivo regular)
+_EXTERNAL_ATTR = 0o100644 << 16
+
+_PDF_DATE = re.compile(rb"(/(?:CreationDate|ModDate)\s*\(D:)([^)]*)(\))")
+_PDF_ID = re.compile(rb"(/ID\s*\[\s*<)([0-9A-Fa-f]+)(>\s*<)([0-9A-Fa-f]+)(>\s*\])")
+
+
+def source_date_epoch():
+    """Segundos da data fixa: SOURCE_DATE_EPOCH ou ZIP_EPOCH"""
+    return int(os.environ.get("SOURCE_DATE_EPOCH", ZIP_EPOCH))
+
+
+def source_date():
+    return datetime.datetime.fromtimestamp(source_date_epoch(), datetime.timezone.utc)
+
+
+def _fixed_pdf_date(original):
+    """Data fixa no mesmo tamanho da original (fuso vira +00'00 ou Z)"""
+    digits = source_date().strftime("%Y%m%d%H%M%S").encode()
+    if len(original) < len(digits):
+        return digits[:len(original)]
+    return digits + re.sub(rb"\d", b"0", original[len(digits):]).replace(b"-", b"+")
+
+
+def normalize_pdf(data):
+    """Reescreve datas e /ID do PDF sem mudar o tamanho de nenhum objeto"""
+    data = _PDF_DATE.sub(lambda m: m.group(1) + _fixed_pdf_date(m.group(2)) + m.group(3), data)
+    # O /ID passa a ser derivado do conteúdo (com o /ID original zerado)
+    blank = _PDF_ID.sub(lambda m: m.group(1) + b"0" * len(m.group(2)) + m.group(3)
+                        + b"0" * len(m.group(4)) + m.group(5), data)
+    digest = hashlib.sha256(blank).hexdigest().upper().encode()
+    return _PDF_ID.sub(lambda m: m.group(1) + digest[:len(m.group(2))] + m.group(3)
+                       + digest[:len(m.group(4))] + m.group(5), data)
+
+
+def normalize_pdf_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    normalized = normalize_pdf(data)
+    if normalized != data:
+        with open(path, "wb") as f:
+            f.write(normalized)
+
+
+def _member_order(name):
+    return (name != _CONTENT_TYPES, name)
+
+
+def write_canonical_zip(out, members):
+    """Grava os membros {nome: (bytes, comprimido?)} como ZIP canônico em out"""
+    # ZIP não representa datas anteriores a 1980
+    epoch = max(source_date_epoch(), ZIP_EPOCH)
+    date_time = datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).timetuple()[:6]
+    with zipfile.ZipFile(out, "w") as archive:
+        for name in sorted(members, key=_member_order):
+            data, compressed = members[name]
+            info = zipfile.ZipInfo(name, date_time=date_time)
+            info.create_system = 0
+            info.external_attr = _EXTERNAL_ATTR
+            info.compress_type = zipfile.ZIP_DEFLATED if compressed else zipfile.ZIP_STORED
+            archive.writestr(info, data, compresslevel=ZIP_COMPRESS_LEVEL if compressed else None)
+
+
+def canonicalize_zip(source, output):
+    """Regrava o ZIP source (caminho ou bytes) de forma canônica em output
+
+    Cada membro mantém o tipo de compressão original (PNGs ficam sem deflate
+    se já estavam assim).
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        members = {info.filename: (archive.read(info), info.compress_type != zipfile.ZIP_STORED)
+                   for info in archive.infolist()}
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        write_canonical_zip(f, members)
+    os.replace(tmp_path, output)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Conversão de SVG para PNG - DevSecOps Examples
+Rasteriza os SVGs dos diagramas direto na largura final, em processo
+
+Uso:
+    python svg_raster.py                                  # todos os SVGs de exemplos/
+    python svg_raster.py diagrama.svg --width 4000 --workers 4
+
+Substitui o convert-to-high-dpi.sh, que chamava o ImageMagick (magick
+-density 300 ... -resize 4000x) e o sips do macOS: lá o SVG era rasterizado a
+300 dpi e depois reamostrado. Aqui o cairosvg desenha o vetor já na escala
+que resulta em --width pixels, sem reamostragem intermediária, e o fundo é
+achatado em branco como o -alpha remove fazia. Os arquivos são convertidos
+em paralelo, com o tempo de cada um.
+
+Requer o cairosvg e a biblioteca libcairo do sistema (pip install cairosvg;
+apt install libcairo2 ou brew install cairo); sem eles o script termina com
+código 1 e a instrução de instalação.
+"""
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+try:
+    import cairosvg
+except (ImportError, OSError) as exc:
+    # OSError: o pacote está instalado, mas a libcairo do sistema não
+    cairosvg = None
+    CAIROSVG_ERROR = str(exc).splitlines()[0]
+
+from diagram_builders import DIAGRAM_ROOT
+
+# Largura padrão do PNG de alta qualidade (a mesma do convert-to-high-dpi.sh)
+DEFAULT_WIDTH = 4000
+
+# Sufixo do PNG gerado ao lado do SVG: <nome>-hd.png
+DEFAULT_SUFFIX = "-hd"
+
+# Cor de fundo que substitui a transparência
+BACKGROUND = "white"
+
+
+def svg_to_png(svg, width, background=BACKGROUND):
+    """Rasteriza o SVG (bytes) com width pixels de largura; retorna o PNG em bytes
+
+    A altura segue a proporção do viewBox. Com background, o canal alfa é
+    removido (PNG RGB), como no -alpha remove -alpha off do ImageMagick.
+    """
+    png = cairosvg.svg2png(bytestring=svg, output_width=width, background_color=background)
+    if not background:
+        return png
+    img = Image.open(io.BytesIO(png)).convert("RGB")
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def output_path(svg_path, suffix=DEFAULT_SUFFIX):
+    return f"{os.path.splitext(svg_path)[0]}{suffix}.png"
+
+
+def convert_file(svg_path, width=DEFAULT_WIDTH, suffix=DEFAULT_SUFFIX):
+    """Converte um SVG e grava o PNG ao lado dele
+
+    Retorna (caminho do PNG, segundos, (largura, altura), erro); o PNG é
+    gravado em um arquivo temporário e movido atomicamente.
+    """
+    started = time.perf_counter()
+    target = output_path(svg_path, suffix)
+    try:
+        with open(svg_path, "rb") as f:
+            png = svg_to_png(f.read(), width)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(png)
+        os.replace(tmp_path, target)
+        size = Image.open(io.BytesIO(png)).size
+    except Exception as exc:
+        return target, time.perf_counter() - started, None, f"{type(exc).__name__}: {exc}"
+    return target, time.perf_counter() - started, size, None
+
+
+def discover_svgs(root=DIAGRAM_ROOT):
+    """SVGs gerados pelos scripts de diagrama, em ordem de caminho"""
+    return sorted(glob.glob(os.path.join(root, "**", "*.svg"), recursive=True))
+
+
+def convert_all(paths, width=DEFAULT_WIDTH, suffix=DEFAULT_SUFFIX, workers=None):
+    """Converte os SVGs em um pool de processos
+
+    Retorna [(svg, png, segundos, tamanho, erro)] na ordem de conclusão.
+    """
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(convert_file, path, width, suffix): path for path in paths}
+        for future in as_completed(futures):
+            results.append((futures[future], *future.result()))
+    return results
+
+
+def print_table(results, elapsed):
+    """Tempo e tamanho de cada conversão"""
+    header = f"{'SVG':<50} {'Tempo':>8} {'Pixels':>12} {'Tamanho':>10}"
+    print(header)
+    print("-" * len(header))
+    for svg_path, png_path, seconds, size, error in sorted(results):
+        name = os.path.basename(svg_path)
+        if error:
+            print(f"❌ {name:<48} {seconds:7.2f}s  {error}")
+            continue
+        pixels = f"{size[0]}x{size[1]}"
+        print(f"✅ {name:<48} {seconds:7.2f}s {pixels:>12} {os.path.getsize(png_path) / 1024:8.0f} KB")
+    busy = sum(result[2] for result in results)
+    print("-" * len(header))
+    print(f"⏱️  {len(results)} SVGs em {elapsed:.2f}s (soma dos tempos: {busy:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Converte SVGs de diagramas em PNGs de alta qualidade")
+    parser.add_argument("svgs", nargs="*", help="arquivos SVG (padrão: todos em exemplos/)")
+    parser.add_argument("--width", type=int, default=DEFAULT_WIDTH,
+                        help=f"largura do PNG em pixels (padrão: {DEFAULT_WIDTH})")
+    parser.add_argument("--suffix", default=DEFAULT_SUFFIX,
+                        help=f"sufixo do PNG gerado ao lado do SVG (padrão: {DEFAULT_SUFFIX})")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="número de processos (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    if cairosvg is None:
+        print(f"❌ cairosvg indisponível: {CAIROSVG_ERROR}")
+        print("💡 Instale com: pip install cairosvg e a libcairo (apt install libcairo2 / brew install cairo)")
+        sys.exit(1)
+
+    paths = args.svgs or discover_svgs()
+    if not paths:
+        print("⚠️  Nenhum SVG encontrado")
+        return
+
+    started = time.perf_counter()
+    results = convert_all(paths, args.width, args.suffix, args.workers)
+    print_table(results, time.perf_counter() - started)
+    if any(result[-1] for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Diagrama a partir do Plano Terraform - DevSecOps Examples
+Gera o DOT da arquitetura direto do tfplan.json usado pelo OPA na pipeline
+
+Uso:
+    terraform plan -out=tfplan.binary
+    terraform show -json tfplan.binary > tfplan.json
+    python terraform_diagram.py tfplan.json -o arquitetura.gv
+    python diagram_lod.py arquitetura.gv -o layout.gv   # planos grandes
+    python terraform_diagram.py tfplan.json -o arquitetura.png --format png
+
+Cada resource_change vira um nó, com as cores e ícones dos diagramas da
+pasta exemplos/ e o estilo da ação planejada; cada módulo vira um cluster.
+As referências entre recursos (configuration) viram arestas. O DOT é escrito
+à medida que o plano é lido (dot_writer.py, direto no stdin do Graphviz com
+--format): em memória fica apenas o índice de endereços.
+"""
+
+import argparse
+import collections
+import contextlib
+import re
+import sys
+
+from dot_writer import DotWriter, stream_render
+from terraform_plan import iter_plan
+
+# Estilo por prefixo de tipo: (nome exibido, ícone, cor) - primeiro prefixo que casar
+RESOURCE_STYLES = [
+    ("aws_instance", "EC2 Instance", "💻", "#FF9900"),
+    ("aws_ebs", "EBS Volume", "💾", "#FF9900"),
+    ("aws_lambda", "Lambda Function", "⚡", "#FF9900"),
+    ("aws_db", "RDS Database", "🗄️", "#527FFF"),
+    ("aws_rds", "RDS Cluster", "🗄️", "#527FFF"),
+    ("aws_dynamodb", "DynamoDB Table", "🗄️", "#527FFF"),
+    ("aws_config", "AWS Config", "⚙️", "#527FFF"),
+    ("aws_s3", "S3 Bucket", "📦", "#569A31"),
+    ("aws_kms", "KMS Key", "🔑", "#D4145A"),
+    ("aws_sns", "SNS Topic", "📧", "#D4145A"),
+    ("aws_backup", "AWS Backup", "🔒", "#146EB4"),
+    ("aws_cloudtrail", "CloudTrail Trail", "📝", "#146EB4"),
+    ("aws_cloudwatch", "CloudWatch", "📊", "#FF4F8B"),
+    ("aws_iam", "IAM", "👤", "#E74C3C"),
+    ("aws_vpc", "VPC", "🌐", "#3B48CC"),
+    ("aws_subnet", "Subnet", "🌐", "#3B48CC"),
+    ("aws_security_group", "Security Group", "🛡️", "#3B48CC"),
+    ("", None, "☁️", "#34495E"),
+]
+
+# Ação planejada: (símbolo do terraform plan, atributos extras do nó)
+ACTION_STYLES = {
+    ("create",): ("+ criar", {}),
+    ("update",): ("~ alterar", {"color": "#F39C12", "penwidth": "3"}),
+    ("delete",): ("- remover", {"color": "#C0392B", "penwidth": "3",
+                                "style": "rounded,filled,dashed"}),
+    ("delete", "create"): ("-/+ substituir", {"color": "#C0392B", "penwidth": "3"}),
+    ("create", "delete"): ("+/- substituir", {"color": "#C0392B", "penwidth": "3"}),
+    ("read",): ("<= ler", {}),
+    ("no-op",): ("sem alteração", {}),
+}
+
+# Raízes de referência que não são recursos
+_NON_RESOURCE_ROOTS = {"var", "local", "module", "each", "count", "path", "self", "terraform"}
+
+_INDEX = re.compile(r"\[[^\]]*\]")
+
+# Convenções dos diagramas de exemplos/
+GRAPH_ATTR = {"rankdir": "LR", "splines": "ortho", "nodesep": "0.8", "ranksep": "1.0",
+              "fontname": "Arial Bold", "fontsize": "16", "labelloc": "t"}
+NODE_ATTR = {"shape": "box", "style": "rounded,filled", "fontname": "Arial", "fontsize": "10",
+             "fontcolor": "white"}
+EDGE_ATTR = {"fontname": "Arial", "fontsize": "9"}
+
+
+def resource_style(resource_type):
+    for prefix, title, icon, color in RESOURCE_STYLES:
+        if resource_type.startswith(prefix):
+            return title or resource_type, icon, color
+
+
+def node_attrs(change):
+    """Atributos do nó de um resource_change (rótulo incluso)"""
+    title, icon, color = resource_style(change["type"])
+    actions = tuple(change.get("change", {}).get("actions", ("no-op",)))
+    symbol, extra = ACTION_STYLES.get(actions, ("/".join(actions), {}))
+    label = f"{title}\n{icon}\n{change['name']}{_index_suffix(change)}\n{symbol}"
+    attrs = {"label": label, "fillcolor": color}
+    if change.get("mode") == "data":
+        attrs.update(shape="note", fillcolor="lightyellow", fontcolor="black")
+    attrs.update(extra)
+    return attrs
+
+
+def node_id(address):
+    """ID do nó: ':' em chaves de for_each seria lido como porta no DOT"""
+    return address.replace(":", "%3A")
+
+
+def _index_suffix(change):
+    index = change.get("index")
+    if index is None:
+        return ""
+    return f"[{index}]" if isinstance(index, int) else f'["{index}"]'
+
+
+def local_address(change):
+    """Endereço de configuração do recurso dentro do módulo (sem índice)"""
+    prefix = "data." if change.get("mode") == "data" else ""
+    return f"{prefix}{change['type']}.{change['name']}"
+
+
+def referenced_address(reference):
+    """aws_kms_key.main.arn -> aws_kms_key.main; var.x / module.y -> None"""
+    parts = [_INDEX.sub("", part) for part in reference.split(".")]
+    if parts[0] == "data" and len(parts) >= 3:
+        return ".".join(parts[:3])
+    if parts[0] in _NON_RESOURCE_ROOTS or len(parts) < 2:
+        return None
+    return ".".join(parts[:2])
+
+
+def _expression_references(expressions):
+    """Todas as listas 'references' de um bloco de expressões (blocos aninhados inclusos)"""
+    if isinstance(expressions, dict):
+        for key, value in expressions.items():
+            if key == "references":
+                yield from value
+            else:
+                yield from _expression_references(value)
+    elif isinstance(expressions, list):
+        for item in expressions:
+            yield from _expression_references(item)
+
+
+def config_references(module, path=""):
+    """Gera (módulo sem índices, endereço local, {endereços referenciados}, depends_on)"""
+    for resource in module.get("resources", []):
+        refs = {referenced_address(ref) for ref in _expression_references(resource.get("expressions", {}))}
+        depends = {referenced_address(ref) for ref in resource.get("depends_on", [])}
+        refs.discard(None)
+        depends.discard(None)
+        yield path, resource["address"], refs - depends, depends
+    for name, call in module.get("module_calls", {}).items():
+        child = f"{path}.module.{name}" if path else f"module.{name}"
+        yield from config_references(call.get("module", {}), child)
+
+
+def _targets(targets, index):
+    """Instâncias referenciadas: count/for_each correspondentes ligam índice a índice"""
+    if index in targets:
+        return (targets[index],)
+    return targets.values()
+
+
+def write_diagram(plan_path, dot, title="Arquitetura do Plano Terraform"):
+    """Escreve o grafo no DotWriter lendo o plano em uma única passada
+
+    Retorna (recursos, conexões).
+    """
+    # {módulo com índices: {endereço local: {índice: id do nó}}}
+    instances = collections.defaultdict(lambda: collections.defaultdict(dict))
+    # {módulo sem índices: [módulos com índices]}
+    module_instances = collections.defaultdict(list)
+    configuration = None
+    resources = 0
+    open_cluster = ""
+
+    with contextlib.ExitStack() as cluster:
+        graph = dot
+        for key, item in iter_plan(plan_path, arrays=("resource_changes",), values=("configuration",)):
+            if key == "configuration":
+                configuration = item
+                continue
+
+            module = item.get("module_address", "")
+            if module != open_cluster:
+                cluster.close()
+                graph = dot
+                if module:
+                    # Subgrafos com o mesmo nome se fundem: o módulo pode reaparecer
+                    graph = cluster.enter_context(dot.subgraph(name=f"cluster_{module}"))
+                    graph.attr(label=module, style="filled", color="#F0F0F0", fontcolor="black")
+                open_cluster = module
+            graph.node(node_id(item["address"]), **node_attrs(item))
+
+            if module not in instances:
+                module_instances[_INDEX.sub("", module)].append(module)
+            instances[module][local_address(item)][item.get("index")] = node_id(item["address"])
+            resources += 1
+
+    edges = 0
+    for path, address, refs, depends in config_references((configuration or {}).get("root_module", {})):
+        links = [(ref, None) for ref in sorted(refs)] + [(ref, "dashed") for ref in sorted(depends)]
+        for module in module_instances.get(path, ()):
+            scope = instances[module]
+            for index, source in scope.get(address, {}).items():
+                for target_address, style in links:
+                    for target in _targets(scope.get(target_address, {}), index):
+                        dot.edge(source, target, style=style)
+                        edges += 1
+
+    dot.attr(label=f"{title}\n{resources} recursos | {edges} conexões")
+    return resources, edges
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o diagrama de arquitetura a partir do tfplan.json")
+    parser.add_argument("plan", help="saída de terraform show -json")
+    parser.add_argument("-o", "--output", help="arquivo de saída (padrão: DOT em stdout)")
+    parser.add_argument("--format", help="renderiza direto neste formato (png, svg, pdf...) via stdin do dot")
+    parser.add_argument("--title", default="Arquitetura do Plano Terraform", help="título do diagrama")
+    args = parser.parse_args()
+
+    attrs = {"graph_attr": GRAPH_ATTR, "node_attr": NODE_ATTR, "edge_attr": EDGE_ATTR}
+    if args.format:
+        if not args.output:
+            parser.error("--format exige -o")
+        with stream_render(args.output, args.format, **attrs) as dot:
+            resources, edges = write_diagram(args.plan, dot, args.title)
+    elif args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            dot = DotWriter(out, **attrs)
+            resources, edges = write_diagram(args.plan, dot, args.title)
+            dot.close()
+    else:
+        dot = DotWriter(sys.stdout, **attrs)
+        resources, edges = write_diagram(args.plan, dot, args.title)
+        dot.close()
+        print(f"✅ {resources} recursos, {edges} conexões", file=sys.stderr)
+        return
+    print(f"✅ {args.output}: {resources} recursos, {edges} conexões")
+
+
+if __name__ == "__main__":
+    main()
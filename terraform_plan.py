@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Leitura do Plano Terraform - DevSecOps Examples
+Percorre a saída de `terraform show -json` sem carregar o documento inteiro
+
+O tfplan.json de um ambiente grande passa de centenas de MB, quase tudo em
+planned_values e prior_state. Aqui só as chaves pedidas são decodificadas:
+arrays são entregues um elemento por vez e o restante é pulado por varredura,
+sem construir objetos.
+
+Com uma projeção (RESOURCE_PROJECTION), cada item é reduzido aos campos
+pedidos assim que é decodificado: change.before, after_unknown e os
+*_sensitive não sobrevivem ao item, e o pico de memória fica no tamanho do
+maior resource_change, não no do plano. (Decodificar o item inteiro no
+decodificador em C e podar é mais rápido que pular campo a campo em Python.)
+O caminho "-" lê o plano do stdin, direto de `terraform show -json`.
+"""
+
+import contextlib
+import json
+import re
+import sys
+
+# Tamanho mínimo de cada leitura do arquivo
+CHUNK_SIZE = 1024 * 1024
+
+# Campos de um resource_change lidos pelas políticas: {campo: True | projeção aninhada}
+RESOURCE_PROJECTION = {
+    "address": True,
+    "mode": True,
+    "type": True,
+    "name": True,
+    "change": {"actions": True, "after": True},
+}
+
+_decoder = json.JSONDecoder()
+
+# Escalares, strings e contêineres completos de até _FLAT_DEPTH níveis: um
+# trecho inteiro é consumido em uma chamada ao regex, sem passar pelo Python
+_FLAT_DEPTH = 4
+
+
+def _flat_pattern(depth):
+    level = r'[^\[\]{}"]++|"[^"\\]*+(?:\\.[^"\\]*+)*+"'
+    for _ in range(depth):
+        level = rf'{level}|\{{(?:{level})*+\}}|\[(?:{level})*+\]'
+    return re.compile(rf'(?:{level})*+', re.S)
+
+
+_FLAT = _flat_pattern(_FLAT_DEPTH)
+
+# Resto de buffer que ainda pode ser a continuação de um número
+_NUMBER_TAIL = re.compile(r"[0-9.eE+-]*\Z")
+
+
+class _StreamReader:
+    """Buffer deslizante sobre um arquivo texto JSON"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Lê mais dados; o tamanho da leitura cresce com o valor pendente"""
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buf) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        if self.pos:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        self.buf += chunk
+        return True
+
+    def peek(self):
+        """Próximo caractere que não é espaço ('' no fim do arquivo)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"JSON inválido: esperado {char!r} na posição {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        """Decodifica o próximo valor completo"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Um número cortado no fim do buffer (inclusive logo após ".", "e"
+            # ou "-") decodifica como um número mais curto: lê mais e refaz
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and not self.eof and _NUMBER_TAIL.match(self.buf, end) and self._fill()):
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        """Pula o próximo valor sem construí-lo"""
+        if self.peek() not in "[{":
+            self.value()
+            return
+        # O próprio contêiner é aberto aqui: o regex só consome os internos completos
+        self.pos += 1
+        depth = 1
+        while True:
+            self.pos = _FLAT.match(self.buf, self.pos).end()
+            # Fim do buffer ou string que continua no próximo bloco
+            if self.pos == len(self.buf) or self.buf[self.pos] == '"':
+                if not self._fill():
+                    raise ValueError("JSON truncado")
+                continue
+            depth += 1 if self.buf[self.pos] in "[{" else -1
+            self.pos += 1
+            if depth == 0:
+                return
+
+
+def project(value, spec):
+    """Reduz value aos campos de spec ({campo: True | projeção aninhada})"""
+    if spec is True or not isinstance(value, dict):
+        return value
+    return {key: project(value[key], sub) for key, sub in spec.items() if key in value}
+
+
+def _open_plan(path):
+    if path == "-":
+        return contextlib.nullcontext(sys.stdin)
+    return open(path, encoding="utf-8")
+
+
+def iter_plan(path, arrays=("resource_changes",), values=(), projection=None):
+    """Gera (chave, item) para cada elemento dos arrays e (chave, valor) para values
+
+    As chaves de primeiro nível aparecem na ordem do arquivo; as demais são
+    puladas. Só um item de array fica em memória por vez; com projection,
+    cada item é reduzido aos campos da projeção.
+    """
+    with _open_plan(path) as f:
+        reader = _StreamReader(f)
+        reader.expect("{")
+        while reader.peek() != "}":
+            key = reader.value()
+            reader.expect(":")
+            if key in arrays and reader.peek() == "[":
+                reader.expect("[")
+                while reader.peek() != "]":
+                    yield key, project(reader.value(), projection) if projection else reader.value()
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                reader.expect("]")
+            elif key in values:
+                yield key, reader.value()
+            else:
+                reader.skip()
+            if reader.peek() == ",":
+                reader.expect(",")
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Rasterização em Faixas - DevSecOps Examples
+Gera PNGs de altíssima resolução sem alocar o bitmap inteiro de uma vez
+
+Uso (a partir de um DOT já posicionado, ex.: dot -Tdot diagrama.gv > layout.gv):
+    python tiled_raster.py layout.gv saida.png --budget-mb 64
+    python tiled_raster.py layout.gv saida.png --verify
+
+O desenho é feito pelo próprio Graphviz (neato -n2), uma faixa horizontal por
+vez, usando o atributo viewport. Cada faixa começa exatamente na linha de
+pixel correspondente da imagem completa, então os pixels são idênticos aos do
+render em uma única passada. As linhas são comprimidas à medida que chegam e
+gravadas em blocos IDAT; o pico de memória é limitado pelo orçamento.
+"""
+
+import argparse
+import collections
+import io
+import os
+import re
+import struct
+import subprocess
+import zlib
+
+from PIL import Image
+
+# Orçamento de memória por rasterização (surface do cairo + decodificação da faixa)
+RASTER_MEMORY_BUDGET = int(os.environ.get("DIAGRAM_RASTER_BUDGET_MB", "256")) * 1024 * 1024
+
+# Engine que desenha o DOT posicionado sem refazer o layout
+DRAW_ENGINE = "neato"
+
+# pad padrão do Graphviz, em pontos (atributo pad, em polegadas, sobrescreve)
+DEFAULT_PAD_POINTS = 4.0
+
+# Cópias da faixa vivas ao mesmo tempo: surface do cairo, PNG decodificado e linhas filtradas
+_STRIP_COPIES = 3
+
+# Atributos que escalam ou giram o desenho: o cálculo das faixas não se aplica
+_UNSUPPORTED_ATTRS = ("size", "ratio", "rotate", "landscape", "viewport", "page")
+
+# Tamanho fixo dos blocos IDAT: o arquivo não depende do tamanho das faixas
+IDAT_CHUNK_BYTES = 64 * 1024
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+RasterGeometry = collections.namedtuple(
+    "RasterGeometry", ["width", "height", "dpi", "view_x", "view_y", "focus_x", "focus_y"])
+
+
+def _graph_attr(positioned, name):
+    """Primeiro valor do atributo no DOT posicionado (o grafo raiz vem antes dos clusters)"""
+    match = re.search(rf'[\s\[,;]{name}=("([^"]*)"|[^\s,\]]+)', positioned)
+    if not match:
+        return None
+    return match.group(2) if match.group(2) is not None else match.group(1)
+
+
+def raster_geometry(positioned):
+    """Tamanho em pixels e viewport do render completo, ou None se não for possível fatiar
+
+    Replica o cálculo do Graphviz: área = bb + 2 * pad (pontos), centrada no
+    centro do bb, com ROUND(pontos * dpi / 72) pixels.
+    """
+    if any(_graph_attr(positioned, name) for name in _UNSUPPORTED_ATTRS):
+        return None
+    bb = _graph_attr(positioned, "bb")
+    if not bb:
+        return None
+
+    x0, y0, x1, y1 = (float(value) for value in bb.split(","))
+    dpi = float(_graph_attr(positioned, "dpi") or _graph_attr(positioned, "resolution") or 96)
+    pad = _graph_attr(positioned, "pad")
+    if pad:
+        pad_x, _, pad_y = pad.partition(",")
+        pad_x = float(pad_x) * 72
+        pad_y = float(pad_y) * 72 if pad_y else pad_x
+    else:
+        pad_x = pad_y = DEFAULT_PAD_POINTS
+
+    view_x = x1 - x0 + 2 * pad_x
+    view_y = y1 - y0 + 2 * pad_y
+    return RasterGeometry(
+        width=int(view_x * dpi / 72 + 0.5),
+        height=int(view_y * dpi / 72 + 0.5),
+        dpi=dpi,
+        view_x=view_x,
+        view_y=view_y,
+        focus_x=(x0 + x1) / 2,
+        focus_y=(y0 + y1) / 2,
+    )
+
+
+def single_shot_bytes(geometry):
+    """Memória estimada do bitmap RGBA do render em uma única passada"""
+    return geometry.width * geometry.height * 4
+
+
+def strip_rows(geometry, budget=RASTER_MEMORY_BUDGET):
+    """Linhas por faixa para caber no orçamento"""
+    return max(1, budget // (geometry.width * 4 * _STRIP_COPIES))
+
+
+def _draw_bytes(positioned, *args):
+    result = subprocess.run([DRAW_ENGINE, "-n2", "-Tpng", *args],
+                            input=positioned.encode(), capture_output=True, check=True)
+    return result.stdout
+
+
+def _draw(positioned, *args):
+    return Image.open(io.BytesIO(_draw_bytes(positioned, *args)))
+
+
+def with_dpi(positioned, dpi):
+    """DOT posicionado com outra resolução (as posições, em pontos, não mudam)"""
+    body = positioned.rstrip()
+    return f"{body[:-1]}\tgraph [dpi={dpi:.4f}]\n}}\n"
+
+
+def draw_png(positioned, width):
+    """Desenha o DOT posicionado como PNG com width pixels de largura (bytes)
+
+    A resolução é escolhida a partir do bb, então o Graphviz já rasteriza no
+    tamanho final. Se o grafo usa atributos que mudam a escala (size,
+    ratio...), o PNG é desenhado no dpi do grafo e reduzido em memória.
+    """
+    geometry = raster_geometry(positioned)
+    if geometry is not None:
+        return _draw_bytes(with_dpi(positioned, width * 72 / geometry.view_x))
+
+    png = _draw_bytes(positioned)
+    img = Image.open(io.BytesIO(png))
+    if img.width <= width:
+        return png
+    img.thumbnail((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+    out = io.BytesIO()
+    img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def render_strip(positioned, geometry, top, rows):
+    """Desenha as linhas [top, top + rows) da imagem completa
+
+    O topo do canvas fica em focus_y + view_y / 2 (coordenadas do grafo, y
+    para cima); o foco da faixa é deslocado para que sua primeira linha caia
+    sobre a mesma coordenada da linha top do render completo.
+    """
+    points_per_pixel = 72 / geometry.dpi
+    strip_y = rows * points_per_pixel
+    focus_y = geometry.focus_y + geometry.view_y / 2 - top * points_per_pixel - strip_y / 2
+    viewport = ",".join(f"{value:.17g}" for value in
+                        (geometry.view_x, strip_y, 1, geometry.focus_x, focus_y))
+    strip = _draw(positioned, f"-Gviewport={viewport}")
+    if strip.size != (geometry.width, rows):
+        raise RuntimeError(f"faixa com tamanho inesperado: {strip.size} != {(geometry.width, rows)}")
+    return strip.convert("RGBA")
+
+
+class PngStreamWriter:
+    """Codificador PNG RGBA que recebe as linhas em blocos (filtro 0, zlib em fluxo)"""
+
+    def __init__(self, f, width, height, dpi=None, level=6):
+        self.f = f
+        self.width = width
+        self.remaining = height
+        self.compressor = zlib.compressobj(level)
+        self.pending = bytearray()
+        f.write(_PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        if dpi:
+            pixels_per_meter = int(dpi / 0.0254 + 0.5)
+            self._chunk(b"pHYs", struct.pack(">IIB", pixels_per_meter, pixels_per_meter, 1))
+
+    def _chunk(self, kind, data):
+        self.f.write(struct.pack(">I", len(data)))
+        self.f.write(kind)
+        self.f.write(data)
+        self.f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def _flush_idat(self, final=False):
+        while len(self.pending) >= IDAT_CHUNK_BYTES or (final and self.pending):
+            self._chunk(b"IDAT", bytes(self.pending[:IDAT_CHUNK_BYTES]))
+            del self.pending[:IDAT_CHUNK_BYTES]
+
+    def write_rows(self, raw):
+        """Recebe linhas RGBA contíguas e grava os blocos IDAT já completos"""
+        stride = self.width * 4
+        rows = len(raw) // stride
+        filtered = b"".join(b"\0" + raw[row * stride:(row + 1) * stride] for row in range(rows))
+        self.remaining -= rows
+        self.pending += self.compressor.compress(filtered)
+        self._flush_idat()
+
+    def close(self):
+        if self.remaining:
+            raise ValueError(f"faltam {self.remaining} linhas")
+        self.pending += self.compressor.flush()
+        self._flush_idat(final=True)
+        self._chunk(b"IEND", b"")
+
+
+def _write_strips(f, positioned, geometry, budget):
+    writer = PngStreamWriter(f, geometry.width, geometry.height, geometry.dpi)
+    step = strip_rows(geometry, budget)
+    strips = 0
+    for top in range(0, geometry.height, step):
+        rows = min(step, geometry.height - top)
+        writer.write_rows(render_strip(positioned, geometry, top, rows).tobytes())
+        strips += 1
+    writer.close()
+    return strips
+
+
+def render_tiled(positioned, output, budget=RASTER_MEMORY_BUDGET):
+    """Rasteriza o DOT posicionado em faixas e grava o PNG em fluxo
+
+    Retorna o número de faixas; levanta ValueError se o grafo usa atributos
+    que impedem o fatiamento (size, ratio, rotate...).
+    """
+    geometry = raster_geometry(positioned)
+    if geometry is None:
+        raise ValueError("o grafo não pode ser rasterizado em faixas")
+    with open(output, "wb") as f:
+        return _write_strips(f, positioned, geometry, budget)
+
+
+def verify(positioned, budget=RASTER_MEMORY_BUDGET):
+    """Compara o render em faixas com o render em uma única passada
+
+    Os dois bitmaps passam pelo mesmo PngStreamWriter, então a comparação é
+    byte a byte dos arquivos; use com um dpi menor que o de produção.
+    """
+    geometry = raster_geometry(positioned)
+    tiled, single = io.BytesIO(), io.BytesIO()
+    _write_strips(tiled, positioned, geometry, budget)
+
+    full = _draw(positioned).convert("RGBA")
+    writer = PngStreamWriter(single, full.width, full.height, geometry.dpi)
+    writer.write_rows(full.tobytes())
+    writer.close()
+    return tiled.getvalue() == single.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rasteriza um DOT posicionado em faixas")
+    parser.add_argument("layout", help="DOT já posicionado (saída de dot -Tdot)")
+    parser.add_argument("output", help="PNG de saída")
+    parser.add_argument("--budget-mb", type=int, default=RASTER_MEMORY_BUDGET // (1024 * 1024),
+                        help="orçamento de memória por faixa (padrão: DIAGRAM_RASTER_BUDGET_MB ou 256)")
+    parser.add_argument("--verify", action="store_true",
+                        help="compara com o render em uma única passada em vez de gravar")
+    args = parser.parse_args()
+
+    with open(args.layout, encoding="utf-8") as f:
+        positioned = f.read()
+    budget = args.budget_mb * 1024 * 1024
+
+    if args.verify:
+        if not verify(positioned, budget):
+            print("❌ Render em faixas difere do render completo")
+            raise SystemExit(1)
+        print("✅ Render em faixas idêntico ao render completo")
+        return
+
+    geometry = raster_geometry(positioned)
+    strips = render_tiled(positioned, args.output, budget)
+    print(f"✅ {args.output}: {geometry.width}x{geometry.height} px em {strips} faixas "
+          f"(bitmap completo: {single_shot_bytes(geometry) / 1024 / 1024:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()